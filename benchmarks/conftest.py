@@ -0,0 +1,97 @@
+"""
+Synthetic geopackages for the validator benchmarks, generated once per size and kept in
+GPKG_BENCHMARK_DIR (default a temporary directory) under the digest of their config.
+"""
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks.generator import SyntheticConfig, generate
+
+SIZES = {
+    "small": SyntheticConfig(
+        tables=2,
+        rows_per_table=1_000,
+        geometry_types=["POLYGON", "LINESTRING"],
+        error_rate=0.01,
+        attribute_tables=1,
+        foreign_keys_per_table=1,
+    ),
+    "medium": SyntheticConfig(
+        tables=4,
+        rows_per_table=25_000,
+        geometry_types=["POLYGON", "MULTIPOLYGON", "LINESTRING", "POINT"],
+        error_rate=0.01,
+        attribute_tables=2,
+        attribute_rows=10_000,
+        foreign_keys_per_table=2,
+    ),
+    "large": SyntheticConfig(
+        tables=8,
+        rows_per_table=100_000,
+        max_vertices=64,
+        geometry_types=["POLYGON", "MULTIPOLYGON", "LINESTRING", "POINT"],
+        with_z=True,
+        error_rate=0.001,
+        attribute_tables=4,
+        attribute_rows=100_000,
+        foreign_keys_per_table=2,
+    ),
+}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark-sizes",
+        default="small,medium",
+        help=f"Comma separated sizes of the synthetic geopackages: {', '.join(SIZES)}",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "size" in metafunc.fixturenames:
+        sizes = metafunc.config.getoption("benchmark_sizes").split(",")
+        metafunc.parametrize("size", sizes, scope="session")
+
+
+def cached_gpkg(name: str, config: SyntheticConfig, tmp_path_factory) -> str:
+    directory = os.environ.get("GPKG_BENCHMARK_DIR")
+    directory = Path(directory) if directory else tmp_path_factory.getbasetemp()
+    directory.mkdir(parents=True, exist_ok=True)
+    gpkg_path = directory / f"{name}-{config.digest()}.gpkg"
+    if not gpkg_path.exists():
+        # Generated next to its final path, so an interrupted run leaves no partial file.
+        partial_path = gpkg_path.with_suffix(".partial.gpkg")
+        generate(config, str(partial_path))
+        partial_path.rename(gpkg_path)
+    return str(gpkg_path)
+
+
+@pytest.fixture(scope="session")
+def synthetic_gpkg(size, tmp_path_factory) -> str:
+    return cached_gpkg(size, SIZES[size], tmp_path_factory)
+
+
+@pytest.fixture(scope="session")
+def geometry_type_gpkg(size, geometry_type, tmp_path_factory) -> str:
+    """A geopackage of the size with only feature tables of the geometry type."""
+    config = SIZES[size].model_copy(
+        update={"geometry_types": [geometry_type], "attribute_tables": 0}
+    )
+    return cached_gpkg(f"{size}-{geometry_type.lower()}", config, tmp_path_factory)
+
+
+@pytest.fixture(scope="session")
+def large_polygon_gpkg(size, tmp_path_factory) -> str:
+    """A geopackage of the size with fewer, large polygons (their blobs overflow a page)."""
+    config = SIZES[size].model_copy(
+        update={
+            "geometry_types": ["POLYGON"],
+            "rows_per_table": SIZES[size].rows_per_table // 10,
+            "min_vertices": 500,
+            "max_vertices": 2_000,
+            "attribute_tables": 0,
+        }
+    )
+    return cached_gpkg(f"{size}-large-polygon", config, tmp_path_factory)
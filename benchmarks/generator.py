@@ -0,0 +1,261 @@
+"""
+Deterministic generator of synthetic geopackages to benchmark the validations on.
+
+    python -m benchmarks.generator --config config.yml out.gpkg
+
+where config.yml holds fields of SyntheticConfig, e.g. `tables: 4` and
+`rows_per_table: 100000`. The same config (and seed) always gives the same geopackage.
+"""
+import argparse
+import hashlib
+import math
+import random
+from pathlib import Path
+from typing import List, Optional
+
+from osgeo import ogr, osr
+from pydantic import BaseModel, Field
+
+from geopackage_validator import utils
+
+GEOMETRY_TYPES = {
+    "POINT": ogr.wkbPoint,
+    "LINESTRING": ogr.wkbLineString,
+    "POLYGON": ogr.wkbPolygon,
+    "MULTIPOINT": ogr.wkbMultiPoint,
+    "MULTILINESTRING": ogr.wkbMultiLineString,
+    "MULTIPOLYGON": ogr.wkbMultiPolygon,
+}
+
+# Errors injected in the geometries, per geometry type the ones that apply.
+INVALID = "invalid"
+CLOCKWISE = "clockwise"
+EMPTY = "empty"
+NULL = "null"
+
+ERRORS = {
+    "POINT": [EMPTY, NULL],
+    "LINESTRING": [EMPTY, NULL],
+    "POLYGON": [INVALID, CLOCKWISE, EMPTY, NULL],
+    "MULTIPOINT": [EMPTY, NULL],
+    "MULTILINESTRING": [EMPTY, NULL],
+    "MULTIPOLYGON": [INVALID, CLOCKWISE, EMPTY, NULL],
+}
+
+INSERT_CHUNK_SIZE = 500
+
+
+class SyntheticConfig(BaseModel):
+    seed: int = 0
+    srs: int = 28992
+    tables: int = Field(1, ge=0)
+    rows_per_table: int = Field(1000, ge=0)
+    min_vertices: int = Field(4, ge=3)
+    max_vertices: int = Field(16, ge=3)
+    # Assigned to the tables in turn.
+    geometry_types: List[str] = ["POLYGON"]
+    with_z: bool = False
+    with_m: bool = False
+    # Fraction of the geometries with one of the ERRORS of their type.
+    error_rate: float = Field(0.0, ge=0, le=1)
+    attribute_tables: int = Field(0, ge=0)
+    attribute_rows: int = Field(100, ge=0)
+    # Foreign key columns of every attribute table, each referencing a feature table.
+    foreign_keys_per_table: int = Field(0, ge=0)
+
+    def digest(self) -> str:
+        return hashlib.sha256(self.model_dump_json().encode("utf-8")).hexdigest()[:16]
+
+
+class GeometryWriter:
+    """WKT of random geometries, the rings of polygons are counterclockwise."""
+
+    def __init__(self, config: SyntheticConfig, rng: random.Random):
+        self.config = config
+        self.rng = rng
+        self.dimension = ("Z" if config.with_z else "") + ("M" if config.with_m else "")
+
+    def coordinate(self, x: float, y: float, index: int) -> str:
+        values = [f"{x:.3f}", f"{y:.3f}"]
+        if self.config.with_z:
+            values.append(f"{self.rng.uniform(1, 100):.3f}")
+        if self.config.with_m:
+            values.append(str(index))
+        return " ".join(values)
+
+    def center(self):
+        return self.rng.uniform(100000, 200000), self.rng.uniform(400000, 500000)
+
+    def vertex_count(self) -> int:
+        return self.rng.randint(self.config.min_vertices, self.config.max_vertices)
+
+    def ring(self, clockwise=False) -> str:
+        cx, cy = self.center()
+        radius = self.rng.uniform(5, 50)
+        angles = sorted(
+            self.rng.uniform(0, 2 * math.pi) for _ in range(self.vertex_count())
+        )
+        if clockwise:
+            angles.reverse()
+        points = [
+            (cx + radius * math.cos(angle), cy + radius * math.sin(angle))
+            for angle in angles
+        ]
+        points.append(points[0])
+        return self.coordinates(points)
+
+    def bowtie(self) -> str:
+        x, y = self.center()
+        points = [(x, y), (x + 10, y + 10), (x + 10, y), (x, y + 10), (x, y)]
+        return self.coordinates(points)
+
+    def line(self) -> str:
+        x, y = self.center()
+        points = []
+        for _ in range(self.vertex_count()):
+            x, y = x + self.rng.uniform(-20, 20), y + self.rng.uniform(-20, 20)
+            points.append((x, y))
+        return self.coordinates(points)
+
+    def coordinates(self, points) -> str:
+        return ", ".join(self.coordinate(x, y, i) for i, (x, y) in enumerate(points))
+
+    def polygon_body(self, error: Optional[str]) -> str:
+        if error == INVALID:
+            return f"({self.bowtie()})"
+        return f"({self.ring(clockwise=error == CLOCKWISE)})"
+
+    def wkt(self, geometry_type: str, error: Optional[str] = None) -> Optional[str]:
+        if error == NULL:
+            return None
+        prefix = f"{geometry_type} {self.dimension}".strip()
+        if error == EMPTY:
+            return f"{prefix} EMPTY"
+        if geometry_type == "POINT":
+            return f"{prefix} ({self.coordinate(*self.center(), 0)})"
+        if geometry_type == "MULTIPOINT":
+            points = ", ".join(
+                f"({self.coordinate(*self.center(), i)})" for i in range(3)
+            )
+            return f"{prefix} ({points})"
+        if geometry_type == "LINESTRING":
+            return f"{prefix} ({self.line()})"
+        if geometry_type == "MULTILINESTRING":
+            return f"{prefix} (({self.line()}), ({self.line()}))"
+        if geometry_type == "POLYGON":
+            return f"{prefix} {self.polygon_body(error)}"
+        if geometry_type == "MULTIPOLYGON":
+            return f"{prefix} ({self.polygon_body(error)}, {self.polygon_body(None)})"
+        raise ValueError(f"unknown geometry type {geometry_type}")
+
+
+def ogr_geometry_type(config: SyntheticConfig, geometry_type: str) -> int:
+    return ogr.GT_SetModifier(
+        GEOMETRY_TYPES[geometry_type], int(config.with_z), int(config.with_m)
+    )
+
+
+def feature_table_names(config: SyntheticConfig) -> List[str]:
+    return [
+        f"{config.geometry_types[i % len(config.geometry_types)].lower()}_{i}"
+        for i in range(config.tables)
+    ]
+
+
+def generate(config: SyntheticConfig, gpkg_path: str) -> str:
+    """Write the geopackage of the config to gpkg_path (overwriting it)."""
+    rng = random.Random(config.seed)
+    geometries = GeometryWriter(config, rng)
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(config.srs)
+
+    Path(gpkg_path).unlink(missing_ok=True)
+    dataset = ogr.GetDriverByName("GPKG").CreateDataSource(str(gpkg_path))
+
+    for i, table_name in enumerate(feature_table_names(config)):
+        geometry_type = config.geometry_types[i % len(config.geometry_types)]
+        layer = dataset.CreateLayer(
+            table_name,
+            srs,
+            ogr_geometry_type(config, geometry_type),
+            ["GEOMETRY_NAME=geom", "FID=fid"],
+        )
+        layer.CreateField(ogr.FieldDefn("name", ogr.OFTString))
+        layer.CreateField(ogr.FieldDefn("value", ogr.OFTReal))
+        definition = layer.GetLayerDefn()
+
+        layer.StartTransaction()
+        for row in range(config.rows_per_table):
+            error = None
+            if rng.random() < config.error_rate:
+                error = rng.choice(ERRORS[geometry_type])
+            feature = ogr.Feature(definition)
+            feature.SetField("name", f"{table_name} {row}")
+            feature.SetField("value", rng.uniform(0, 1000))
+            wkt = geometries.wkt(geometry_type, error)
+            if wkt is not None:
+                feature.SetGeometry(ogr.CreateGeometryFromWkt(wkt))
+            layer.CreateFeature(feature)
+        layer.CommitTransaction()
+
+    feature_tables = feature_table_names(config)
+    for i in range(config.attribute_tables):
+        table_name = f"attributes_{i}"
+        fk_columns = [
+            (f"{referenced}_fid", referenced)
+            for referenced in rng.sample(
+                feature_tables, min(config.foreign_keys_per_table, len(feature_tables))
+            )
+        ]
+        columns = ", ".join(
+            [
+                "fid INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL",
+                "name TEXT",
+                "value REAL",
+            ]
+            + [
+                f'{column} INTEGER REFERENCES "{referenced}"(fid)'
+                for column, referenced in fk_columns
+            ]
+        )
+        dataset.ExecuteSQL(f'CREATE TABLE "{table_name}" ({columns})')
+        dataset.ExecuteSQL(
+            "INSERT INTO gpkg_contents (table_name, data_type, identifier) "
+            f"VALUES ('{table_name}', 'attributes', '{table_name}')"
+        )
+        insert = 'INSERT INTO "{}" (name, value{}) VALUES '.format(
+            table_name, "".join(f", {column}" for column, _ in fk_columns)
+        )
+        dataset.StartTransaction()
+        for start in range(0, config.attribute_rows, INSERT_CHUNK_SIZE):
+            values = []
+            for row in range(
+                start, min(start + INSERT_CHUNK_SIZE, config.attribute_rows)
+            ):
+                references = "".join(
+                    f", {rng.randint(1, max(1, config.rows_per_table))}"
+                    for _ in fk_columns
+                )
+                values.append(
+                    f"('{table_name} {row}', {rng.uniform(0, 1000)}{references})"
+                )
+            dataset.ExecuteSQL(insert + ", ".join(values))
+        dataset.CommitTransaction()
+
+    dataset = None
+    return gpkg_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("gpkg_path")
+    parser.add_argument("--config", help="JSON or YAML file with a SyntheticConfig")
+    args = parser.parse_args()
+    config = SyntheticConfig.model_validate(
+        utils.load_config(args.config) if args.config else {}
+    )
+    generate(config, args.gpkg_path)
+
+
+if __name__ == "__main__":
+    main()
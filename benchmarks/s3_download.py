@@ -0,0 +1,125 @@
+"""
+Throughput of the S3 download of s3.minio_resource for a range of part sizes and
+concurrencies.
+
+Against a real (MinIO) server:
+
+    python -m benchmarks.s3_download --endpoint localhost:9000 --access-key minioadmin \
+        --secret-key minioadmin --bucket deliveries --key large.gpkg --insecure
+
+Without a server, against a stand-in that limits every connection to --simulate-mbps
+with --simulate-latency seconds until the first byte:
+
+    python -m benchmarks.s3_download --simulate --simulate-size 512
+"""
+import argparse
+import os
+import tempfile
+import time
+from collections import namedtuple
+
+from minio import Minio
+
+from geopackage_validator.s3 import minio_resource
+
+MB = 1024 * 1024
+
+Stat = namedtuple("Stat", ["size", "etag"])
+
+
+class SimulatedResponse:
+    def __init__(self, length, mbps, latency):
+        self.length = length
+        self.mbps = mbps
+        self.latency = latency
+
+    def stream(self, amt):
+        time.sleep(self.latency)
+        chunk = b"\0" * amt
+        sent = 0
+        while sent < self.length:
+            size = min(amt, self.length - sent)
+            time.sleep(size / (self.mbps * MB))
+            sent += size
+            yield chunk[:size]
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+def simulated_minio(size, mbps, latency):
+    class SimulatedMinio:
+        """Stand-in for an S3 server with a bandwidth limit per connection."""
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def bucket_exists(self, bucket_name):
+            return True
+
+        def stat_object(self, bucket_name, object_name):
+            return Stat(size, "etag")
+
+        def get_object(self, bucket_name, object_name, offset=0, length=0, **kwargs):
+            return SimulatedResponse(length, mbps, latency)
+
+        def fget_object(self, bucket_name, object_name, file_path):
+            with open(file_path, "wb") as f:
+                for chunk in SimulatedResponse(size, mbps, latency).stream(MB):
+                    f.write(chunk)
+
+    return SimulatedMinio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--endpoint")
+    parser.add_argument("--access-key")
+    parser.add_argument("--secret-key")
+    parser.add_argument("--bucket")
+    parser.add_argument("--key")
+    parser.add_argument("--insecure", action="store_true")
+    parser.add_argument("--simulate", action="store_true")
+    parser.add_argument("--simulate-size", type=int, default=256, help="MB")
+    parser.add_argument("--simulate-mbps", type=float, default=50)
+    parser.add_argument("--simulate-latency", type=float, default=0.02)
+    parser.add_argument("--part-sizes", default="16,64", help="MB, comma separated")
+    parser.add_argument("--concurrencies", default="1,4,8,16")
+    parser.add_argument("--temp-dir", default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    if args.simulate:
+        minio = simulated_minio(
+            args.simulate_size * MB, args.simulate_mbps, args.simulate_latency
+        )
+        location = ("simulated", "access", "secret", "bucket", "key")
+    else:
+        minio = Minio
+        location = (args.endpoint, args.access_key, args.secret_key)
+        location += (args.bucket, args.key)
+
+    print(f"{'part size MB':>12} {'concurrency':>11} {'seconds':>8} {'MB/s':>8}")
+    for part_size in [int(p) * MB for p in args.part_sizes.split(",")]:
+        for concurrency in [int(c) for c in args.concurrencies.split(",")]:
+            start = time.monotonic()
+            with minio_resource(
+                *location,
+                secure=not args.insecure,
+                minio=minio,
+                part_size=part_size,
+                concurrency=concurrency,
+                temp_dir=args.temp_dir,
+            ) as localfilename:
+                size = os.path.getsize(localfilename)
+            seconds = time.monotonic() - start
+            print(
+                f"{part_size // MB:>12} {concurrency:>11} {seconds:>8.2f} "
+                f"{size / MB / seconds:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Latency and throughput of the validation service (the serve command) under load:
+
+    geopackage-validator serve --workers 4 &
+    python -m benchmarks.serve_load --gpkg tests/data/test_allcorrect.gpkg \
+        --requests 500 --concurrency 8
+
+With --start-server a server with --workers workers is started on a free localhost port
+for the duration of the benchmark instead.
+"""
+import argparse
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def post(url: str, body: bytes) -> Tuple[int, float]:
+    request = urllib.request.Request(
+        url, data=body, headers={"Content-Type": "application/octet-stream"}
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def load(url: str, body: bytes, requests: int, concurrency: int):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        responses = list(executor.map(lambda _: post(url, body), range(requests)))
+    duration = time.perf_counter() - start
+
+    statuses = Counter(status for status, _ in responses)
+    latencies = [latency for status, latency in responses if status == 200]
+    print(f"{requests} requests with concurrency {concurrency} in {duration:.2f}s")
+    print(f"throughput: {requests / duration:.1f} requests/s")
+    print(f"statuses: {dict(sorted(statuses.items()))}")
+    if latencies:
+        print(
+            "latency of successful requests: "
+            f"p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+            f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, "
+            f"mean {statistics.mean(latencies) * 1000:.1f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--endpoint", default="/validate")
+    parser.add_argument("--query", default="", help="e.g. validations=RQ1,RQ2")
+    parser.add_argument("--gpkg", required=True, help="geopackage to upload")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--start-server", action="store_true")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=64)
+    args = parser.parse_args()
+
+    body = Path(args.gpkg).read_bytes()
+    url = args.url
+    validation_server = None
+    if args.start_server:
+        from geopackage_validator.server import ValidationServer, WorkerPool
+
+        validation_server = ValidationServer(
+            ("127.0.0.1", 0), WorkerPool(args.workers, args.queue_size)
+        )
+        threading.Thread(target=validation_server.serve_forever, daemon=True).start()
+        url = "http://127.0.0.1:{}".format(validation_server.server_address[1])
+    url = f"{url}{args.endpoint}" + (f"?{args.query}" if args.query else "")
+
+    try:
+        # One request per worker first (idle workers take turns), so the workers have
+        # imported everything.
+        for _ in range(args.workers if args.start_server else 1):
+            post(url, body)
+        load(url, body, args.requests, args.concurrency)
+    finally:
+        if validation_server is not None:
+            validation_server.shutdown()
+            validation_server.server_close()
+            validation_server.pool.close()
+
+
+if __name__ == "__main__":
+    main()
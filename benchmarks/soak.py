@@ -0,0 +1,79 @@
+"""
+Memory of a process validating the same geopackage many times in a row, which should
+stay flat once the first validations have warmed up:
+
+    python -m benchmarks.soak --iterations 10000 --gpkg tests/data/test_allcorrect.gpkg
+
+Without --gpkg a small synthetic geopackage is generated. The resident set size is
+sampled every --sample-every validations, the growth between the first and the last
+sample after --warmup validations is reported.
+"""
+import argparse
+import gc
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.generator import SyntheticConfig, generate
+from geopackage_validator.validate import validate
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+MB = 1024 * 1024
+
+
+def rss_bytes() -> int:
+    """The current resident set size, the peak size where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def soak(gpkg_path: str, iterations: int, sample_every: int, warmup: int):
+    samples = []
+    start = time.perf_counter()
+    for iteration in range(1, iterations + 1):
+        validate(gpkg_path, jobs=1)
+        if iteration % sample_every == 0 or iteration == iterations:
+            gc.collect()
+            samples.append((iteration, rss_bytes()))
+            print(
+                f"{iteration:>8} validations  {samples[-1][1] / MB:8.1f} MB  "
+                f"{(time.perf_counter() - start) / iteration * 1000:7.2f} ms/validation"
+            )
+    after_warmup = [sample for sample in samples if sample[0] >= warmup] or samples
+    (first_iteration, first_rss), (last_iteration, last_rss) = (
+        after_warmup[0],
+        after_warmup[-1],
+    )
+    growth = last_rss - first_rss
+    per_validation = growth / max(1, last_iteration - first_iteration)
+    print(
+        f"growth after {first_iteration} validations: {growth / MB:.1f} MB "
+        f"({per_validation:.0f} bytes per validation)"
+    )
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--gpkg", help="geopackage to validate")
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--sample-every", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        gpkg_path = args.gpkg
+        if gpkg_path is None:
+            gpkg_path = generate(
+                SyntheticConfig(tables=3, rows_per_table=100, error_rate=0.05),
+                os.path.join(temp_dir, "soak.gpkg"),
+            )
+        soak(gpkg_path, args.iterations, args.sample_every, args.warmup)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Per validator benchmarks on synthetic geopackages, run with pytest-benchmark:
+
+    pytest benchmarks --benchmark-only --benchmark-sizes small,medium,large
+"""
+import pytest
+
+from benchmarks.generator import GEOMETRY_TYPES
+from geopackage_validator import gpkg_binary, utils, validations
+from geopackage_validator.generate import generate_table_definitions
+from geopackage_validator.validations import geometry_scan, geometry_type_check
+
+
+@pytest.fixture(scope="session")
+def dataset(synthetic_gpkg):
+    return utils.open_dataset(synthetic_gpkg)
+
+
+@pytest.fixture(scope="session")
+def table_definitions(dataset):
+    return generate_table_definitions(dataset, with_indexes_and_fks=True)
+
+
+@pytest.mark.parametrize("validator_name", validations.__all__)
+def test_validator(benchmark, dataset, table_definitions, validator_name):
+    validator_class = getattr(validations, validator_name)
+
+    def run():
+        return validator_class(dataset, table_definitions=table_definitions).validate()
+
+    benchmark.extra_info["validation_code"] = validator_class.validation_code
+    benchmark(run)
+
+
+@pytest.mark.parametrize("with_indexes_and_fks", [False, True])
+def test_generate_table_definitions(benchmark, dataset, with_indexes_and_fks):
+    benchmark(generate_table_definitions, dataset, with_indexes_and_fks)
+
+
+@pytest.mark.parametrize("plan", ["row_type", "generic"])
+@pytest.mark.parametrize("geometry_type", list(GEOMETRY_TYPES))
+def test_validity_plan(benchmark, monkeypatch, geometry_type_gpkg, geometry_type, plan):
+    """The validity scan planned per row geometry type against all checks for every row."""
+    if plan == "generic":
+        monkeypatch.setattr(geometry_scan, "SIMPLE_WHEN_VALID_TYPES", ())
+    dataset = utils.open_dataset(geometry_type_gpkg)
+    queries = [
+        geometry_scan.scan_sql(
+            [geometry_scan.VALID], table_name, column_name, geometry_type_name
+        )
+        for table_name, column_name, geometry_type_name in utils.dataset_geometry_tables(
+            dataset
+        )
+    ]
+
+    def run():
+        return [
+            geometry_scan.execute_scan(dataset, sql, names) for sql, names in queries
+        ]
+
+    benchmark.extra_info["geometry_type"] = geometry_type
+    benchmark(run)
+
+
+@pytest.mark.parametrize(
+    "geometry_backend", [geometry_scan.SPATIALITE, geometry_scan.NATIVE]
+)
+@pytest.mark.parametrize(
+    "validator_name",
+    [
+        "EmptyGeometryValidator",
+        "PolygonWindingOrderValidator",
+        "GeometryTypeEqualsGpkgDefinitionValidator",
+    ],
+)
+def test_geometry_backend(
+    benchmark, large_polygon_gpkg, validator_name, geometry_backend
+):
+    """Validations on large polygons with spatialite against with the native backend."""
+    dataset = utils.open_dataset(large_polygon_gpkg)
+    validator_class = getattr(validations, validator_name)
+
+    def run():
+        return validator_class(dataset, geometry_backend=geometry_backend).validate()
+
+    benchmark.extra_info["validation_code"] = validator_class.validation_code
+    benchmark.extra_info["geometry_backend"] = geometry_backend
+    benchmark(run)
+
+
+@pytest.mark.parametrize("loops", ["python", "numpy"])
+@pytest.mark.parametrize(
+    "validator_name", ["PolygonWindingOrderValidator", "GeometryDimensionValidator"]
+)
+def test_native_coordinate_loops(
+    benchmark, monkeypatch, large_polygon_gpkg, validator_name, loops
+):
+    """The native backend on large polygons with the plain Python and the numpy loops."""
+    if loops == "python":
+        monkeypatch.setattr(gpkg_binary, "numpy", None)
+    else:
+        pytest.importorskip("numpy")
+    dataset = utils.open_dataset(large_polygon_gpkg)
+    validator_class = getattr(validations, validator_name)
+
+    def run():
+        return validator_class(
+            dataset, geometry_backend=geometry_scan.NATIVE
+        ).validate()
+
+    benchmark.extra_info["validation_code"] = validator_class.validation_code
+    benchmark.extra_info["loops"] = loops
+    benchmark(run)
+
+
+@pytest.mark.parametrize("reader", ["ogr", "wkb"])
+def test_legacy_geometry_types(benchmark, dataset, synthetic_gpkg, reader):
+    """RQ3 reading every feature with OGR against reading the WKB type codes."""
+
+    def run():
+        connection = gpkg_binary.readonly_connection(synthetic_gpkg)
+        try:
+            for layer in dataset:
+                if not layer.GetGeometryColumn():
+                    continue
+                if reader == "ogr":
+                    rows = geometry_type_check.feature_geometry_types(layer)
+                else:
+                    rows = geometry_type_check.wkb_geometry_types(
+                        connection, layer.GetName(), layer.GetGeometryColumn()
+                    )
+                for _ in rows:
+                    pass
+        finally:
+            connection.close()
+
+    benchmark(run)
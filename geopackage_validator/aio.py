@@ -0,0 +1,192 @@
+"""
+Asyncio interface of validate. The validations run in worker processes, so the event loop
+is never blocked by GDAL and a cancelled validation is stopped at once: its worker (with
+the SQLite statement it is executing) is killed and replaced.
+
+    results, validations_executed, success = await validate_async("my.gpkg")
+
+    async for result in validate_iter_async("my.gpkg", validations="RQ1,RQ2"):
+        print(result.validation_code, result.success)
+"""
+import asyncio
+import multiprocessing
+import sys
+import traceback
+from collections import namedtuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from osgeo import gdal
+
+from geopackage_validator import utils
+from geopackage_validator import validate
+
+ValidatorResult = namedtuple(
+    "ValidatorResult", ["validation_code", "results", "success"]
+)
+
+
+def _worker_main(connection, gdal_config_options):
+    """Loop of a worker process: validate and send each validator result and the outcome."""
+    for key, value in gdal_config_options.items():
+        gdal.SetConfigOption(key, value)
+    while True:
+        try:
+            gpkg_path, options = connection.recv()
+        except EOFError:
+            return
+
+        def on_result(validation_code, results, success):
+            connection.send(
+                ("result", ValidatorResult(validation_code, results, success))
+            )
+
+        details = {}
+        try:
+            results, validations_executed, success = validate.validate(
+                gpkg_path, details=details, on_result=on_result, **options
+            )
+            connection.send(("done", (results, validations_executed, success, details)))
+        except BaseException:
+            exc_type, exc_value, _ = sys.exc_info()
+            connection.send(
+                ("error", "".join(traceback.format_exception_only(exc_type, exc_value)))
+            )
+
+
+class Worker:
+    def __init__(self, context):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_connection, utils.gdal_config_options()),
+            daemon=True,
+        )
+        self.process.start()
+        child_connection.close()
+
+    async def receive(self):
+        """The next message of the worker, without blocking the event loop."""
+        if not self.connection.poll():
+            loop = asyncio.get_running_loop()
+            ready = loop.create_future()
+            try:
+                loop.add_reader(
+                    self.connection.fileno(),
+                    lambda: ready.done() or ready.set_result(None),
+                )
+            except NotImplementedError:
+                # Event loops without add_reader (the proactor loop on Windows).
+                return await loop.run_in_executor(None, self.connection.recv)
+            try:
+                await ready
+            finally:
+                loop.remove_reader(self.connection.fileno())
+        return self.connection.recv()
+
+    def stop(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class AsyncValidationPool:
+    """
+    Runs validations in at most max_workers worker processes (default the CPU quota of
+    the container). Workers are started on demand and reused, a worker whose validation
+    is cancelled or fails is killed. The validate options are those of validate.validate,
+    the validation itself runs with jobs=1 in its worker.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or utils.available_cpu_count()
+        # Spawned, so the workers do not inherit the state of the event loop thread.
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: List[Worker] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _run(self, gpkg_path: str, options: Dict) -> AsyncIterator[Tuple]:
+        """The ("result", ValidatorResult) messages and finally the ("done", outcome) message."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        async with self._semaphore:
+            worker = self._idle.pop() if self._idle else Worker(self._context)
+            finished = False
+            try:
+                worker.connection.send((gpkg_path, dict(options, jobs=1)))
+                while True:
+                    try:
+                        kind, payload = await worker.receive()
+                    except EOFError:
+                        raise IOError("validation worker stopped")
+                    if kind == "error":
+                        finished = True
+                        raise RuntimeError(payload)
+                    yield kind, payload
+                    if kind == "done":
+                        finished = True
+                        return
+            finally:
+                # Cancelled or abandoned halfway, the worker is still validating.
+                if finished:
+                    self._idle.append(worker)
+                else:
+                    worker.stop()
+
+    async def iterate(
+        self, gpkg_path: str, details: Optional[Dict] = None, **options
+    ) -> AsyncIterator[ValidatorResult]:
+        """Yield the result of every validator as soon as it is done."""
+        runs = self._run(gpkg_path, options)
+        try:
+            async for kind, payload in runs:
+                if kind == "result":
+                    yield payload
+                elif details is not None:
+                    details.update(payload[3])
+        finally:
+            await runs.aclose()
+
+    async def validate(
+        self, gpkg_path: str, details: Optional[Dict] = None, **options
+    ) -> Tuple[List[Dict], List[str], bool]:
+        """The (results, validations_executed, success) of validate.validate."""
+        runs = self._run(gpkg_path, options)
+        try:
+            async for kind, payload in runs:
+                if kind == "done":
+                    results, validations_executed, success, run_details = payload
+                    if details is not None:
+                        details.update(run_details)
+                    return results, validations_executed, success
+        finally:
+            await runs.aclose()
+        raise IOError("validation worker stopped")
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().stop()
+
+
+_default_pool: Optional[AsyncValidationPool] = None
+
+
+def default_pool() -> AsyncValidationPool:
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = AsyncValidationPool()
+    return _default_pool
+
+
+async def validate_async(
+    gpkg_path: str, details: Optional[Dict] = None, **options
+) -> Tuple[List[Dict], List[str], bool]:
+    """validate.validate in a worker process of the default pool."""
+    return await default_pool().validate(gpkg_path, details, **options)
+
+
+async def validate_iter_async(
+    gpkg_path: str, details: Optional[Dict] = None, **options
+) -> AsyncIterator[ValidatorResult]:
+    """The result of every validator as soon as it is done, run in the default pool."""
+    async for result in default_pool().iterate(gpkg_path, details, **options):
+        yield result
@@ -0,0 +1,172 @@
+"""Validate many geopackages with one pool of worker processes."""
+import glob
+import logging
+import os
+import sys
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from osgeo import gdal
+
+from geopackage_validator import output
+from geopackage_validator import utils
+from geopackage_validator import validate
+from geopackage_validator.validations.validator import ValidationLevel, format_result
+
+logger = logging.getLogger(__name__)
+
+GPKG_SUFFIX = ".gpkg"
+
+
+def collect_gpkg_paths(sources: Iterable[str], file_list: str = None) -> List[str]:
+    """
+    Collect the geopackages from directories (searched recursively), glob patterns, file
+    paths and a file list with one path per line. The paths are returned largest first,
+    so the longest validations are started first and do not end up last in the pool.
+    """
+    paths = []
+    for source in sources:
+        if Path(source).is_dir():
+            paths += [str(p) for p in Path(source).rglob(f"*{GPKG_SUFFIX}")]
+        elif glob.has_magic(source):
+            paths += glob.glob(source, recursive=True)
+        else:
+            paths.append(source)
+
+    if file_list is not None:
+        with Path(file_list).open("r") as file_list_file:
+            paths += [line.strip() for line in file_list_file if line.strip()]
+
+    unique_paths = list(OrderedDict.fromkeys(paths))
+    return sorted(unique_paths, key=file_size, reverse=True)
+
+
+def file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+# Loaded table definitions, validators and validate options of a batch worker, set once
+# per worker process.
+_batch_options: Dict = {}
+
+
+def _init_batch_worker(gdal_config_options, options):
+    global _batch_options
+    for key, value in gdal_config_options.items():
+        gdal.SetConfigOption(key, value)
+    _batch_options = options
+
+
+def validate_file(gpkg_path: str, **options) -> OrderedDict:
+    """Validate one geopackage and return its report in the log_output structure."""
+    start_time = datetime.now()
+    duration_start = time.monotonic()
+    details = {}
+    try:
+        results, validations_executed, success = validate.validate(
+            gpkg_path, details=details, **options
+        )
+    except Exception:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        results = [
+            batch_error_result(traceback.format_exception_only(exc_type, exc_value))
+        ]
+        validations_executed, success = None, False
+    return output.build_output(
+        results=results,
+        success=success,
+        filename=gpkg_path,
+        validations_executed=validations_executed,
+        start_time=start_time,
+        duration_seconds=time.monotonic() - duration_start,
+        details=details,
+    )
+
+
+def _validate_file_in_worker(gpkg_path: str) -> OrderedDict:
+    return validate_file(gpkg_path, **_batch_options)
+
+
+def batch_error_result(trace: List[str]) -> Dict:
+    return format_result(
+        validation_code="UNKNOWN_ERROR",
+        validation_description="No unexpected errors must occur.",
+        level=ValidationLevel.UNKNOWN_ERROR,
+        trace=[t.strip("\n") for t in trace],
+    )
+
+
+def validate_batch(
+    gpkg_paths: List[str],
+    table_definitions_path=None,
+    validations_path=None,
+    validations="",
+    jobs=None,
+    **validate_options,
+) -> Iterable[OrderedDict]:
+    """
+    Validate the geopackages in a pool of jobs worker processes, yielding the report of
+    every geopackage as soon as it is done. The table definitions and validations are
+    loaded once and shared by all workers. When jobs is 0 or None the pool size is the
+    CPU quota of the container.
+    """
+    utils.check_gdal_version()
+
+    table_definitions = (
+        validate.load_table_definitions(table_definitions_path)
+        if table_definitions_path is not None
+        else None
+    )
+    validators = validate.validators_to_use(
+        validations, validations_path, table_definitions is not None
+    )
+    options = dict(
+        validate_options,
+        table_definitions=table_definitions,
+        validators=validators,
+        jobs=1,
+    )
+
+    if not jobs:
+        jobs = utils.available_cpu_count()
+    jobs = min(jobs, len(gpkg_paths))
+
+    if jobs <= 1:
+        for gpkg_path in gpkg_paths:
+            yield validate_file(gpkg_path, **options)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_batch_worker,
+        initargs=(utils.gdal_config_options(), options),
+    ) as executor:
+        # Submitted largest first, the pool starts them in this order.
+        futures = {
+            executor.submit(_validate_file_in_worker, gpkg_path): gpkg_path
+            for gpkg_path in gpkg_paths
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception:
+                exc_type, exc_value, exc_traceback = sys.exc_info()
+                logger.error("validation of %s failed: %s", futures[future], exc_value)
+                yield output.build_output(
+                    results=[
+                        batch_error_result(
+                            traceback.format_exception_only(exc_type, exc_value)
+                        )
+                    ],
+                    success=False,
+                    filename=futures[future],
+                    start_time=datetime.now(),
+                )
@@ -0,0 +1,308 @@
+"""On-disk cache of validation results, keyed by the content of the geopackage."""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from geopackage_validator import __version__
+from geopackage_validator.models import TablesDefinition
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+ENTRY_SUFFIX = ".json"
+
+
+def file_digest(path: str) -> str:
+    """Streaming sha256 of the file content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def table_definitions_digest(table_definitions: Optional[TablesDefinition]) -> str:
+    if table_definitions is None:
+        return ""
+    return hashlib.sha256(
+        table_definitions.model_dump_json().encode("utf-8")
+    ).hexdigest()
+
+
+class ResultCache:
+    """
+    Cache of (results, validations_executed, success) of validations, stored as one json
+    file per key in cache_dir. When the entries together get larger than max_size bytes
+    the least recently used entries (by modification time, which is updated on every hit)
+    are removed. The size of the entries is counted at the first put and then kept up to
+    date by the puts, the cache directory is only listed again when it exceeds max_size.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_MAX_SIZE):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+        self._size: Optional[int] = None
+
+    def key(
+        self,
+        gpkg_path: str,
+        validation_codes: List[str],
+        table_definitions: Optional[TablesDefinition] = None,
+        options: Dict = None,
+    ) -> Optional[str]:
+        """
+        The key of a validation of the geopackage content with the given validations, table
+        definitions and options. Geopackages that are not local files (gdal /vsi paths) are
+        not cached, None is returned.
+        """
+        if gpkg_path.startswith("/vsi") or not Path(gpkg_path).is_file():
+            return None
+        key_parts = {
+            "version": __version__,
+            "gpkg": file_digest(gpkg_path),
+            "validations": validation_codes,
+            "table_definitions": table_definitions_digest(table_definitions),
+            "options": options or {},
+        }
+        return hashlib.sha256(
+            json.dumps(key_parts, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{ENTRY_SUFFIX}"
+
+    def get(self, key: Optional[str]) -> Optional[Dict]:
+        if key is None:
+            return None
+        path = self.entry_path(key)
+        try:
+            with path.open("r") as entry_file:
+                entry = json.load(entry_file)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        logger.debug("validation result found in cache: %s", path)
+        return entry
+
+    def put(self, key: Optional[str], entry: Dict) -> None:
+        if key is None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Written to a temporary file first, so concurrent readers never see half an entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        path = self.entry_path(key)
+        try:
+            with os.fdopen(fd, "w") as entry_file:
+                json.dump(entry, entry_file)
+            size = os.path.getsize(tmp_path)
+            replaced_size = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning("could not write validation result to cache", exc_info=True)
+            Path(tmp_path).unlink(missing_ok=True)
+            return
+        if self._size is None:
+            self._size = sum(stat.st_size for _, stat in self.entries())
+        else:
+            self._size += size - replaced_size
+        if self._size > self.max_size:
+            self.evict()
+
+    def entries(self) -> Iterable[Tuple[Path, os.stat_result]]:
+        for path in self.cache_dir.glob(f"*{ENTRY_SUFFIX}"):
+            try:
+                yield path, path.stat()
+            except FileNotFoundError:
+                # Removed by another process in the meantime.
+                continue
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in max_size."""
+        entries = sorted(self.entries(), key=lambda entry: entry[1].st_mtime)
+        size = sum(stat.st_size for _, stat in entries)
+        for path, stat in entries:
+            if size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            size -= stat.st_size
+        self._size = size
+
+    def purge(self) -> None:
+        for path, _ in self.entries():
+            path.unlink(missing_ok=True)
+        self._size = 0
+
+
+SQL_FINGERPRINT_TEMPLATE = """SELECT count(*), min(rowid), max(rowid),
+    (SELECT last_change FROM gpkg_contents WHERE table_name = '{table_name}')
+FROM "{table_name}";"""
+
+# Every geometry is hashed into the fingerprint, so an UPDATE in place that leaves the row
+# count, rowids and last_change alone still changes it.
+SQL_FINGERPRINT_ROWS_TEMPLATE = """SELECT cast(rowid AS INTEGER), hex("{column_name}")
+FROM "{table_name}" ORDER BY rowid;"""
+
+
+SQL_INDEX_FINGERPRINT_TEMPLATE = (
+    """SELECT count(*), max(rowid) FROM "{index_name}_rowid";"""
+)
+
+# The nodes of an rtree index are its pages, all are hashed into its fingerprint.
+SQL_INDEX_NODES_TEMPLATE = (
+    """SELECT nodeno, hex(data) FROM "{index_name}_node" ORDER BY nodeno;"""
+)
+
+
+class TableCache:
+    """
+    Per table results of the table scoped validations, stored in a ResultCache under a
+    fingerprint of the table: its row count, rowid range, gpkg_contents.last_change and a
+    hash of all its geometries. Tables with the same fingerprint as in an earlier
+    run are not scanned again, the reused and rescanned table names are kept. Results of
+    an rtree index are also stored under the fingerprint of the index (its row count,
+    maximum id and a hash of all its nodes), so a changed index next to an unchanged
+    table is checked again.
+    """
+
+    def __init__(self, cache: ResultCache, dataset):
+        self.cache = cache
+        self.dataset = dataset
+        self.reused: Set[str] = set()
+        self.rescanned: Set[str] = set()
+        self._fingerprints: Dict[Tuple[str, str], str] = {}
+        self._index_fingerprints: Dict[str, str] = {}
+
+    def fingerprint(self, table_name: str, column_name: str) -> str:
+        if (table_name, column_name) not in self._fingerprints:
+            self._fingerprints[table_name, column_name] = self.query_fingerprint(
+                table_name, column_name
+            )
+        return self._fingerprints[table_name, column_name]
+
+    def query_fingerprint(self, table_name: str, column_name: str) -> str:
+        result = self.dataset.ExecuteSQL(
+            SQL_FINGERPRINT_TEMPLATE.format(table_name=table_name)
+        )
+        count, min_rowid, max_rowid, last_change = result.GetNextFeature()
+        self.dataset.ReleaseResultSet(result)
+
+        digest = hashlib.sha256(
+            json.dumps([count, min_rowid, max_rowid, last_change]).encode("utf-8")
+        )
+        if count:
+            result = self.dataset.ExecuteSQL(
+                SQL_FINGERPRINT_ROWS_TEMPLATE.format(
+                    table_name=table_name, column_name=column_name
+                )
+            )
+            for rowid, blob_hex in result:
+                digest.update(f"{rowid}:{blob_hex}".encode("utf-8"))
+            self.dataset.ReleaseResultSet(result)
+        return digest.hexdigest()
+
+    def index_fingerprint(self, index_name: str) -> str:
+        if index_name not in self._index_fingerprints:
+            self._index_fingerprints[index_name] = self.query_index_fingerprint(
+                index_name
+            )
+        return self._index_fingerprints[index_name]
+
+    def query_index_fingerprint(self, index_name: str) -> str:
+        with self.dataset.silence_gdal():
+            result = self.dataset.ExecuteSQL(
+                SQL_INDEX_FINGERPRINT_TEMPLATE.format(index_name=index_name)
+            )
+        if result is None:
+            # Not an rtree index (any more).
+            return ""
+        count, max_rowid = result.GetNextFeature()
+        self.dataset.ReleaseResultSet(result)
+
+        digest = hashlib.sha256(json.dumps([count, max_rowid]).encode("utf-8"))
+        result = self.dataset.ExecuteSQL(
+            SQL_INDEX_NODES_TEMPLATE.format(index_name=index_name)
+        )
+        for nodeno, data_hex in result:
+            digest.update(f"{nodeno}:{data_hex}".encode("utf-8"))
+        self.dataset.ReleaseResultSet(result)
+        return digest.hexdigest()
+
+    def key(
+        self,
+        scope: str,
+        table_name: str,
+        column_name: str,
+        index_name: Optional[str] = None,
+    ) -> str:
+        key_parts = {
+            "version": __version__,
+            "scope": scope,
+            "table": table_name,
+            "column": column_name,
+            "fingerprint": self.fingerprint(table_name, column_name),
+        }
+        if index_name is not None:
+            key_parts["index_fingerprint"] = self.index_fingerprint(index_name)
+        return hashlib.sha256(
+            json.dumps(key_parts, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def get_or_compute(
+        self,
+        scope: str,
+        table_name: str,
+        column_name: str,
+        compute: Callable[[], object],
+    ):
+        """The cached result of the scope for the table, computed when not cached."""
+        result = self.get(scope, table_name, column_name)
+        if result is None:
+            result = compute()
+            self.put(scope, table_name, column_name, result)
+        return result
+
+    def get(
+        self,
+        scope: str,
+        table_name: str,
+        column_name: str,
+        index_name: Optional[str] = None,
+    ):
+        """
+        The cached result of the scope for the table (and the index of it, when given),
+        None when not cached.
+        """
+        entry = self.cache.get(self.key(scope, table_name, column_name, index_name))
+        if entry is None:
+            return None
+        self.reused.add(table_name)
+        return entry["result"]
+
+    def put(
+        self,
+        scope: str,
+        table_name: str,
+        column_name: str,
+        result,
+        index_name: Optional[str] = None,
+    ) -> None:
+        self.cache.put(
+            self.key(scope, table_name, column_name, index_name), {"result": result}
+        )
+        self.rescanned.add(table_name)
+
+    def merge(self, reused: Iterable[str], rescanned: Iterable[str]) -> None:
+        self.reused.update(reused)
+        self.rescanned.update(rescanned)
+
+    def details(self) -> Dict[str, List[str]]:
+        """The tables reused from the cache (for all scopes) and the tables rescanned."""
+        return {
+            "tables_reused": sorted(self.reused - self.rescanned),
+            "tables_rescanned": sorted(self.rescanned),
+        }
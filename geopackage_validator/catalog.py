@@ -0,0 +1,202 @@
+"""Metadata of a geopackage read with a few bulk queries, shared by the validators of a run."""
+from collections import OrderedDict, namedtuple
+from functools import cached_property
+from typing import Dict, List, Optional, Set, Tuple
+
+from osgeo import gdal
+
+GeometryColumn = namedtuple(
+    "GeometryColumn",
+    ["table_name", "column_name", "geometry_type_name", "srs_id", "z", "m"],
+)
+TableColumn = namedtuple(
+    "TableColumn", ["cid", "name", "type", "notnull", "default", "pk"]
+)
+Index = namedtuple("Index", ["name", "unique", "origin", "columns"])
+ForeignKeyReference = namedtuple(
+    "ForeignKeyReference", ["id", "seq", "table", "from_column", "to_column"]
+)
+SpatialRefSys = namedtuple(
+    "SpatialRefSys", ["srs_id", "organization", "organization_coordsys_id", "srs_name"]
+)
+
+SQL_TABLE_INFO = """SELECT c.table_name, p.cid, p.name, p.type, p."notnull", p.dflt_value, p.pk
+FROM gpkg_contents c JOIN pragma_table_info(c.table_name) p
+ORDER BY c.table_name, p.cid;"""
+
+SQL_INDEX_LIST = """SELECT c.table_name, il.name, il."unique", il.origin, ii.name
+FROM gpkg_contents c
+    JOIN pragma_index_list(c.table_name) il
+    LEFT JOIN pragma_index_info(il.name) ii
+ORDER BY c.table_name, il.seq, ii.seqno;"""
+
+SQL_FOREIGN_KEY_LIST = """SELECT c.table_name, fk.id, fk.seq, fk."table", fk."from", fk."to"
+FROM gpkg_contents c JOIN pragma_foreign_key_list(c.table_name) fk
+ORDER BY c.table_name, fk.id, fk.seq;"""
+
+
+class Catalog:
+    """
+    The metadata of the geopackage: gpkg_contents, gpkg_geometry_columns, the columns,
+    indexes and foreign keys of the tables in gpkg_contents, gpkg_extensions, the views,
+    gpkg_spatial_ref_sys and sqlite_sequence. Every part is read with one bulk query the
+    first time it is used, so the number of queries does not grow with the number of
+    tables or validators. Tables outside gpkg_contents are looked up one by one.
+    """
+
+    def __init__(self, dataset: gdal.Dataset):
+        self.dataset = dataset
+
+    def query(self, sql: str) -> List[Tuple]:
+        result = self.dataset.ExecuteSQL(sql)
+        rows = [tuple(row) for row in result] if result is not None else []
+        if result is not None:
+            self.dataset.ReleaseResultSet(result)
+        return rows
+
+    @cached_property
+    def sqlite_master(self) -> List[Tuple[str, str]]:
+        """(type, name) of the tables, views, indexes and triggers."""
+        return self.query("SELECT type, name FROM main.sqlite_master;")
+
+    @cached_property
+    def tables(self) -> Set[str]:
+        return {name for type_, name in self.sqlite_master if type_ == "table"}
+
+    @cached_property
+    def views(self) -> List[str]:
+        return [name for type_, name in self.sqlite_master if type_ == "view"]
+
+    @cached_property
+    def contents(self) -> List[Tuple[str, str]]:
+        """(table_name, data_type) of gpkg_contents."""
+        return self.query("SELECT table_name, data_type FROM gpkg_contents;")
+
+    def data_type(self, table_name: str) -> Optional[str]:
+        return self._data_types.get(table_name)
+
+    @cached_property
+    def _data_types(self) -> Dict[str, str]:
+        return dict(self.contents)
+
+    @cached_property
+    def geometry_columns(self) -> List[GeometryColumn]:
+        return [
+            GeometryColumn(*row)
+            for row in self.query(
+                "SELECT table_name, column_name, geometry_type_name, srs_id, z, m "
+                "FROM gpkg_geometry_columns;"
+            )
+        ]
+
+    @cached_property
+    def geometry_tables(self) -> List[Tuple[str, str, str]]:
+        """(table_name, column_name, geometry_type_name), like utils.dataset_geometry_tables."""
+        return [
+            (column.table_name, column.column_name, column.geometry_type_name)
+            for column in self.geometry_columns
+        ]
+
+    @cached_property
+    def spatial_ref_sys(self) -> Dict[int, SpatialRefSys]:
+        return {
+            row[0]: SpatialRefSys(*row)
+            for row in self.query(
+                "SELECT srs_id, organization, organization_coordsys_id, srs_name "
+                "FROM gpkg_spatial_ref_sys;"
+            )
+        }
+
+    @cached_property
+    def extensions(self) -> List[Tuple[str, str, str]]:
+        """(table_name, column_name, extension_name) of gpkg_extensions, if present."""
+        if "gpkg_extensions" not in self.tables:
+            return []
+        return self.query(
+            "SELECT table_name, column_name, extension_name FROM gpkg_extensions;"
+        )
+
+    def tables_with_extension(self, extension_name: str) -> Set[str]:
+        return {
+            table_name
+            for table_name, _, name in self.extensions
+            if name == extension_name
+        }
+
+    @cached_property
+    def sqlite_sequence(self) -> Dict[str, int]:
+        """The AUTOINCREMENT counters, sqlite_sequence only exists once one is used."""
+        if "sqlite_sequence" not in self.tables:
+            return {}
+        return dict(self.query("SELECT name, seq FROM sqlite_sequence;"))
+
+    @cached_property
+    def _table_columns(self) -> Dict[str, List[TableColumn]]:
+        columns = OrderedDict()
+        for table_name, *column in self.query(SQL_TABLE_INFO):
+            columns.setdefault(table_name, []).append(TableColumn(*column))
+        return columns
+
+    def table_columns(self, table_name: str) -> List[TableColumn]:
+        """The columns of the table, in PRAGMA table_info order."""
+        if table_name not in self._table_columns:
+            self._table_columns[table_name] = [
+                TableColumn(*row)
+                for row in self.query(
+                    'SELECT cid, name, type, "notnull", dflt_value, pk '
+                    f"FROM pragma_table_info('{table_name}');"
+                )
+            ]
+        return self._table_columns[table_name]
+
+    @cached_property
+    def _indexes(self) -> Dict[str, List[Index]]:
+        return self._group_indexes(self.query(SQL_INDEX_LIST))
+
+    def indexes(self, table_name: str) -> List[Index]:
+        """The indexes of the table, in PRAGMA index_list order."""
+        if table_name not in self._indexes:
+            self._indexes.update(
+                self._group_indexes(
+                    self.query(
+                        f"SELECT '{table_name}', il.name, il.\"unique\", il.origin, ii.name "
+                        f"FROM pragma_index_list('{table_name}') il "
+                        "LEFT JOIN pragma_index_info(il.name) ii "
+                        "ORDER BY il.seq, ii.seqno;"
+                    )
+                )
+            )
+            self._indexes.setdefault(table_name, [])
+        return self._indexes[table_name]
+
+    @staticmethod
+    def _group_indexes(rows) -> Dict[str, List[Index]]:
+        indexes = OrderedDict()
+        for table_name, name, unique, origin, column in rows:
+            table_indexes = indexes.setdefault(table_name, [])
+            if not table_indexes or table_indexes[-1].name != name:
+                table_indexes.append(Index(name, bool(int(unique)), origin, []))
+            if column is not None:
+                table_indexes[-1].columns.append(column)
+        return indexes
+
+    @cached_property
+    def _foreign_keys(self) -> Dict[str, List[ForeignKeyReference]]:
+        foreign_keys = OrderedDict()
+        for table_name, *reference in self.query(SQL_FOREIGN_KEY_LIST):
+            foreign_keys.setdefault(table_name, []).append(
+                ForeignKeyReference(*reference)
+            )
+        return foreign_keys
+
+    def foreign_keys(self, table_name: str) -> List[ForeignKeyReference]:
+        """The column references of the foreign keys of the table, ordered by id and seq."""
+        if table_name not in self._foreign_keys:
+            self._foreign_keys[table_name] = [
+                ForeignKeyReference(*row)
+                for row in self.query(
+                    'SELECT id, seq, "table", "from", "to" '
+                    f"FROM pragma_foreign_key_list('{table_name}') ORDER BY id, seq;"
+                )
+            ]
+        return self._foreign_keys[table_name]
@@ -14,11 +14,16 @@ logger = logging.getLogger(__name__)
 click_log.basic_config(logger)
 
 
+from geopackage_validator import batch
 from geopackage_validator import generate
 from geopackage_validator import s3
+from geopackage_validator import server
+from geopackage_validator import sql_trace
 from geopackage_validator import output
 from geopackage_validator import validate
 from geopackage_validator import utils
+from geopackage_validator.cache import ResultCache
+from geopackage_validator.validations import rtree_valid_check
 
 
 @click.group()
@@ -26,6 +31,16 @@ def cli():
     pass
 
 
+def result_cache(cache_dir, cache_max_size, no_cache, purge_cache):
+    """The result cache of the cache options, None when no cache is used."""
+    if cache_dir is None:
+        return None
+    cache = ResultCache(cache_dir, cache_max_size * 1024 * 1024)
+    if purge_cache:
+        cache.purge()
+    return None if no_cache else cache
+
+
 @cli.command(
     name="validate",
     help=(
@@ -119,6 +134,158 @@ def cli():
     is_flag=True,
     help="Output yaml.",
 )
+@click.option(
+    "--stream",
+    required=False,
+    is_flag=True,
+    help=(
+        "Output NDJSON while validating: a record with the results of every validation as soon as it is done, "
+        "then a summary record with the success and the validations executed."
+    ),
+)
+@click.option(
+    "--jobs",
+    envvar="JOBS",
+    show_envvar=True,
+    type=click.types.IntRange(min=0),
+    is_flag=False,
+    flag_value=0,
+    default=1,
+    help=(
+        "Number of worker processes running validations in parallel. Given without a number (or 0) the CPU quota "
+        "of the container is used."
+    ),
+)
+@click.option(
+    "--shard-by",
+    envvar="SHARD_BY",
+    show_envvar=True,
+    type=click.Choice(["rows", "bytes"]),
+    default="rows",
+    help=(
+        "How large geometry tables are split over the --jobs workers: in rowid ranges with an equal number of rows "
+        "or with an equal number of geometry bytes."
+    ),
+)
+@click.option(
+    "--fail-fast",
+    required=False,
+    is_flag=True,
+    help=(
+        "Stop at the first failing requirement, the remaining validations are skipped. Unless --max-violations is "
+        "given only the first violation is reported."
+    ),
+)
+@click.option(
+    "--max-violations",
+    envvar="MAX_VIOLATIONS",
+    show_envvar=True,
+    required=False,
+    default=None,
+    type=click.types.IntRange(min=1),
+    help=(
+        "Stop after reporting this number of violations, the output is marked as truncated. Violations of "
+        "recommendations do not count for the requirements, no requirement is skipped because of them."
+    ),
+)
+@click.option(
+    "--timings",
+    required=False,
+    is_flag=True,
+    help=(
+        "Add the wall time, CPU time and rows scanned per validation, and per table for the validations scanning "
+        "tables, to the output."
+    ),
+)
+@click.option(
+    "--geometry-backend",
+    envvar="GEOMETRY_BACKEND",
+    show_envvar=True,
+    type=click.Choice(["spatialite", "native"]),
+    default="spatialite",
+    help=(
+        "How the geometry validations read the geometries: with spatialite functions, or (native) by decoding the "
+        "GeoPackage binary geometries in Python. The native backend is used by the validations that support it and "
+        "only for local files."
+    ),
+)
+@click.option(
+    "--rtree-timeout",
+    envvar="RTREE_TIMEOUT",
+    show_envvar=True,
+    required=False,
+    default=None,
+    type=click.types.FloatRange(min=0),
+    help=(
+        "Time limit in seconds of the check of each rtree index (RQ10), an index that is not checked in time is "
+        "reported. The indexes of a local geopackage are checked by the --jobs workers."
+    ),
+)
+@click.option(
+    "--rtree-mode",
+    envvar="RTREE_MODE",
+    show_envvar=True,
+    type=click.Choice(["rtreecheck", "envelope", "both"]),
+    default="rtreecheck",
+    help=(
+        "What RQ10 checks of the rtree indexes: their structure with rtreecheck, whether their entries match the "
+        "envelopes of the geometries (missing, extra and mismatched entries, allowing for 32-bit float rounding), "
+        "or both. The envelope check reads the index and the geometry headers in one pass."
+    ),
+)
+@click.option(
+    "--trace-sql",
+    envvar="TRACE_SQL",
+    show_envvar=True,
+    required=False,
+    default=None,
+    help=(
+        "Write every SQL statement executed on the geopackage as a JSON line to this file, with the calling "
+        "validation, duration, rows fetched and whether its result set was released. A summary of the slowest "
+        "statements is logged at the end."
+    ),
+    type=click.types.Path(file_okay=True, dir_okay=False, writable=True),
+)
+@click.option(
+    "--trace-sql-top",
+    envvar="TRACE_SQL_TOP",
+    show_envvar=True,
+    type=click.types.IntRange(min=0),
+    default=10,
+    help="Number of slowest statements in the --trace-sql summary.",
+)
+@click.option(
+    "--cache-dir",
+    envvar="CACHE_DIR",
+    show_envvar=True,
+    required=False,
+    default=None,
+    help=(
+        "Directory of the result cache. When given, the results of a geopackage with the same content, validations, "
+        "table definitions and validator version are taken from the cache instead of validating again."
+    ),
+    type=click.types.Path(file_okay=False, dir_okay=True, writable=True),
+)
+@click.option(
+    "--cache-max-size",
+    envvar="CACHE_MAX_SIZE",
+    show_envvar=True,
+    type=click.types.IntRange(min=1),
+    default=1024,
+    help="Maximum size of the result cache in MB, the least recently used results are removed first.",
+)
+@click.option(
+    "--no-cache",
+    required=False,
+    is_flag=True,
+    help="Do not use the result cache, the geopackage is always validated.",
+)
+@click.option(
+    "--purge-cache",
+    required=False,
+    is_flag=True,
+    help="Remove all results from the cache before validating.",
+)
 @click.option(
     "--s3-endpoint-no-protocol",
     envvar="S3_ENDPOINT_NO_PROTOCOL",
@@ -157,6 +324,34 @@ def cli():
     default="true",
     help="Use a secure TLS connection for S3.",
 )
+@click.option(
+    "--s3-part-size",
+    envvar="S3_PART_SIZE",
+    show_envvar=True,
+    type=click.types.IntRange(min=5),
+    default=64,
+    help="Size in MB of the parts a geopackage from S3 (with --s3-key) is downloaded in with ranged requests.",
+)
+@click.option(
+    "--s3-concurrency",
+    envvar="S3_CONCURRENCY",
+    show_envvar=True,
+    type=click.types.IntRange(min=1),
+    default=8,
+    help="Number of parts of a geopackage from S3 (with --s3-key) that are downloaded in parallel.",
+)
+@click.option(
+    "--temp-dir",
+    envvar="TEMP_DIR",
+    show_envvar=True,
+    required=False,
+    default=None,
+    help=(
+        "Directory the geopackage from S3 (with --s3-key) is downloaded to, default is the system temporary "
+        "directory. The download fails early when it has not enough free disk space."
+    ),
+    type=click.types.Path(exists=True, file_okay=False, dir_okay=True, writable=True),
+)
 @click.option(
     "--s3-virtual-hosting",
     envvar="S3_VIRTUAL_HOSTING",
@@ -190,12 +385,30 @@ def geopackage_validator_command(
     validations,
     exit_on_fail,
     yaml,
+    stream,
+    jobs,
+    shard_by,
+    fail_fast,
+    max_violations,
+    timings,
+    geometry_backend,
+    rtree_timeout,
+    rtree_mode,
+    trace_sql,
+    trace_sql_top,
+    cache_dir,
+    cache_max_size,
+    no_cache,
+    purge_cache,
     s3_endpoint_no_protocol,
     s3_access_key,
     s3_secret_key,
     s3_bucket,
     s3_key,
     s3_secure,
+    s3_part_size,
+    s3_concurrency,
+    temp_dir,
     s3_virtual_hosting,
     s3_signing_region,
     s3_no_sign_request,
@@ -210,6 +423,17 @@ def geopackage_validator_command(
         logger.error("Give --gpkg-path or s3 location")
         sys.exit(1)
 
+    if stream and yaml:
+        logger.error("Give either --stream or --yaml")
+        sys.exit(1)
+
+    if trace_sql is not None:
+        sql_trace.enable(trace_sql)
+    rtree_logger = logging.getLogger(rtree_valid_check.__name__)
+    click_log.basic_config(rtree_logger)
+    rtree_logger.setLevel(logger.level)
+    cache = result_cache(cache_dir, cache_max_size, no_cache, purge_cache)
+    details = {}
     if gpkg_path is not None:
         utils.set_gdal_env(
             s3_endpoint_no_protocol=s3_endpoint_no_protocol,
@@ -223,11 +447,23 @@ def geopackage_validator_command(
             s3_no_sign_request=s3_no_sign_request,
         )
         filename = gpkg_path
+        stream_output = output.StreamOutput(filename) if stream else None
         results, validations_executed, success = validate.validate(
             gpkg_path,
             table_definitions_path,
             validations_path,
             validations,
+            jobs=jobs,
+            shard_by=shard_by,
+            max_violations=max_violations,
+            fail_fast=fail_fast,
+            details=details,
+            cache=cache,
+            timings=timings,
+            on_result=stream_output and stream_output.on_result,
+            geometry_backend=geometry_backend,
+            rtree_timeout=rtree_timeout,
+            rtree_mode=rtree_mode,
         )
     else:
         try:
@@ -238,27 +474,247 @@ def geopackage_validator_command(
                 s3_bucket,
                 s3_key,
                 s3_secure,
+                part_size=s3_part_size * 1024 * 1024,
+                concurrency=s3_concurrency,
+                temp_dir=temp_dir,
             ) as localfilename:
                 filename = s3_key
+                stream_output = output.StreamOutput(filename) if stream else None
                 results, validations_executed, success = validate.validate(
                     localfilename,
                     table_definitions_path,
                     validations_path,
                     validations,
+                    jobs=jobs,
+                    shard_by=shard_by,
+                    max_violations=max_violations,
+                    fail_fast=fail_fast,
+                    details=details,
+                    cache=cache,
+                    timings=timings,
+                    on_result=stream_output and stream_output.on_result,
+                    geometry_backend=geometry_backend,
+                    rtree_timeout=rtree_timeout,
+                    rtree_mode=rtree_mode,
                 )
         except (AssertionError, IOError) as e:
             logger.error(str(e))
             sys.exit(1)
     duration_seconds = time.monotonic() - duration_start
-    output.log_output(
-        filename=filename,
-        results=results,
-        validations_executed=validations_executed,
-        start_time=start_time,
-        duration_seconds=duration_seconds,
-        success=success,
-        as_yaml=yaml,
-    )
+    if trace_sql is not None:
+        for line in sql_trace.summarize(trace_sql, trace_sql_top):
+            logger.info(line)
+    if stream:
+        stream_output.summary(
+            results=results,
+            validations_executed=validations_executed,
+            start_time=start_time,
+            duration_seconds=duration_seconds,
+            success=success,
+            details=details,
+        )
+    else:
+        output.log_output(
+            filename=filename,
+            results=results,
+            validations_executed=validations_executed,
+            start_time=start_time,
+            duration_seconds=duration_seconds,
+            success=success,
+            as_yaml=yaml,
+            details=details,
+        )
+    if exit_on_fail and not success:
+        sys.exit(1)
+
+
+@cli.command(
+    name="validate-batch",
+    help=(
+        "Validate many local geopackages with a pool of worker processes. PATHS are directories (searched "
+        "recursively for .gpkg files), glob patterns or geopackage files. The table definitions and validations are "
+        "loaded once for all files and the largest files are validated first. For every geopackage one JSON line "
+        "(NDJSON) is written, in the same structure as the output of the validate command.\n\n"
+        "Example:\n\n"
+        "geopackage-validator validate-batch /data/deliveries '/data/extra/**/*.gpkg' -t definitions.yml --jobs 8"
+    ),
+)
+@click.argument("paths", nargs=-1, type=click.types.Path())
+@click.option(
+    "--file-list",
+    required=False,
+    default=None,
+    help="File with the paths of the geopackages to validate, one path per line.",
+    type=click.types.Path(
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        readable=True,
+        writable=False,
+        allow_dash=False,
+    ),
+)
+@click.option(
+    "-t",
+    "--table-definitions-path",
+    show_envvar=True,
+    required=False,
+    default=None,
+    help=(
+        "Path pointing to the table-definitions  JSON or YAML file (generate this file by calling the "
+        "generate-definitions command)"
+    ),
+    type=click.types.Path(
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        readable=True,
+        writable=False,
+        allow_dash=False,
+    ),
+)
+@click.option(
+    "--validations-path",
+    show_envvar=True,
+    required=False,
+    default=None,
+    envvar="VALIDATIONS_FILE",
+    help=(
+        "Path pointing to the set of validations to run. If validations-path and validations are not given, validate "
+        "runs all validations"
+    ),
+    type=click.types.Path(
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        readable=True,
+        writable=False,
+        allow_dash=False,
+    ),
+)
+@click.option(
+    "--validations",
+    show_envvar=True,
+    required=False,
+    default="",
+    envvar="VALIDATIONS",
+    help=(
+        "Comma-separated list of validations to run (e.g. --validations RQ1,RQ2,RQ3). If validations-path and "
+        "validations are not given, validate runs all validations"
+    ),
+)
+@click.option(
+    "--exit-on-fail",
+    required=False,
+    is_flag=True,
+    help="Exit with code 1 when validation success is false for any of the geopackages.",
+)
+@click.option(
+    "--jobs",
+    envvar="JOBS",
+    show_envvar=True,
+    type=click.types.IntRange(min=0),
+    default=0,
+    help="Number of worker processes validating geopackages in parallel. Default (0) is the CPU quota of the container.",
+)
+@click.option(
+    "--fail-fast",
+    required=False,
+    is_flag=True,
+    help=(
+        "Stop at the first failing requirement of a geopackage, the remaining validations are skipped. Unless "
+        "--max-violations is given only the first violation is reported."
+    ),
+)
+@click.option(
+    "--max-violations",
+    envvar="MAX_VIOLATIONS",
+    show_envvar=True,
+    required=False,
+    default=None,
+    type=click.types.IntRange(min=1),
+    help=(
+        "Stop after reporting this number of violations per geopackage, the output is marked as truncated. "
+        "Violations of recommendations do not count for the requirements."
+    ),
+)
+@click.option(
+    "--timings",
+    required=False,
+    is_flag=True,
+    help=(
+        "Add the wall time, CPU time and rows scanned per validation, and per table for the validations scanning "
+        "tables, to the output."
+    ),
+)
+@click.option(
+    "--cache-dir",
+    envvar="CACHE_DIR",
+    show_envvar=True,
+    required=False,
+    default=None,
+    help=(
+        "Directory of the result cache. When given, the results of a geopackage with the same content, validations, "
+        "table definitions and validator version are taken from the cache instead of validating again."
+    ),
+    type=click.types.Path(file_okay=False, dir_okay=True, writable=True),
+)
+@click.option(
+    "--cache-max-size",
+    envvar="CACHE_MAX_SIZE",
+    show_envvar=True,
+    type=click.types.IntRange(min=1),
+    default=1024,
+    help="Maximum size of the result cache in MB, the least recently used results are removed first.",
+)
+@click.option(
+    "--no-cache",
+    required=False,
+    is_flag=True,
+    help="Do not use the result cache, the geopackage is always validated.",
+)
+@click.option(
+    "--purge-cache",
+    required=False,
+    is_flag=True,
+    help="Remove all results from the cache before validating.",
+)
+@click_log.simple_verbosity_option(logger)
+def geopackage_validator_command_validate_batch(
+    paths,
+    file_list,
+    table_definitions_path,
+    validations_path,
+    validations,
+    exit_on_fail,
+    jobs,
+    fail_fast,
+    max_violations,
+    timings,
+    cache_dir,
+    cache_max_size,
+    no_cache,
+    purge_cache,
+):
+    gpkg_paths = batch.collect_gpkg_paths(paths, file_list)
+    if not gpkg_paths:
+        logger.error("No geopackages found, give PATHS or --file-list")
+        sys.exit(1)
+
+    success = True
+    for report in batch.validate_batch(
+        gpkg_paths,
+        table_definitions_path,
+        validations_path,
+        validations,
+        jobs=jobs,
+        fail_fast=fail_fast,
+        max_violations=max_violations,
+        cache=result_cache(cache_dir, cache_max_size, no_cache, purge_cache),
+        timings=timings,
+    ):
+        output.print_ndjson(report)
+        success = success and report["success"]
     if exit_on_fail and not success:
         sys.exit(1)
 
@@ -347,6 +803,34 @@ def geopackage_validator_command(
     default="true",
     help="Use a secure TLS connection for S3.",
 )
+@click.option(
+    "--s3-part-size",
+    envvar="S3_PART_SIZE",
+    show_envvar=True,
+    type=click.types.IntRange(min=5),
+    default=64,
+    help="Size in MB of the parts a geopackage from S3 (with --s3-key) is downloaded in with ranged requests.",
+)
+@click.option(
+    "--s3-concurrency",
+    envvar="S3_CONCURRENCY",
+    show_envvar=True,
+    type=click.types.IntRange(min=1),
+    default=8,
+    help="Number of parts of a geopackage from S3 (with --s3-key) that are downloaded in parallel.",
+)
+@click.option(
+    "--temp-dir",
+    envvar="TEMP_DIR",
+    show_envvar=True,
+    required=False,
+    default=None,
+    help=(
+        "Directory the geopackage from S3 (with --s3-key) is downloaded to, default is the system temporary "
+        "directory. The download fails early when it has not enough free disk space."
+    ),
+    type=click.types.Path(exists=True, file_okay=False, dir_okay=True, writable=True),
+)
 @click.option(
     "--s3-virtual-hosting",
     envvar="S3_VIRTUAL_HOSTING",
@@ -383,6 +867,9 @@ def geopackage_validator_command_generate_table_definitions(
     s3_bucket: str,
     s3_key: str,
     s3_secure: bool,
+    s3_part_size: int,
+    s3_concurrency: int,
+    temp_dir: str,
     s3_virtual_hosting: bool,
     s3_signing_region: str,
     s3_no_sign_request: bool,
@@ -418,6 +905,9 @@ def geopackage_validator_command_generate_table_definitions(
                 s3_bucket,
                 s3_key,
                 s3_secure,
+                part_size=s3_part_size * 1024 * 1024,
+                concurrency=s3_concurrency,
+                temp_dir=temp_dir,
             ) as localfilename:
                 definitionlist = generate.generate_definitions_for_path(
                     localfilename, with_indexes_and_fks
@@ -455,5 +945,132 @@ def geopackage_validator_command_show_validations(no_legacy, yaml):
         sys.exit(1)
 
 
+@cli.command(
+    name="serve",
+    help=(
+        "Serve the validate and generate-definitions commands over a local HTTP API, with warm worker processes. "
+        "POST a geopackage as request body to /validate or /generate-definitions, or reference a file within a "
+        "--data-dir with the path query parameter. The other query parameters are validations, table_definitions "
+        "(the NAME of definitions given with -t), max_violations and fail_fast for /validate and "
+        "with_indexes_and_fks for /generate-definitions. GET /health reports the workers and jobs in progress.\n\n"
+        "Example:\n\n"
+        "geopackage-validator serve -t default=definitions.yml --workers 4\n\n"
+        "curl --data-binary @my.gpkg 'http://localhost:8080/validate?table_definitions=default'"
+    ),
+)
+@click.option(
+    "--host",
+    envvar="HOST",
+    show_envvar=True,
+    default="127.0.0.1",
+    help="Address to listen on.",
+)
+@click.option(
+    "--port",
+    envvar="PORT",
+    show_envvar=True,
+    type=click.types.IntRange(min=0, max=65535),
+    default=8080,
+    help="Port to listen on.",
+)
+@click.option(
+    "--workers",
+    envvar="WORKERS",
+    show_envvar=True,
+    type=click.types.IntRange(min=0),
+    default=0,
+    help="Number of worker processes running jobs in parallel. Default (0) is the CPU quota of the container.",
+)
+@click.option(
+    "--queue-size",
+    envvar="QUEUE_SIZE",
+    show_envvar=True,
+    type=click.types.IntRange(min=0),
+    default=server.DEFAULT_QUEUE_SIZE,
+    help="Number of jobs that can wait for a free worker, further requests are answered with 503.",
+)
+@click.option(
+    "--job-timeout",
+    envvar="JOB_TIMEOUT",
+    show_envvar=True,
+    type=click.types.FloatRange(min=0, min_open=True),
+    default=server.DEFAULT_JOB_TIMEOUT,
+    help=(
+        "Seconds a job may run, after that its worker is stopped and the request is answered with 504. A job that "
+        "waited this long for a free worker is answered with 503."
+    ),
+)
+@click.option(
+    "-t",
+    "--table-definitions",
+    "table_definitions",
+    envvar="TABLE_DEFINITIONS",
+    show_envvar=True,
+    multiple=True,
+    help=(
+        "Table definitions loaded at startup as NAME=PATH (the NAME defaults to the file name without extension), "
+        "can be given multiple times. Requests select them with the table_definitions query parameter."
+    ),
+)
+@click.option(
+    "--data-dir",
+    "data_dirs",
+    envvar="DATA_DIRS",
+    show_envvar=True,
+    multiple=True,
+    type=click.types.Path(exists=True, file_okay=False, dir_okay=True),
+    help="Directory of geopackages that can be referenced with the path query parameter, can be given multiple times.",
+)
+@click.option(
+    "--max-upload-size",
+    envvar="MAX_UPLOAD_SIZE",
+    show_envvar=True,
+    type=click.types.IntRange(min=1),
+    default=1024,
+    help="Maximum size of an uploaded geopackage in MB.",
+)
+@click.option(
+    "--temp-dir",
+    envvar="TEMP_DIR",
+    show_envvar=True,
+    required=False,
+    default=None,
+    help="Directory uploaded geopackages are stored in while they are validated, default is the system temporary directory.",
+    type=click.types.Path(file_okay=False, dir_okay=True, writable=True),
+)
+@click_log.simple_verbosity_option(logger)
+def geopackage_validator_command_serve(
+    host,
+    port,
+    workers,
+    queue_size,
+    job_timeout,
+    table_definitions,
+    data_dirs,
+    max_upload_size,
+    temp_dir,
+):
+    # The startup and access log of the server at the verbosity of the command.
+    server_logger = logging.getLogger(server.__name__)
+    click_log.basic_config(server_logger)
+    server_logger.setLevel(logger.level)
+    try:
+        named_table_definitions = server.load_named_table_definitions(table_definitions)
+    except Exception:
+        logger.exception("Error while loading table definitions")
+        sys.exit(1)
+    server.serve(
+        host,
+        port,
+        workers or utils.available_cpu_count(),
+        queue_size=queue_size,
+        job_timeout=job_timeout,
+        table_definitions=named_table_definitions,
+        data_dirs=data_dirs,
+        max_upload_size=max_upload_size * 1024 * 1024,
+        temp_dir=temp_dir,
+    )
+
+
 if __name__ == "__main__":
     cli()
@@ -5,6 +5,7 @@ from osgeo.ogr import Layer, Feature
 
 from geopackage_validator import __version__
 from geopackage_validator import utils
+from geopackage_validator.catalog import Catalog
 from geopackage_validator.models import (
     ColumnDefinition,
     ColumnMapping,
@@ -14,7 +15,7 @@ from geopackage_validator.models import (
     TablesDefinition,
     DataType,
 )
-from geopackage_validator.utils import group_by, get_table_names_from_contents
+from geopackage_validator.utils import group_by
 
 logger = logging.getLogger(__name__)
 
@@ -50,67 +51,52 @@ def fid_column_definition(table) -> List[ColumnDefinition]:
     return [ColumnDefinition(name=name, type="INTEGER")]
 
 
-def get_index_definitions(
-    dataset: gdal.Dataset, table_name: str
-) -> List[IndexDefinition]:
+def get_index_definitions(catalog: Catalog, table_name: str) -> List[IndexDefinition]:
     index_definitions: List[IndexDefinition] = []
-    index_list = dataset.ExecuteSQL(
-        f"select name, \"unique\", origin from pragma_index_list('{table_name}');"
-    )
     pk_in_index_list = False
-    for index_listing in index_list:
-        pk_in_index_list = pk_in_index_list or index_listing["origin"] == "pk"
+    for index_listing in catalog.indexes(table_name):
+        pk_in_index_list = pk_in_index_list or index_listing.origin == "pk"
         index_definitions.append(
             IndexDefinition(
-                columns=tuple(get_index_column_names(dataset, index_listing["name"])),
-                unique=bool(int(index_listing["unique"])),
+                columns=tuple(index_listing.columns),
+                unique=index_listing.unique,
             )
         )
-    dataset.ReleaseResultSet(index_list)
     index_definitions = sorted(index_definitions, key=lambda d: d.columns)
 
     if not pk_in_index_list:
-        pk_index = get_pk_index(dataset, table_name)
+        pk_index = get_pk_index(catalog, table_name)
         if pk_index is not None:
             index_definitions.insert(0, pk_index)
 
     return index_definitions
 
 
-def get_pk_index(dataset: gdal.Dataset, table_name: str) -> Optional[IndexDefinition]:
-    pk_columns = dataset.ExecuteSQL(
-        f"select name from pragma_table_info('{table_name}') where pk;"
+def get_pk_index(catalog: Catalog, table_name: str) -> Optional[IndexDefinition]:
+    column_names = tuple(
+        column.name for column in catalog.table_columns(table_name) if column.pk
     )
-    column_names = tuple(r["name"] for r in pk_columns)
     if len(column_names) == 0:
         return None
     return IndexDefinition(columns=column_names, unique=True)
 
 
-def get_index_column_names(dataset: gdal.Dataset, index_name: str) -> List[str]:
-    index_info = dataset.ExecuteSQL(
-        f"select name from pragma_index_info('{index_name}');"
-    )
-    column_names: List[str] = [r["name"] for r in index_info]
-    dataset.ReleaseResultSet(index_info)
-    return column_names
-
-
-def get_foreign_key_definitions(dataset, table_name) -> List[ForeignKeyDefinition]:
-    foreign_key_list = dataset.ExecuteSQL(
-        f'select id, seq, "table", "from", "to" from pragma_foreign_key_list(\'{table_name}\');'
-    )
+def get_foreign_key_definitions(
+    catalog: Catalog, table_name: str
+) -> List[ForeignKeyDefinition]:
     foreign_key_definitions: List[ForeignKeyDefinition] = []
-    for foreign_key_listing in group_by(foreign_key_list, lambda r: r["id"]):
+    for foreign_key_listing in group_by(
+        catalog.foreign_keys(table_name), lambda r: r.id
+    ):
         table: str = ""
         columns: Dict[str, str] = {}
         for column_reference in foreign_key_listing:
-            table = column_reference["table"]
-            to = column_reference["to"]
+            table = column_reference.table
+            to = column_reference.to_column
             if to is None:
-                pk_index = get_pk_index(dataset, column_reference["table"])
-                to = pk_index.columns[int(column_reference["seq"])]
-            columns[column_reference["from"]] = to
+                pk_index = get_pk_index(catalog, column_reference.table)
+                to = pk_index.columns[int(column_reference.seq)]
+            columns[column_reference.from_column] = to
         foreign_key_definitions.append(
             ForeignKeyDefinition(
                 table=table,
@@ -122,21 +108,23 @@ def get_foreign_key_definitions(dataset, table_name) -> List[ForeignKeyDefinitio
     foreign_key_definitions = sorted(
         foreign_key_definitions, key=lambda fk: (fk.table, (c.src for c in fk.columns))
     )
-    dataset.ReleaseResultSet(foreign_key_list)
     return foreign_key_definitions
 
 
 def generate_table_definitions(
-    dataset: gdal.Dataset, with_indexes_and_fks: bool = False
+    dataset: gdal.Dataset,
+    with_indexes_and_fks: bool = False,
+    catalog: Optional[Catalog] = None,
 ) -> TablesDefinition:
+    catalog = catalog or Catalog(dataset)
     projections = set()
     table_geometry_types = {
         table_name: geometry_type_name
-        for table_name, _, geometry_type_name in utils.dataset_geometry_tables(dataset)
+        for table_name, _, geometry_type_name in catalog.geometry_tables
     }
 
     table_list: List[TableDefinition] = []
-    for table_name, data_type_column in get_table_names_from_contents(dataset):
+    for table_name, data_type_column in catalog.contents:
         table = dataset.ExecuteSQL(f"SELECT * FROM '{table_name}';")
         data_type = DataType.from_str(data_type_column)
         geometry_column = None
@@ -157,8 +145,8 @@ def generate_table_definitions(
         indexes = None
         foreign_keys = None
         if with_indexes_and_fks:
-            indexes = tuple(get_index_definitions(dataset, table_name))
-            foreign_keys = tuple(get_foreign_key_definitions(dataset, table_name))
+            indexes = tuple(get_index_definitions(catalog, table_name))
+            foreign_keys = tuple(get_foreign_key_definitions(catalog, table_name))
 
         table_def = TableDefinition(
             name=table_name,
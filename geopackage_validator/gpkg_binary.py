@@ -0,0 +1,641 @@
+"""
+Decoder of GeoPackage binary geometries: the header (magic, version, flags, envelope and
+srs id) and the WKB body. Checks that only need the geometry type, dimensions and
+coordinates decode the geometries of a table in batches, instead of calling a spatialite
+function per row and per check.
+
+The rows are read with a read-only sqlite3 connection, so this works for geopackages on
+the local file system only.
+
+With numpy installed (the numpy extra) the loops over the coordinates of large geometries,
+the ring areas and the Z and M ranges, are vectorized.
+"""
+import sqlite3
+import struct
+import sys
+from array import array
+from collections import namedtuple
+from functools import reduce
+from math import isnan, nan
+from operator import add, mul, sub
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy
+except ImportError:  # The numpy extra is optional, without it plain Python is used.
+    numpy = None
+
+BATCH_SIZE = 10_000
+
+# Rings and coordinate arrays of fewer vertices are computed in plain Python, for them
+# the overhead of numpy is larger than what it saves.
+VECTORIZE_MIN_VERTICES = 64
+
+# Bytes of a geometry read to classify it as empty: the header with the largest envelope
+# and the start of the WKB.
+PREFIX_SIZE = 256
+
+# Blobs up to this length fit in their b-tree page and are read with the row, of longer
+# blobs (continued on overflow pages) only the prefix is read, with incremental blob I/O.
+INLINE_BLOB_SIZE = 4000
+
+MAGIC = b"GP"
+
+# Flags of the header.
+FLAG_LITTLE_ENDIAN = 0b00000001
+FLAG_ENVELOPE = 0b00001110
+FLAG_EMPTY = 0b00010000
+FLAG_EXTENDED = 0b00100000
+
+# Number of doubles of the envelope per envelope contents indicator.
+ENVELOPE_SIZES = {0: 0, 1: 4, 2: 6, 3: 6, 4: 8}
+
+# EWKB flags of the geometry type, ISO WKB (which GeoPackage uses) adds 1000, 2000 or
+# 3000 for Z, M and ZM instead.
+EWKB_Z = 0x80000000
+EWKB_M = 0x40000000
+EWKB_SRID = 0x20000000
+
+# Geometry type codes, 0 is used for NULL and undecodable geometries.
+NO_GEOMETRY = 0
+POINT = 1
+LINESTRING = 2
+POLYGON = 3
+MULTIPOINT = 4
+MULTILINESTRING = 5
+MULTIPOLYGON = 6
+GEOMETRYCOLLECTION = 7
+CIRCULARSTRING = 8
+TRIANGLE = 17
+
+GEOMETRY_TYPE_NAMES = {
+    1: "POINT",
+    2: "LINESTRING",
+    3: "POLYGON",
+    4: "MULTIPOINT",
+    5: "MULTILINESTRING",
+    6: "MULTIPOLYGON",
+    7: "GEOMETRYCOLLECTION",
+    8: "CIRCULARSTRING",
+    9: "COMPOUNDCURVE",
+    10: "CURVEPOLYGON",
+    11: "MULTICURVE",
+    12: "MULTISURFACE",
+    13: "CURVE",
+    14: "SURFACE",
+    15: "POLYHEDRALSURFACE",
+    16: "TIN",
+    17: "TRIANGLE",
+}
+
+# A list of points, and a list of rings that are lists of points.
+LINE_TYPES = (LINESTRING, CIRCULARSTRING)
+POLYGON_TYPES = (POLYGON, TRIANGLE)
+# The other types are a list of geometries.
+COLLECTION_TYPES = (4, 5, 6, 7, 9, 10, 11, 12, 13, 14, 15, 16)
+
+NATIVE_BYTE_ORDER = 1 if sys.byteorder == "little" else 0
+
+GeometryHeader = namedtuple(
+    "GeometryHeader", ["version", "empty", "srs_id", "envelope", "wkb_offset"]
+)
+
+# The coordinates are a flat array of doubles, 2 + has_z + has_m per vertex. The polygons
+# are per (MULTI)POLYGON part the (first vertex, vertex count) of its rings, the exterior
+# ring first.
+Geometry = namedtuple(
+    "Geometry",
+    [
+        "geometry_type",
+        "has_z",
+        "has_m",
+        "empty",
+        "srs_id",
+        "envelope",
+        "coordinates",
+        "polygons",
+    ],
+)
+
+
+class GeometryDecodeError(ValueError):
+    pass
+
+
+def decode_header(blob: bytes) -> GeometryHeader:
+    if len(blob) < 8 or blob[:2] != MAGIC:
+        raise GeometryDecodeError("Not a GeoPackage binary geometry")
+    flags = blob[3]
+    if flags & FLAG_EXTENDED:
+        raise GeometryDecodeError("Extended GeoPackage binary geometry")
+    envelope_indicator = (flags & FLAG_ENVELOPE) >> 1
+    if envelope_indicator not in ENVELOPE_SIZES:
+        raise GeometryDecodeError(f"Invalid envelope indicator {envelope_indicator}")
+    byte_order = "<" if flags & FLAG_LITTLE_ENDIAN else ">"
+    envelope_size = ENVELOPE_SIZES[envelope_indicator]
+    try:
+        (srs_id,) = struct.unpack_from(byte_order + "i", blob, 4)
+        envelope = struct.unpack_from(f"{byte_order}{envelope_size}d", blob, 8)
+    except struct.error as e:
+        raise GeometryDecodeError(str(e))
+    return GeometryHeader(
+        blob[2], bool(flags & FLAG_EMPTY), srs_id, envelope, 8 + 8 * envelope_size
+    )
+
+
+def split_type_code(code: int) -> Tuple[int, bool, bool]:
+    """The geometry type, has_z and has_m of an ISO WKB or EWKB geometry type code."""
+    if code & (EWKB_Z | EWKB_M | EWKB_SRID):
+        return code & 0x0FFFFFFF, bool(code & EWKB_Z), bool(code & EWKB_M)
+    return code % 1000, code // 1000 in (1, 3), code // 1000 in (2, 3)
+
+
+class WkbReader:
+    """Reads a WKB geometry, with its parts, into one array of coordinates."""
+
+    def __init__(self, blob: bytes, offset: int):
+        self.blob = memoryview(blob)
+        self.offset = offset
+        self.coordinates = array("d")
+        self.polygons: List[List[Tuple[int, int]]] = []
+        self.stride = 0
+
+    def unpack(self, byte_order: str, format: str):
+        try:
+            values = struct.unpack_from(byte_order + format, self.blob, self.offset)
+        except struct.error as e:
+            raise GeometryDecodeError(str(e))
+        self.offset += struct.calcsize(format)
+        return values
+
+    def read_points(self, wkb_byte_order: int, count: int) -> int:
+        """Appends count vertices to the coordinates, returns the index of the first."""
+        size = count * self.stride * 8
+        if self.offset + size > len(self.blob):
+            raise GeometryDecodeError("Truncated WKB")
+        points = array("d")
+        points.frombytes(self.blob[self.offset : self.offset + size])
+        if wkb_byte_order != NATIVE_BYTE_ORDER:
+            points.byteswap()
+        self.offset += size
+        first = len(self.coordinates) // self.stride
+        self.coordinates.extend(points)
+        return first
+
+    def read_geometry(self, parent: Optional[Tuple[bool, bool]] = None):
+        """Returns the geometry type code, has_z and has_m of the geometry at the offset."""
+        if self.offset >= len(self.blob):
+            raise GeometryDecodeError("Truncated WKB")
+        wkb_byte_order = self.blob[self.offset]
+        if wkb_byte_order not in (0, 1):
+            raise GeometryDecodeError(f"Invalid WKB byte order {wkb_byte_order}")
+        self.offset += 1
+        byte_order = "<" if wkb_byte_order == 1 else ">"
+        (code,) = self.unpack(byte_order, "I")
+        geometry_type, has_z, has_m = split_type_code(code)
+        if code & EWKB_SRID:
+            self.unpack(byte_order, "i")
+        if parent is None:
+            self.stride = 2 + has_z + has_m
+        elif (has_z, has_m) != parent:
+            raise GeometryDecodeError("Parts with other dimensions than the geometry")
+
+        if geometry_type == POINT:
+            self.read_points(wkb_byte_order, 1)
+        elif geometry_type in LINE_TYPES:
+            (count,) = self.unpack(byte_order, "I")
+            self.read_points(wkb_byte_order, count)
+        elif geometry_type in POLYGON_TYPES:
+            (ring_count,) = self.unpack(byte_order, "I")
+            rings = []
+            for _ in range(ring_count):
+                (count,) = self.unpack(byte_order, "I")
+                rings.append((self.read_points(wkb_byte_order, count), count))
+            self.polygons.append(rings)
+        elif geometry_type in COLLECTION_TYPES:
+            (part_count,) = self.unpack(byte_order, "I")
+            for _ in range(part_count):
+                self.read_geometry((has_z, has_m))
+        else:
+            raise GeometryDecodeError(f"Unknown WKB geometry type {code}")
+        return geometry_type, has_z, has_m
+
+
+def decode(blob: bytes) -> Geometry:
+    """Decode a GeoPackage binary geometry, raises GeometryDecodeError when it is not one."""
+    header = decode_header(blob)
+    reader = WkbReader(blob, header.wkb_offset)
+    geometry_type, has_z, has_m = reader.read_geometry()
+    empty = header.empty or not reader.coordinates
+    if geometry_type == POINT:
+        # The empty point of GeoPackage has NaN coordinates.
+        empty = empty or all(isnan(value) for value in reader.coordinates)
+    return Geometry(
+        geometry_type,
+        has_z,
+        has_m,
+        empty,
+        header.srs_id,
+        header.envelope,
+        reader.coordinates,
+        reader.polygons,
+    )
+
+
+class WkbPrefixReader:
+    """Finds out whether a geometry is empty from the start of its WKB, if possible."""
+
+    def __init__(self, prefix: bytes, offset: int):
+        self.prefix = prefix
+        self.offset = offset
+
+    def unpack(self, byte_order: str, format: str):
+        """The values at the offset, None when the prefix ends before them."""
+        if self.offset + struct.calcsize(format) > len(self.prefix):
+            return None
+        values = struct.unpack_from(byte_order + format, self.prefix, self.offset)
+        self.offset += struct.calcsize(format)
+        return values
+
+    def empty(self, top: bool = True) -> Optional[bool]:
+        """Whether the geometry at the offset is empty, None when undecided."""
+        header = self.unpack("<", "B")
+        if header is None or header[0] not in (0, 1):
+            return None
+        byte_order = "<" if header[0] == 1 else ">"
+        code = self.unpack(byte_order, "I")
+        if code is None:
+            return None
+        (code,) = code
+        geometry_type, has_z, has_m = split_type_code(code)
+        if code & EWKB_SRID and self.unpack(byte_order, "i") is None:
+            return None
+
+        if geometry_type == POINT:
+            coordinates = self.unpack(byte_order, f"{2 + has_z + has_m}d")
+            if coordinates is None:
+                return None
+            if all(isnan(value) for value in coordinates):
+                # The empty point of GeoPackage, as a part it is left to spatialite.
+                return True if top else None
+            return False
+        counts = self.unpack(byte_order, "I")
+        if counts is None:
+            return None
+        (count,) = counts
+        if geometry_type in LINE_TYPES:
+            return count == 0
+        if geometry_type in POLYGON_TYPES:
+            if count == 0:
+                return True
+            # A polygon with an empty exterior ring is left to spatialite.
+            ring = self.unpack(byte_order, "I")
+            return None if ring is None or ring[0] == 0 else False
+        if geometry_type in COLLECTION_TYPES:
+            for _ in range(count):
+                part_empty = self.empty(top=False)
+                if part_empty is not True:
+                    return part_empty
+            return True
+        return None
+
+
+def prefix_empty(prefix) -> Optional[bool]:
+    """
+    Whether the geometry starting with prefix is empty, when its header is valid and its
+    empty flag agrees with the start of the WKB. None when undecided.
+    """
+    if not isinstance(prefix, bytes):
+        return None
+    try:
+        header = decode_header(prefix)
+    except GeometryDecodeError:
+        return None
+    empty = WkbPrefixReader(prefix, header.wkb_offset).empty()
+    if empty is None or empty != header.empty:
+        return None
+    return empty
+
+
+# The types and sizes of a geometry, without its coordinates. The size is the number of
+# points of a point or line, of rings of a polygon and of parts of a collection. The parts
+# are the (geometry type, has_z, has_m, size) of the parts of a collection.
+GeometryOutline = namedtuple(
+    "GeometryOutline",
+    ["version", "empty", "ewkb", "geometry_type", "has_z", "has_m", "size", "parts"],
+)
+
+
+class WkbOutlineReader:
+    """
+    Reads the types and sizes of a WKB geometry and its parts, skipping the coordinates.
+    With prefix the blob may be the start of the geometry only.
+    """
+
+    def __init__(self, blob: bytes, offset: int, prefix: bool = False):
+        self.blob = blob
+        self.offset = offset
+        self.prefix = prefix
+        self.ewkb = False
+
+    def unpack(self, byte_order: str, format: str):
+        try:
+            values = struct.unpack_from(byte_order + format, self.blob, self.offset)
+        except struct.error as e:
+            raise GeometryDecodeError(str(e))
+        self.offset += struct.calcsize(format)
+        return values
+
+    def read_geometry(
+        self, parts: Optional[List[Tuple[int, bool, bool, int]]] = None
+    ) -> Tuple[int, bool, bool, int]:
+        """
+        The (geometry type, has_z, has_m, size) of the geometry at the offset, those of
+        the parts of a collection are appended to parts.
+        """
+        (wkb_byte_order,) = self.unpack("<", "B")
+        if wkb_byte_order not in (0, 1):
+            raise GeometryDecodeError(f"Invalid WKB byte order {wkb_byte_order}")
+        byte_order = "<" if wkb_byte_order == 1 else ">"
+        (code,) = self.unpack(byte_order, "I")
+        geometry_type, has_z, has_m = split_type_code(code)
+        if code & (EWKB_Z | EWKB_M | EWKB_SRID):
+            self.ewkb = True
+            if code & EWKB_SRID:
+                self.unpack(byte_order, "i")
+        point_size = 8 * (2 + has_z + has_m)
+
+        if geometry_type == POINT:
+            size = 1
+            self.offset += point_size
+        elif geometry_type in LINE_TYPES:
+            (size,) = self.unpack(byte_order, "I")
+            self.offset += size * point_size
+        elif geometry_type in POLYGON_TYPES:
+            (size,) = self.unpack(byte_order, "I")
+            if self.prefix and parts is not None:
+                # The outline of a polygon that is not a part does not need its rings.
+                return geometry_type, has_z, has_m, size
+            for _ in range(size):
+                (count,) = self.unpack(byte_order, "I")
+                self.offset += count * point_size
+        elif geometry_type in COLLECTION_TYPES:
+            (size,) = self.unpack(byte_order, "I")
+            for _ in range(size):
+                part = self.read_geometry()
+                if parts is not None:
+                    parts.append(part)
+        else:
+            raise GeometryDecodeError(f"Unknown WKB geometry type {code}")
+        if self.offset > len(self.blob) and not self.prefix:
+            raise GeometryDecodeError("Truncated WKB")
+        return geometry_type, has_z, has_m, size
+
+
+def outline(blob: bytes, prefix: bool = False) -> GeometryOutline:
+    """
+    The outline of a GeoPackage binary geometry, raises GeometryDecodeError when it is not
+    one. With prefix the blob is the start of the geometry: its coordinates are not checked
+    to fit in it, GeometryDecodeError is raised when a part of a collection starts after it.
+    """
+    header = decode_header(blob)
+    reader = WkbOutlineReader(blob, header.wkb_offset, prefix)
+    parts: List[Tuple[int, bool, bool, int]] = []
+    geometry_type, has_z, has_m, size = reader.read_geometry(parts)
+    return GeometryOutline(
+        header.version,
+        header.empty,
+        reader.ewkb,
+        geometry_type,
+        has_z,
+        has_m,
+        size,
+        parts,
+    )
+
+
+def ring_area(coordinates: array, stride: int, first: int, count: int) -> float:
+    """
+    The signed area of the ring of count vertices from vertex first, positive when it is
+    counter-clockwise. Summed in the order of spatialite's gaiaClockwise, so the sign of
+    (nearly) degenerate rings is the same.
+    """
+    if numpy is not None and count >= VECTORIZE_MIN_VERTICES:
+        values = numpy.frombuffer(coordinates, dtype=numpy.float64)
+        xs = values[first * stride : (first + count) * stride : stride]
+        ys = values[first * stride + 1 : (first + count) * stride : stride]
+        terms = xs * numpy.roll(ys, -1) - numpy.roll(xs, -1) * ys
+        # cumsum adds in order like reduce below, numpy.sum adds pairwise.
+        return float(numpy.cumsum(terms)[-1]) / 2.0
+    xs = coordinates[first * stride : (first + count) * stride : stride]
+    ys = coordinates[first * stride + 1 : (first + count) * stride : stride]
+    next_xs = xs[1:] + xs[:1]
+    next_ys = ys[1:] + ys[:1]
+    terms = map(sub, map(mul, xs, next_ys), map(mul, next_xs, ys))
+    # reduce adds in order, sum compensates rounding errors since python 3.12.
+    return reduce(add, terms, 0.0) / 2.0
+
+
+def prefix_geometry_type(prefix) -> Optional[int]:
+    """
+    The geometry type code, without Z and M, of the geometry starting with prefix. None
+    when its header or WKB type can not be decoded.
+    """
+    if not isinstance(prefix, bytes):
+        return None
+    try:
+        header = decode_header(prefix)
+    except GeometryDecodeError:
+        return None
+    offset = header.wkb_offset
+    if len(prefix) < offset + 5 or prefix[offset] not in (0, 1):
+        return None
+    (code,) = struct.unpack_from(
+        "<I" if prefix[offset] == 1 else ">I", prefix, offset + 1
+    )
+    return split_type_code(code)[0]
+
+
+def value_range(values) -> Tuple[float, float]:
+    """The minimum and maximum of the values that are not NaN, NaN when there are none."""
+    # min and max skip NaN values, unless the first value is NaN.
+    if len(values) and not isnan(values[0]):
+        return min(values), max(values)
+    values = [value for value in values if not isnan(value)]
+    return (min(values), max(values)) if values else (nan, nan)
+
+
+def coordinate_range(
+    coordinates: array, stride: int, offset: int
+) -> Tuple[float, float]:
+    """The value_range of the offset-th value of the vertices of the coordinates."""
+    if numpy is None or len(coordinates) < VECTORIZE_MIN_VERTICES * stride:
+        return value_range(coordinates[offset::stride])
+    values = numpy.frombuffer(coordinates, dtype=numpy.float64)[offset::stride]
+    values = values[~numpy.isnan(values)]
+    if len(values) == 0:
+        return nan, nan
+    return float(values.min()), float(values.max())
+
+
+def envelope(blob: bytes) -> Optional[Tuple[float, float, float, float]]:
+    """
+    The (minx, maxx, miny, maxy) of a GeoPackage binary geometry, the columns of its rtree
+    index: from the header, or from the coordinates when the header has no envelope. None
+    when the geometry is empty. Raises GeometryDecodeError when it is not a geometry.
+    """
+    header = decode_header(blob)
+    if header.empty:
+        return None
+    if header.envelope:
+        return header.envelope[:4]
+    geometry = decode(blob)
+    if geometry.empty:
+        return None
+    stride = 2 + geometry.has_z + geometry.has_m
+    min_x, max_x = coordinate_range(geometry.coordinates, stride, 0)
+    min_y, max_y = coordinate_range(geometry.coordinates, stride, 1)
+    return min_x, max_x, min_y, max_y
+
+
+class GeometryBatch:
+    """
+    The geometries of a batch of rows, decoded column-wise: per row the geometry type, the
+    number of dimensions, whether it is empty and the ranges of its Z and M values (NaN
+    without Z or M). NULL and undecodable geometries have geometry type NO_GEOMETRY and 0
+    dimensions, the undecodable ones are listed with their error in errors.
+    """
+
+    def __init__(self):
+        self.row_ids = array("q")
+        self.geometry_types = array("i")
+        self.ndims = array("b")
+        self.empty = array("b")
+        self.z_min = array("d")
+        self.z_max = array("d")
+        self.m_min = array("d")
+        self.m_max = array("d")
+        self.geometries: List[Optional[Geometry]] = []
+        self.errors: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    def append(self, row_id: int, geometry: Optional[Geometry]) -> None:
+        self.row_ids.append(row_id)
+        self.geometries.append(geometry)
+        if geometry is None:
+            self.geometry_types.append(NO_GEOMETRY)
+            self.ndims.append(0)
+            self.empty.append(0)
+            for values in (self.z_min, self.z_max, self.m_min, self.m_max):
+                values.append(nan)
+            return
+        stride = 2 + geometry.has_z + geometry.has_m
+        self.geometry_types.append(geometry.geometry_type)
+        self.ndims.append(stride)
+        self.empty.append(geometry.empty)
+        z_range = m_range = (nan, nan)
+        if geometry.has_z:
+            z_range = coordinate_range(geometry.coordinates, stride, 2)
+        if geometry.has_m:
+            m_range = coordinate_range(geometry.coordinates, stride, 2 + geometry.has_z)
+        self.z_min.append(z_range[0])
+        self.z_max.append(z_range[1])
+        self.m_min.append(m_range[0])
+        self.m_max.append(m_range[1])
+
+
+def decode_batch(rows: Iterable[Tuple[int, Optional[bytes]]]) -> GeometryBatch:
+    """Decode the (row id, geometry blob) rows."""
+    batch = GeometryBatch()
+    for row_id, blob in rows:
+        geometry = None
+        if blob is not None:
+            try:
+                geometry = decode(blob)
+            except GeometryDecodeError as e:
+                batch.errors.append((row_id, str(e)))
+        batch.append(row_id, geometry)
+    return batch
+
+
+def local_path(dataset) -> Optional[str]:
+    """The path of the geopackage of the dataset, when it is a local file."""
+    path = dataset.GetDescription()
+    if not path or path.startswith("/vsi") or not Path(path).is_file():
+        return None
+    return path
+
+
+def readonly_connection(gpkg_path: str) -> sqlite3.Connection:
+    return sqlite3.connect(f"{Path(gpkg_path).resolve().as_uri()}?mode=ro", uri=True)
+
+
+def iter_batches(
+    connection: sqlite3.Connection,
+    table_name: str,
+    column_name: str,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[GeometryBatch]:
+    """The decoded geometries of the column, in batches of batch_size rows."""
+    cursor = connection.execute(
+        f'SELECT cast(rowid AS INTEGER), "{column_name}" FROM "{table_name}";'
+    )
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield decode_batch(rows)
+    finally:
+        cursor.close()
+
+
+def read_blob(
+    connection: sqlite3.Connection, table_name: str, column_name: str, row_id: int
+) -> Optional[bytes]:
+    """The geometry blob of the row."""
+    row = connection.execute(
+        f'SELECT "{column_name}" FROM "{table_name}" WHERE rowid = ?;', (row_id,)
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+def iter_prefixes(
+    connection: sqlite3.Connection,
+    table_name: str,
+    column_name: str,
+    prefix_size: int = PREFIX_SIZE,
+) -> Iterator[Tuple[int, Optional[bytes]]]:
+    """
+    (row id, the first prefix_size bytes of the geometry, None when NULL) of every row, in
+    row id order. Of geometries longer than INLINE_BLOB_SIZE only the prefix is read from the file.
+    """
+    # length() does not read the blob, the CASE only reads the short ones.
+    cursor = connection.execute(
+        f'SELECT cast(rowid AS INTEGER), length("{column_name}"), '
+        f'CASE WHEN length("{column_name}") <= {INLINE_BLOB_SIZE} '
+        f'THEN substr("{column_name}", 1, {prefix_size}) END '
+        f'FROM "{table_name}" ORDER BY rowid;'
+    )
+    # Incremental blob I/O is available since python 3.11.
+    read_blob = hasattr(connection, "blobopen")
+    try:
+        for row_id, length, prefix in cursor:
+            if length is not None and prefix is None:
+                if read_blob:
+                    with connection.blobopen(
+                        table_name, column_name, row_id, readonly=True
+                    ) as blob:
+                        prefix = blob.read(prefix_size)
+                else:
+                    (prefix,) = connection.execute(
+                        f'SELECT substr("{column_name}", 1, {prefix_size}) '
+                        f'FROM "{table_name}" WHERE rowid = ?;',
+                        (row_id,),
+                    ).fetchone()
+            yield row_id, prefix
+    finally:
+        cursor.close()
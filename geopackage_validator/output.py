@@ -37,26 +37,48 @@ def log_output(
     start_time: datetime = datetime.now(),
     duration_seconds: float = 0,
     as_yaml: bool = False,
+    details: Dict = None,
 ) -> None:
-    if validations_executed is None:
-        validations_executed = []
-
     print_output(
-        OrderedDict(
-            [
-                ("geopackage_validator_version", __version__),
-                ("start_time", start_time.strftime("%Y-%m-%dT%H:%M:%S.%f")),
-                ("duration_seconds", round(duration_seconds)),
-                ("geopackage", filename),
-                ("success", success),
-                ("validations_executed", validations_executed),
-                ("results", results),
-            ]
+        build_output(
+            results,
+            success,
+            filename,
+            validations_executed,
+            start_time,
+            duration_seconds,
+            details,
         ),
         as_yaml,
     )
 
 
+def build_output(
+    results: List[Dict[str, List[str]]],
+    success: bool,
+    filename: str = "",
+    validations_executed: List[str] = None,
+    start_time: datetime = datetime.now(),
+    duration_seconds: float = 0,
+    details: Dict = None,
+) -> OrderedDict:
+    if validations_executed is None:
+        validations_executed = []
+
+    return OrderedDict(
+        [
+            ("geopackage_validator_version", __version__),
+            ("start_time", start_time.strftime("%Y-%m-%dT%H:%M:%S.%f")),
+            ("duration_seconds", round(duration_seconds)),
+            ("geopackage", filename),
+            ("success", success),
+            ("validations_executed", validations_executed),
+            *(details or {}).items(),
+            ("results", results),
+        ]
+    )
+
+
 def print_output(python_object, as_yaml, yaml_indent=2):
     if isinstance(python_object, BaseModel):
         return print_output_pydantic(python_object, as_yaml, yaml_indent)
@@ -67,6 +89,60 @@ def print_output(python_object, as_yaml, yaml_indent=2):
     print(content)
 
 
+def print_ndjson(python_object):
+    """Print the object as a single JSON line, flushed so consumers can stream it."""
+    print(json.dumps(python_object, sort_keys=False), flush=True)
+
+
+class StreamOutput:
+    """
+    Writes the validate output as NDJSON while validating: a "validation" record for every
+    validator as soon as it is done, then a "summary" record with the fields of build_output.
+    The results of the summary are only those not written before, like the GDAL errors
+    and warnings.
+    """
+
+    def __init__(self, filename: str = ""):
+        self.filename = filename
+        self.streamed = set()
+
+    def on_result(
+        self, validation_code: str, results: List[Dict[str, List[str]]], success: bool
+    ) -> None:
+        self.streamed.update(id(result) for result in results)
+        print_ndjson(
+            OrderedDict(
+                [
+                    ("record", "validation"),
+                    ("geopackage", self.filename),
+                    ("validation_code", validation_code),
+                    ("success", success),
+                    ("results", results),
+                ]
+            )
+        )
+
+    def summary(
+        self,
+        results: List[Dict[str, List[str]]],
+        success: bool,
+        validations_executed: List[str] = None,
+        start_time: datetime = datetime.now(),
+        duration_seconds: float = 0,
+        details: Dict = None,
+    ) -> None:
+        summary = build_output(
+            [result for result in results if id(result) not in self.streamed],
+            success,
+            self.filename,
+            validations_executed,
+            start_time,
+            duration_seconds,
+            details,
+        )
+        print_ndjson(OrderedDict([("record", "summary"), *summary.items()]))
+
+
 def print_output_pydantic(model: BaseModel, as_yaml: bool, yaml_indent=2):
     content = model.model_dump_json(indent=4, exclude_none=True)
     if as_yaml:
@@ -1,8 +1,14 @@
 from minio import Minio
 import tempfile
 import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 
+DEFAULT_PART_SIZE = 64 * 1024 * 1024
+DEFAULT_CONCURRENCY = 8
+WRITE_CHUNK_SIZE = 1024 * 1024
+
 
 @contextmanager
 def minio_resource(
@@ -13,7 +19,15 @@ def minio_resource(
     s3_key: str,
     secure: bool = True,
     minio=Minio,
+    part_size: int = DEFAULT_PART_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    temp_dir: str = None,
 ) -> str:
+    """
+    Download the object to a temporary file in temp_dir, which is removed afterwards.
+    Objects larger than part_size are downloaded in ranged parts of part_size with
+    concurrency parallel requests.
+    """
     assert s3_endpoint_no_protocol is not None, "S3 endpoint has to be given"
     assert s3_access_key is not None, "S3 access key has to be given"
     assert s3_secret_key is not None, "S3 secret key has to be given"
@@ -21,7 +35,7 @@ def minio_resource(
     assert s3_key is not None, "S3 key has to be given"
 
     # Code to acquire resource, e.g.:
-    localfile = tempfile.NamedTemporaryFile(delete=False)
+    localfile = tempfile.NamedTemporaryFile(delete=False, dir=temp_dir)
     localfilename = localfile.name + ".gpkg"
     localfile.close()
 
@@ -37,18 +51,108 @@ def minio_resource(
             # This will throw an exception if no connection can be made
             pass
 
-        minio_client.stat_object(bucket_name=s3_bucket, object_name=s3_key)
+        stat = minio_client.stat_object(bucket_name=s3_bucket, object_name=s3_key)
+        check_free_disk_space(os.path.dirname(localfilename), stat.size)
 
         try:
             # Download file
-            minio_client.fget_object(
-                bucket_name=s3_bucket, object_name=s3_key, file_path=localfilename
-            )
+            if concurrency > 1 and stat.size > part_size:
+                ranged_download(
+                    minio_client,
+                    s3_bucket,
+                    s3_key,
+                    localfilename,
+                    stat.size,
+                    stat.etag,
+                    part_size,
+                    concurrency,
+                )
+            else:
+                minio_client.fget_object(
+                    bucket_name=s3_bucket, object_name=s3_key, file_path=localfilename
+                )
 
             yield localfilename
         except (ValueError, IOError):
             raise IOError("Could not open file from S3")
 
     finally:
-        if os.path.exists(localfilename):
-            os.unlink(localfilename)
+        for filename in (localfilename, localfile.name):
+            if os.path.exists(filename):
+                os.unlink(filename)
+
+
+def check_free_disk_space(directory: str, size: int) -> None:
+    free = shutil.disk_usage(directory).free
+    if free < size:
+        raise IOError(
+            f"Not enough free disk space in {directory} to download the geopackage: "
+            f"{size} bytes needed, {free} bytes free"
+        )
+
+
+def part_ranges(size: int, part_size: int):
+    """The (offset, length) of the parts of an object of size bytes."""
+    return [
+        (offset, min(part_size, size - offset)) for offset in range(0, size, part_size)
+    ]
+
+
+def ranged_download(
+    minio_client,
+    bucket_name: str,
+    object_name: str,
+    file_path: str,
+    size: int,
+    etag: str,
+    part_size: int = DEFAULT_PART_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> None:
+    """
+    Download the object in parts with concurrent ranged GET requests, every part is
+    written at its offset in the preallocated file. The requests are conditional on the
+    etag, so an object that is replaced during the download fails instead of mixing up
+    two versions.
+    """
+    with open(file_path, "wb") as f:
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(f.fileno(), 0, size)
+        else:
+            f.truncate(size)
+
+    def download_part(offset: int, length: int) -> None:
+        response = minio_client.get_object(
+            bucket_name,
+            object_name,
+            offset=offset,
+            length=length,
+            request_headers={"If-Match": etag} if etag else None,
+        )
+        try:
+            written = 0
+            with open(file_path, "r+b") as f:
+                f.seek(offset)
+                for chunk in response.stream(WRITE_CHUNK_SIZE):
+                    f.write(chunk)
+                    written += len(chunk)
+        finally:
+            response.close()
+            response.release_conn()
+        if written != length:
+            raise IOError(
+                f"Incomplete download of {object_name} at offset {offset}: "
+                f"{written} of {length} bytes"
+            )
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(download_part, offset, length)
+            for offset, length in part_ranges(size, part_size)
+        ]
+        try:
+            for future in futures:
+                future.result()
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
@@ -0,0 +1,422 @@
+"""
+Local HTTP service validating geopackages in warm worker processes, started with the serve
+command. The endpoints are:
+
+- ``POST /validate`` validates the geopackage uploaded as request body, or the file given
+  with the ``path`` query parameter (within one of the data directories). The query
+  parameters ``validations``, ``table_definitions`` (the name of preloaded definitions),
+  ``max_violations`` and ``fail_fast`` are the options of the validate command. The
+  response is the validate output.
+- ``POST /generate-definitions`` generates the table definitions of the uploaded or
+  referenced geopackage, with the ``with_indexes_and_fks`` query parameter.
+- ``GET /health`` reports the workers and the jobs in progress.
+
+Jobs run in a fixed number of worker processes, at most queue_size jobs wait for a worker
+(more are refused with 503, as is a job that waited job_timeout seconds without getting
+one) and a job running longer than job_timeout seconds is stopped by killing its worker,
+which is replaced by a new one.
+"""
+import json
+import logging
+import multiprocessing
+import queue
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from osgeo import gdal
+
+from geopackage_validator import generate, output, utils, validate
+from geopackage_validator.models import TablesDefinition
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_JOB_TIMEOUT = 300
+DEFAULT_MAX_UPLOAD_SIZE = 1024 * 1024 * 1024
+
+
+class JobError(Exception):
+    """A job that could not be run, with the HTTP status to answer."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def validate_job(gpkg_path: str, filename: str, table_definitions, **options) -> Dict:
+    start_time = datetime.now()
+    duration_start = time.monotonic()
+    details = {}
+    results, validations_executed, success = validate.validate(
+        gpkg_path,
+        table_definitions=table_definitions,
+        details=details,
+        jobs=1,
+        **options,
+    )
+    return output.build_output(
+        results=results,
+        success=success,
+        filename=filename,
+        validations_executed=validations_executed,
+        start_time=start_time,
+        duration_seconds=time.monotonic() - duration_start,
+        details=details,
+    )
+
+
+def generate_job(gpkg_path: str, filename: str, with_indexes_and_fks=False) -> Dict:
+    definitions = generate.generate_definitions_for_path(
+        gpkg_path, with_indexes_and_fks
+    )
+    return json.loads(definitions.model_dump_json(exclude_none=True))
+
+
+def job_function(name: str):
+    return {"validate": validate_job, "generate": generate_job}[name]
+
+
+def _worker_main(connection, gdal_config_options, table_definitions):
+    """Loop of a worker process: run the jobs received on the connection."""
+    for key, value in gdal_config_options.items():
+        gdal.SetConfigOption(key, value)
+    while True:
+        try:
+            name, kwargs = connection.recv()
+        except EOFError:
+            return
+        definitions_name = kwargs.pop("table_definitions", None)
+        if name == "validate":
+            kwargs["table_definitions"] = table_definitions.get(definitions_name)
+        try:
+            connection.send(("ok", job_function(name)(**kwargs)))
+        except Exception:
+            exc_type, exc_value, _ = sys.exc_info()
+            connection.send(
+                ("error", "".join(traceback.format_exception_only(exc_type, exc_value)))
+            )
+
+
+class Worker:
+    """A worker process with the connection to send it jobs."""
+
+    def __init__(self, context, table_definitions: Dict[str, TablesDefinition]):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_connection, utils.gdal_config_options(), table_definitions),
+            daemon=True,
+        )
+        self.process.start()
+        child_connection.close()
+
+    def run(self, name: str, kwargs: Dict, timeout: float):
+        self.connection.send((name, kwargs))
+        if not self.connection.poll(timeout):
+            raise JobError(
+                HTTPStatus.GATEWAY_TIMEOUT,
+                f"job did not finish within {timeout} seconds",
+            )
+        status, result = self.connection.recv()
+        if status != "ok":
+            raise JobError(HTTPStatus.INTERNAL_SERVER_ERROR, result)
+        return result
+
+    def stop(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class WorkerPool:
+    """
+    A fixed number of warm worker processes sharing the preloaded table definitions. At
+    most queue_size jobs wait for a free worker, jobs beyond that are refused. A job
+    waits at most job_timeout seconds for a worker and may then run job_timeout seconds.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        job_timeout: float = DEFAULT_JOB_TIMEOUT,
+        table_definitions: Dict[str, TablesDefinition] = None,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.job_timeout = job_timeout
+        self.table_definitions = table_definitions or {}
+        # Spawned, workers are replaced from the request handling threads.
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[Worker]" = queue.Queue()
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self.jobs_in_progress = 0
+        for _ in range(workers):
+            self._idle.put(self.start_worker())
+
+    def start_worker(self) -> Worker:
+        return Worker(self._context, self.table_definitions)
+
+    def replace_worker(self, worker: Worker) -> Worker:
+        worker.stop()
+        return self.start_worker()
+
+    def run(self, name: str, **kwargs):
+        """Run the job in a worker, raising JobError when it fails or cannot be queued."""
+        if not self._slots.acquire(blocking=False):
+            raise JobError(HTTPStatus.SERVICE_UNAVAILABLE, "job queue is full")
+        with self._lock:
+            self.jobs_in_progress += 1
+        try:
+            try:
+                worker = self._idle.get(timeout=self.job_timeout)
+            except queue.Empty:
+                raise JobError(
+                    HTTPStatus.SERVICE_UNAVAILABLE,
+                    f"no worker became free within {self.job_timeout} seconds",
+                )
+            try:
+                return worker.run(name, kwargs, self.job_timeout)
+            except JobError as e:
+                # The worker of a job that timed out is still busy, it is replaced.
+                if e.status == HTTPStatus.GATEWAY_TIMEOUT:
+                    worker = self.replace_worker(worker)
+                raise
+            except (OSError, EOFError):
+                worker = self.replace_worker(worker)
+                raise JobError(HTTPStatus.INTERNAL_SERVER_ERROR, "worker stopped")
+            finally:
+                self._idle.put(worker)
+        finally:
+            with self._lock:
+                self.jobs_in_progress -= 1
+            self._slots.release()
+
+    def close(self):
+        """Stop the idle workers, busy workers are daemon processes ending with the server."""
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                return
+
+
+def query_flag(query: Dict[str, List[str]], name: str) -> bool:
+    return query.get(name, ["false"])[-1].lower() in ("1", "true", "yes")
+
+
+class ValidationRequestHandler(BaseHTTPRequestHandler):
+    server: "ValidationServer"
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/health":
+            self.send_json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            return
+        pool = self.server.pool
+        self.send_json(
+            HTTPStatus.OK,
+            {
+                "status": "ok",
+                "workers": pool.workers,
+                "queue_size": pool.queue_size,
+                "jobs_in_progress": pool.jobs_in_progress,
+                "table_definitions": sorted(pool.table_definitions),
+            },
+        )
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        try:
+            if url.path == "/validate":
+                job = ("validate", self.validate_options(query))
+            elif url.path == "/generate-definitions":
+                job = (
+                    "generate",
+                    {"with_indexes_and_fks": query_flag(query, "with_indexes_and_fks")},
+                )
+            else:
+                raise JobError(HTTPStatus.NOT_FOUND, "not found")
+            with self.geopackage(query) as (gpkg_path, filename):
+                result = self.server.pool.run(
+                    job[0], gpkg_path=gpkg_path, filename=filename, **job[1]
+                )
+        except JobError as e:
+            self.send_json(e.status, {"error": str(e)})
+            return
+        self.send_json(HTTPStatus.OK, result)
+
+    def validate_options(self, query: Dict[str, List[str]]) -> Dict:
+        definitions_name = query.get("table_definitions", [None])[-1]
+        if (
+            definitions_name is not None
+            and definitions_name not in self.server.pool.table_definitions
+        ):
+            raise JobError(
+                HTTPStatus.BAD_REQUEST,
+                f"unknown table definitions: {definitions_name}",
+            )
+        try:
+            validators = validate.validators_to_use(
+                query.get("validations", [""])[-1], None, definitions_name is not None
+            )
+            max_violations = query.get("max_violations", [None])[-1]
+            max_violations = int(max_violations) if max_violations else None
+        except (SystemExit, ValueError):
+            raise JobError(HTTPStatus.BAD_REQUEST, "invalid validations or options")
+        return {
+            "table_definitions": definitions_name,
+            "validators": validators,
+            "max_violations": max_violations,
+            "fail_fast": query_flag(query, "fail_fast"),
+        }
+
+    def geopackage(self, query: Dict[str, List[str]]):
+        """Context of the (gpkg_path, filename) of the referenced or uploaded geopackage."""
+        if "path" in query:
+            return referenced_geopackage(query["path"][-1], self.server.data_dirs)
+        return self.uploaded_geopackage(query.get("filename", ["upload.gpkg"])[-1])
+
+    def uploaded_geopackage(self, filename: str):
+        length = self.headers.get("Content-Length")
+        if length is None:
+            raise JobError(HTTPStatus.LENGTH_REQUIRED, "Content-Length required")
+        try:
+            length = int(length)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            raise JobError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+        if length > self.server.max_upload_size:
+            raise JobError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "upload too large")
+        upload = tempfile.NamedTemporaryFile(
+            suffix=".gpkg", dir=self.server.temp_dir, delete=False
+        )
+        with upload:
+            remaining = length
+            while remaining > 0:
+                chunk = self.rfile.read(min(UPLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                upload.write(chunk)
+                remaining -= len(chunk)
+        if remaining > 0:
+            Path(upload.name).unlink(missing_ok=True)
+            raise JobError(HTTPStatus.BAD_REQUEST, "incomplete upload")
+        return TemporaryUpload(upload.name, filename)
+
+    def send_json(self, status: HTTPStatus, body) -> None:
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+
+class TemporaryUpload:
+    """Context of an uploaded geopackage, removed afterwards."""
+
+    def __init__(self, gpkg_path: str, filename: str):
+        self.gpkg_path = gpkg_path
+        self.filename = filename
+
+    def __enter__(self) -> Tuple[str, str]:
+        return self.gpkg_path, self.filename
+
+    def __exit__(self, *exc_info):
+        Path(self.gpkg_path).unlink(missing_ok=True)
+
+
+class ReferencedGeopackage:
+    def __init__(self, gpkg_path: str):
+        self.gpkg_path = gpkg_path
+
+    def __enter__(self) -> Tuple[str, str]:
+        return self.gpkg_path, self.gpkg_path
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+def referenced_geopackage(path: str, data_dirs: List[Path]) -> ReferencedGeopackage:
+    """Only files within the data directories can be referenced."""
+    resolved = Path(path).resolve()
+    if not any(
+        resolved == data_dir or data_dir in resolved.parents for data_dir in data_dirs
+    ):
+        raise JobError(HTTPStatus.FORBIDDEN, f"path is not in a data directory: {path}")
+    if not resolved.is_file():
+        raise JobError(HTTPStatus.NOT_FOUND, f"file not found: {path}")
+    return ReferencedGeopackage(str(resolved))
+
+
+class ValidationServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        pool: WorkerPool,
+        data_dirs: List[str] = (),
+        max_upload_size: int = DEFAULT_MAX_UPLOAD_SIZE,
+        temp_dir: Optional[str] = None,
+    ):
+        super().__init__(address, ValidationRequestHandler)
+        self.pool = pool
+        self.data_dirs = [Path(data_dir).resolve() for data_dir in data_dirs]
+        self.max_upload_size = max_upload_size
+        self.temp_dir = temp_dir
+
+
+def load_named_table_definitions(
+    named_paths: List[str],
+) -> Dict[str, TablesDefinition]:
+    """Load NAME=PATH table definitions."""
+    table_definitions = {}
+    for named_path in named_paths:
+        name, separator, path = named_path.partition("=")
+        if not separator:
+            name, path = Path(named_path).stem, named_path
+        table_definitions[name] = validate.load_table_definitions(path)
+    return table_definitions
+
+
+def serve(
+    host: str,
+    port: int,
+    workers: int,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    job_timeout: float = DEFAULT_JOB_TIMEOUT,
+    table_definitions: Dict[str, TablesDefinition] = None,
+    data_dirs: List[str] = (),
+    max_upload_size: int = DEFAULT_MAX_UPLOAD_SIZE,
+    temp_dir: Optional[str] = None,
+) -> None:
+    utils.check_gdal_version()
+    pool = WorkerPool(workers, queue_size, job_timeout, table_definitions)
+    server = ValidationServer((host, port), pool, data_dirs, max_upload_size, temp_dir)
+    logger.info(
+        "serving on http://%s:%s with %s workers", *server.server_address[:2], workers
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
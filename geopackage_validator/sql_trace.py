@@ -0,0 +1,152 @@
+"""Tracing of the SQL statements executed on a dataset, enabled with --trace-sql."""
+import json
+import os
+import sys
+import time
+import weakref
+from typing import Dict, List, Optional
+
+# The trace file, as environment variable so datasets opened in worker processes are
+# traced too.
+TRACE_SQL_ENV = "GEOPACKAGE_VALIDATOR_TRACE_SQL"
+
+
+def enable(trace_path: str) -> None:
+    """Trace the datasets opened from now on (also in worker processes) to trace_path."""
+    open(trace_path, "w").close()
+    os.environ[TRACE_SQL_ENV] = str(trace_path)
+
+
+def disable() -> None:
+    os.environ.pop(TRACE_SQL_ENV, None)
+
+
+def trace_path() -> Optional[str]:
+    return os.environ.get(TRACE_SQL_ENV)
+
+
+def calling_validator() -> Optional[str]:
+    """The validation code of the validator on the call stack, if any."""
+    # Imported here, the validations import utils which imports this module.
+    from geopackage_validator.validations.validator import Validator
+
+    frame = sys._getframe(2)
+    while frame is not None:
+        instance = frame.f_locals.get("self")
+        if isinstance(instance, Validator):
+            return instance.validation_code
+        frame = frame.f_back
+    return None
+
+
+def write_record(path: str, record: Dict) -> None:
+    # One write per line in append mode, so lines of worker processes do not interleave.
+    with open(path, "a") as trace_file:
+        trace_file.write(json.dumps(record) + "\n")
+
+
+class TracedResultSet:
+    """Proxy of a result set layer counting the rows fetched from it."""
+
+    def __init__(self, layer, record: Dict):
+        self._layer = layer
+        self._record = record
+
+    def __getattr__(self, name):
+        return getattr(self._layer, name)
+
+    def __iter__(self):
+        for feature in self._layer:
+            self._record["rows"] += 1
+            yield feature
+
+    def __len__(self):
+        return len(self._layer)
+
+    def __getitem__(self, index):
+        return self._layer[index]
+
+    def GetNextFeature(self):
+        feature = self._layer.GetNextFeature()
+        if feature is not None:
+            self._record["rows"] += 1
+        return feature
+
+
+def install(dataset, path: str) -> None:
+    """
+    Wrap ExecuteSQL and ReleaseResultSet of the dataset. Every statement is written to the
+    json lines file at path when its result set is released, or when the result set is
+    garbage collected without being released. The record has the statement, the calling
+    validator, the seconds of the ExecuteSQL call, the seconds until release, the number
+    of rows fetched and whether it was released.
+    """
+    execute_sql = dataset.ExecuteSQL
+    release_result_set = dataset.ReleaseResultSet
+
+    def finish(record: Dict, released: bool) -> None:
+        record["seconds"] = round(time.perf_counter() - record.pop("_start"), 6)
+        record["released"] = released
+        write_record(path, record)
+
+    def traced_execute_sql(statement, *args, **kwargs):
+        record = {
+            "sql": statement,
+            "validator": calling_validator(),
+            "pid": os.getpid(),
+            "rows": 0,
+            "_start": time.perf_counter(),
+        }
+        try:
+            result = execute_sql(statement, *args, **kwargs)
+        except Exception as e:
+            record["error"] = str(e)
+            finish(record, released=True)
+            raise
+        record["execute_seconds"] = round(time.perf_counter() - record["_start"], 6)
+        if result is None:
+            finish(record, released=True)
+            return None
+        traced = TracedResultSet(result, record)
+        traced._finalizer = weakref.finalize(traced, finish, record, False)
+        return traced
+
+    def traced_release_result_set(result_set):
+        if isinstance(result_set, TracedResultSet):
+            result_set._finalizer.detach()
+            release_result_set(result_set._layer)
+            finish(result_set._record, released=True)
+        else:
+            release_result_set(result_set)
+
+    dataset.ExecuteSQL = traced_execute_sql
+    dataset.ReleaseResultSet = traced_release_result_set
+
+
+def read_trace(path: str) -> List[Dict]:
+    with open(path, "r") as trace_file:
+        return [json.loads(line) for line in trace_file if line.strip()]
+
+
+def slowest_statements(records: List[Dict], top: int = 10) -> List[Dict]:
+    return sorted(records, key=lambda record: record["seconds"], reverse=True)[:top]
+
+
+def summarize(path: str, top: int = 10) -> List[str]:
+    """Summary lines of the trace with the top slowest statements."""
+    records = read_trace(path)
+    total = sum(record["seconds"] for record in records)
+    lines = [
+        f"traced {len(records)} SQL statements taking {total:.3f} seconds in {path}"
+    ]
+    for record in slowest_statements(records, top):
+        lines.append(
+            "{seconds:.3f}s {validator} rows {rows}{released}: {sql}".format(
+                seconds=record["seconds"],
+                validator=record["validator"] or "-",
+                rows=record["rows"],
+                released="" if record["released"] else " (not released)",
+                sql=" ".join(record["sql"].split()),
+            )
+        )
+    return lines
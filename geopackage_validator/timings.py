@@ -0,0 +1,74 @@
+"""Wall time, CPU time and rows scanned of the validators and the tables they scan."""
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+def rounded(seconds: float) -> float:
+    return round(seconds, 3)
+
+
+class Timings:
+    """
+    Collects the timings of the validators and of the tables scanned by the running
+    validator. CPU time is the time of this process, work done in other processes (the
+    sharded geometry scan) only shows in the wall time.
+    """
+
+    def __init__(self):
+        self.validators: List[Dict] = []
+        self._tables: Optional[List[Dict]] = None
+
+    @contextmanager
+    def validator(self, validation_code: str):
+        tables = self._tables = []
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            entry = OrderedDict(
+                [
+                    ("validation_code", validation_code),
+                    ("wall_seconds", rounded(time.perf_counter() - wall_start)),
+                    ("cpu_seconds", rounded(time.process_time() - cpu_start)),
+                ]
+            )
+            rows = [
+                table["rows_scanned"] for table in tables if "rows_scanned" in table
+            ]
+            if rows:
+                entry["rows_scanned"] = sum(rows)
+            if tables:
+                entry["tables"] = tables
+            self.validators.append(entry)
+            self._tables = None
+
+    @contextmanager
+    def table(self, table_name: str):
+        """Times the scan of a table, the caller can set "rows_scanned" on the yielded dict."""
+        counts = {}
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield counts
+        finally:
+            entry = OrderedDict(
+                [
+                    ("table", table_name),
+                    ("wall_seconds", rounded(time.perf_counter() - wall_start)),
+                    ("cpu_seconds", rounded(time.process_time() - cpu_start)),
+                ]
+            )
+            entry.update(counts)
+            if self._tables is not None:
+                self._tables.append(entry)
+
+
+@contextmanager
+def table_timing(timings: Optional[Timings], table_name: str):
+    """Timings.table when timings are collected, otherwise a no-op."""
+    if timings is None:
+        yield {}
+        return
+    with timings.table(table_name) as counts:
+        yield counts
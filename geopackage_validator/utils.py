@@ -1,11 +1,11 @@
 import json
+import math
 import os
 import sys
 import warnings
 from contextlib import contextmanager
-from functools import lru_cache
 from pathlib import Path
-from typing import List, Tuple, Iterable, Callable
+from typing import Dict, List, Optional, Tuple, Iterable, Callable
 
 import yaml
 from osgeo import ogr
@@ -22,6 +22,8 @@ except (ImportError, AssertionError):
         "ERROR: cannot find GDAL/OGR modules, follow the instructions in the README to install these."
     )
 
+from geopackage_validator import sql_trace
+
 GDAL_ENV_MAPPING = {
     "s3_no_sign_request": (
         "AWS_NO_SIGN_REQUEST",
@@ -67,10 +69,54 @@ def open_dataset(filename: str = None, error_handler: Callable = None) -> gdal.D
 
     if dataset is not None:
         dataset.silence_gdal = silence_gdal
+        trace_path = sql_trace.trace_path()
+        if trace_path is not None:
+            sql_trace.install(dataset, trace_path)
 
     return dataset
 
 
+def gdal_config_options() -> Dict[str, str]:
+    """Returns the GDAL configuration options set in this process, to hand over to worker processes."""
+    if hasattr(gdal, "GetConfigOptions"):
+        return gdal.GetConfigOptions() or {}
+    return {}
+
+
+def cgroup_cpu_quota(cgroup_root: str = "/sys/fs/cgroup") -> Optional[float]:
+    """Returns the CPU quota of the container in number of CPUs, or None when not limited."""
+    root = Path(cgroup_root)
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        quota, period = (root / "cpu.max").read_text().split()
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1: a quota of -1 means unlimited
+        quota = int((root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period = int((root / "cpu" / "cpu.cfs_period_us").read_text())
+        if quota <= 0 or period <= 0:
+            return None
+        return quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpu_count() -> int:
+    """Number of CPUs this process may use, honouring affinity and the cgroup CPU quota."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    quota = cgroup_cpu_quota()
+    if quota is not None:
+        count = min(count, max(1, math.ceil(quota)))
+    return count
+
+
 def check_gdal_version():
     """This method checks if GDAL has the right version and exits with an error otherwise."""
     version_num = int(gdal.VersionInfo("VERSION_NUM"))
@@ -78,7 +124,6 @@ def check_gdal_version():
         sys.exit("ERROR: Python bindings of GDAL 1.10 or later required")
 
 
-@lru_cache(None)
 def dataset_geometry_tables(dataset: gdal.Dataset) -> List[Tuple[str, str, str]]:
     """
     Generate a list of geometry type names from the gpkg_geometry_columns table.
@@ -130,15 +175,3 @@ def group_by(
         first = False
     if len(group) > 0:
         yield group
-
-
-def get_table_names_from_contents(ds: gdal.Dataset) -> List[Tuple[str, str]]:
-    """This method returns a list of table names from the gpkg_contents table, instead of just features"""
-    layer_names: List[(str, str)] = []
-    layer: ogr.Layer = ds.ExecuteSQL("SELECT table_name, data_type FROM gpkg_contents;")
-    for layer_listing in layer:
-        layer_names.append(
-            (layer_listing.GetField("table_name"), layer_listing.GetField("data_type"))
-        )
-    ds.ReleaseResultSet(layer)
-    return layer_names
@@ -1,18 +1,28 @@
 import logging
+import re
 import sys
 import traceback
 from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 import yaml
 from osgeo import gdal
 
 from geopackage_validator import utils
+from geopackage_validator.cache import ResultCache, TableCache
+from geopackage_validator.catalog import Catalog
+from geopackage_validator.timings import Timings
 from geopackage_validator import validations as validation
+from geopackage_validator.validations import geometry_scan
+from geopackage_validator.validations import rtree_valid_check
 from geopackage_validator.models import TablesDefinition, migrate_tables_definition
 from geopackage_validator.validations.validator import (
     Validator,
     ValidationLevel,
+    VALIDATION_LEVELS,
     format_result,
 )
 
@@ -25,6 +35,13 @@ RQ8 = "RQ8"
 RQ12 = "RQ12"
 RQ16 = "RQ16"
 
+# GDAL messages kept per distinct message (template), and the number of templates kept.
+MAX_TRACE_EXAMPLES = 5
+MAX_TRACE_TEMPLATES = 100
+
+# The description of the results of an exception or GDAL errors of a validator.
+UNEXPECTED_ERRORS_DESCRIPTION = "No unexpected errors must occur for: "
+
 
 # Drop legacy requirements
 DROP_LEGACY_RQ_FROM_ALL = [RQ0, RQ3, RQ5, RQ12, RQ16]
@@ -77,10 +94,87 @@ def validators_to_use(
     return [validator_dict[code] for code in codes]
 
 
+TRACE_QUOTED = re.compile(r"'[^']*'|\"[^\"]*\"")
+TRACE_NUMBER = re.compile(r"0x[0-9a-fA-F]+|[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+
+
+def trace_template(trace: str) -> str:
+    """The message with its quoted names and numbers replaced, e.g. the feature ids."""
+    return TRACE_NUMBER.sub("#", TRACE_QUOTED.sub("'?'", trace))
+
+
+class GdalTraces(object):
+    """
+    GDAL messages aggregated by template: per template the count and the first
+    max_examples messages. Messages with a new template once max_templates are kept only
+    add to the overflow count, so a geopackage emitting millions of messages does not
+    grow the memory or the report.
+    """
+
+    def __init__(
+        self,
+        max_examples: int = MAX_TRACE_EXAMPLES,
+        max_templates: int = MAX_TRACE_TEMPLATES,
+    ):
+        self.max_examples = max_examples
+        self.max_templates = max_templates
+        # template: [count, examples]
+        self.templates = OrderedDict()
+        self.overflow = 0
+
+    def append(self, trace: str, count: int = 1) -> None:
+        self.add(trace_template(trace), [trace], count)
+
+    def add(self, template: str, examples: List[str], count: int) -> None:
+        if template not in self.templates:
+            if len(self.templates) >= self.max_templates:
+                self.overflow += count
+                return
+            self.templates[template] = [0, []]
+        aggregate = self.templates[template]
+        aggregate[0] += count
+        aggregate[1].extend(examples[: self.max_examples - len(aggregate[1])])
+
+    def merge(self, other: "GdalTraces") -> None:
+        for template, (count, examples) in other.templates.items():
+            self.add(template, examples, count)
+        self.overflow += other.overflow
+
+    def take(self) -> "GdalTraces":
+        """Move the messages to a new GdalTraces, leaving this one empty."""
+        taken = GdalTraces(self.max_examples, self.max_templates)
+        taken.templates, taken.overflow = self.templates, self.overflow
+        self.clear()
+        return taken
+
+    def clear(self) -> None:
+        self.templates = OrderedDict()
+        self.overflow = 0
+
+    def __len__(self) -> int:
+        return sum(count for count, _ in self.templates.values()) + self.overflow
+
+    def locations(self) -> List[str]:
+        """The examples, with a line for the count of every template beyond them."""
+        locations = []
+        for template, (count, examples) in self.templates.items():
+            locations.extend(examples)
+            if count > len(examples):
+                locations.append(
+                    f"... {count - len(examples)} more messages like: {template}"
+                )
+        if self.overflow:
+            locations.append(
+                f"... {self.overflow} more messages, not aggregated beyond "
+                f"{self.max_templates} distinct messages"
+            )
+        return locations
+
+
 class GdalErrorHandler(object):
     def __init__(self):
-        self.gdal_error_traces = []
-        self.gdal_warning_traces = []
+        self.gdal_error_traces = GdalTraces()
+        self.gdal_warning_traces = GdalTraces()
 
     def handler(self, err_level, err_no, err_msg):
         trace = err_msg.replace("\n", " ")
@@ -90,110 +184,627 @@ class GdalErrorHandler(object):
             self.gdal_error_traces.append(trace)
 
 
+class ValidationRun(object):
+    """
+    The state of the validation of one geopackage: the dataset, its GDAL error handler,
+    the metadata catalog (which memoizes the metadata queries), the table cache and the
+    timings. Nothing is kept between runs, when the run is closed the references are
+    dropped and the error handler is popped, so a process validating many files does not
+    grow.
+    """
+
+    def __init__(
+        self, gpkg_path, cache: Optional[ResultCache] = None, timings: bool = False
+    ):
+        self.error_handler = GdalErrorHandler()
+        self.dataset = utils.open_dataset(gpkg_path, self.error_handler.handler)
+        self.catalog = Catalog(self.dataset) if self.dataset is not None else None
+        self.table_cache = (
+            TableCache(cache, self.dataset)
+            if cache is not None and self.dataset is not None
+            else None
+        )
+        self.timings = Timings() if timings else None
+        self.geometry_scan: Optional[geometry_scan.GeometryScan] = None
+
+    def close(self):
+        if self.geometry_scan is not None:
+            self.geometry_scan.close()
+        self.dataset = self.catalog = self.table_cache = self.geometry_scan = None
+        gdal.PopErrorHandler()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
 def validate(
-    gpkg_path, table_definitions_path=None, validations_path=None, validations=""
+    gpkg_path,
+    table_definitions_path=None,
+    validations_path=None,
+    validations="",
+    jobs=1,
+    shard_by=geometry_scan.SHARD_BY_ROWS,
+    max_violations=None,
+    fail_fast=False,
+    details=None,
+    table_definitions: TablesDefinition = None,
+    validators=None,
+    cache: Optional[ResultCache] = None,
+    timings: bool = False,
+    on_result: Optional[Callable[[str, List[Dict], bool], None]] = None,
+    geometry_backend: str = geometry_scan.SPATIALITE,
+    rtree_timeout: Optional[float] = None,
+    rtree_mode: str = rtree_valid_check.RTREE_MODE_RTREECHECK,
+    rtree_progress: Optional[Callable[[str, str, float], None]] = None,
 ):
-    """Starts the geopackage validations."""
+    """Starts the geopackage validations.
+
+    With jobs > 1 the validators run in a process pool where every worker opens its own
+    read-only dataset. When jobs is 0 or None the pool size is the CPU quota of the
+    container. Results are always reported in the order of get_validator_classes.
+    When the validators make up a single pool task (like only the validations answered
+    from the geometry scan) they run in this process, and large geometry tables are split
+    in rowid ranges balanced by shard_by ("rows" or "bytes") which are scanned by jobs
+    workers. Pool workers scan with one process, so no more than jobs processes work.
+
+    With max_violations the validations stop after that many violations, with fail_fast
+    the remaining requirements are skipped after the first failing one (and scans stop
+    at the first violation unless max_violations is given). The violations of
+    recommendations do not count for the requirements, so no requirement is skipped
+    because of them. When a details dict is given
+    it is filled with the run details for the report, like whether it was truncated.
+
+    Callers validating many files can pass the loaded table_definitions and the
+    validators (from validators_to_use) instead of the paths, so they are read once.
+
+    With a cache the result of a geopackage with the same content, validations, table
+    definitions and version is returned from the cache without opening the dataset.
+    Otherwise the table scoped validations reuse the cached results of the tables that
+    did not change, the reused and rescanned tables are added to details.
+
+    With timings the wall time, CPU time and rows scanned per validator, and per table for
+    the validators that scan tables, are added to details.
+
+    The dataset and the metadata memoized for the validators live in a ValidationRun that
+    is closed when validate returns, so nothing of a validated file is kept afterwards.
+
+    on_result is called with the validation code, results and success of every validator
+    as soon as it is done, so callers can report progress.
+
+    With the "native" geometry_backend the validators that can decode the geometries of a
+    local geopackage themselves do so, instead of using spatialite functions.
+
+    The rtree indexes of a local geopackage are checked by jobs worker processes (one
+    process in a pool worker), the check of an index is stopped after rtree_timeout
+    seconds and reported as such. The rtree_mode is whether RQ10 checks the structure of the rtree indexes ("rtreecheck"),
+    whether their entries match the envelopes of the geometries ("envelope") or "both".
+    rtree_progress is called with the table name, status and seconds of every checked
+    rtree index, instead of logging it. A callable can not be sent to the pool workers,
+    so with rtree_progress RQ10 runs in this process (with one process for the rtree
+    checks) while the other validators run in the pool.
+    """
     utils.check_gdal_version()
 
-    errHandler = GdalErrorHandler()
-    dataset = utils.open_dataset(gpkg_path, errHandler.handler)
+    if table_definitions is None and table_definitions_path is not None:
+        table_definitions = load_table_definitions(table_definitions_path)
+    is_rq8_requested = table_definitions is not None
+
+    if validators is None:
+        validators = validators_to_use(validations, validations_path, is_rq8_requested)
+
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.key(
+            gpkg_path,
+            get_validation_codes(validators),
+            table_definitions,
+            {
+                "max_violations": max_violations,
+                "fail_fast": fail_fast,
+                "rtree_timeout": rtree_timeout,
+                "rtree_mode": rtree_mode,
+            },
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            if details is not None:
+                details.update(cached["details"])
+            if on_result is not None:
+                report_cached_results(
+                    cached["results"], cached["validations_executed"], on_result
+                )
+            return (
+                cached["results"],
+                cached["validations_executed"],
+                cached["success"],
+            )
 
-    if len(errHandler.gdal_error_traces):
-        initial_gdal_traces = [
-            errHandler.gdal_error_traces.pop()
-            for _ in range(len(errHandler.gdal_error_traces))
-        ]
-        initial_gdal_errors = [
-            format_result(
-                validation_code="UNKNOWN_ERROR",
-                validation_description="No unexpected (GDAL) errors must occur.",
-                level=ValidationLevel.UNKNOWN_ERROR,
-                trace=initial_gdal_traces,
+    with ValidationRun(gpkg_path, cache, timings) as run:
+        errHandler, dataset = run.error_handler, run.dataset
+
+        if len(errHandler.gdal_error_traces):
+            initial_gdal_traces = errHandler.gdal_error_traces.take().locations()
+            initial_gdal_errors = [
+                format_result(
+                    validation_code="UNKNOWN_ERROR",
+                    validation_description="No unexpected (GDAL) errors must occur.",
+                    level=ValidationLevel.UNKNOWN_ERROR,
+                    trace=initial_gdal_traces,
+                )
+            ]
+        else:
+            initial_gdal_errors = []
+
+        if dataset is None:
+            if len(initial_gdal_errors) == 0:
+                return (
+                    [
+                        format_result(
+                            validation_code="GDAL_ERROR",
+                            validation_description="Could not open gpkg.",
+                            level=ValidationLevel.UNKNOWN_ERROR,
+                            trace=[],
+                        )
+                    ],
+                    None,
+                    False,
+                )
+            return initial_gdal_errors, None, False
+
+        if not jobs:
+            jobs = utils.available_cpu_count()
+        budget = ViolationBudget(max_violations, fail_fast)
+        scan_options = {
+            "jobs": jobs,
+            "shard_by": shard_by,
+            "max_violations": budget.max_violations,
+        }
+
+        table_cache, validator_timings = run.table_cache, run.timings
+
+        # The validators that get a callable run in this process.
+        local_validators = (
+            {validation.ValidRtreeValidator} if rtree_progress is not None else set()
+        )
+        pool_size = min(jobs, len(pool_tasks(validators, local_validators)))
+        if pool_size > 1:
+
+            def run_local_validator(validator):
+                return run_validator(
+                    validator,
+                    dataset,
+                    errHandler,
+                    table_definitions=table_definitions,
+                    table_cache=table_cache,
+                    timings=validator_timings,
+                    catalog=run.catalog,
+                    max_violations=budget.remaining(validator.level),
+                    geometry_backend=geometry_backend,
+                    jobs=1,
+                    rtree_timeout=rtree_timeout,
+                    rtree_mode=rtree_mode,
+                    rtree_progress=rtree_progress,
+                )
+
+            # The workers already use the jobs processes, they scan and check the rtree
+            # indexes with one process each.
+            validator_runs = run_validators_in_pool(
+                gpkg_path,
+                validators,
+                pool_size,
+                dict(scan_options, jobs=1),
+                budget,
+                table_cache,
+                validator_timings,
+                local_validators,
+                run_local_validator,
+                table_definitions=table_definitions,
+                max_violations=budget.max_violations,
+                geometry_backend=geometry_backend,
+                jobs=1,
+                rtree_timeout=rtree_timeout,
+                rtree_mode=rtree_mode,
+            )
+        else:
+            scan = run.geometry_scan = geometry_scan.GeometryScan(
+                dataset,
+                geometry_scan.requested_predicates(validators, geometry_backend),
+                table_cache=table_cache,
+                timings=validator_timings,
+                catalog=run.catalog,
+                **scan_options,
+            )
+            validator_runs = (
+                (
+                    validator,
+                    run_validator(
+                        validator,
+                        dataset,
+                        errHandler,
+                        table_definitions=table_definitions,
+                        geometry_scan=scan,
+                        table_cache=table_cache,
+                        timings=validator_timings,
+                        catalog=run.catalog,
+                        max_violations=budget.remaining(validator.level),
+                        geometry_backend=geometry_backend,
+                        jobs=jobs,
+                        rtree_timeout=rtree_timeout,
+                        rtree_mode=rtree_mode,
+                        rtree_progress=rtree_progress,
+                    ),
+                )
+                for validator in validators
+                if not budget.skip(validator)
             )
-        ]
-    else:
-        initial_gdal_errors = []
 
-    if dataset is None:
-        if len(initial_gdal_errors) == 0:
-            return (
-                [
-                    format_result(
-                        validation_code="GDAL_ERROR",
-                        validation_description="Could not open gpkg.",
-                        level=ValidationLevel.UNKNOWN_ERROR,
-                        trace=[],
-                    )
-                ],
-                None,
-                False,
+        validation_results = []
+        success = not initial_gdal_errors
+        gdal_warning_traces = errHandler.gdal_warning_traces.take()
+
+        for validator, (
+            results,
+            validator_success,
+            warning_traces,
+            truncated,
+        ) in validator_runs:
+            recorded_results = budget.record(
+                results, validator_success, truncated, validator.level
             )
-        return initial_gdal_errors, None, False
+            validation_results.extend(recorded_results)
+            if on_result is not None:
+                on_result(
+                    validator.validation_code, recorded_results, validator_success
+                )
+            success = success and validator_success
+            gdal_warning_traces.merge(warning_traces)
 
-    is_rq8_requested = table_definitions_path is not None
-    table_definitions = (
-        load_table_definitions(table_definitions_path) if is_rq8_requested else None
-    )
+        if details is not None and budget.truncated:
+            details["truncated"] = True
+            details["validations_skipped"] = budget.skipped
 
-    validators = validators_to_use(validations, validations_path, is_rq8_requested)
+        if gdal_warning_traces:
+            output = format_result(
+                validation_code="UNKNOWN_WARNINGS",
+                validation_description="It is recommended that these unexpected (GDAL) warnings are looked into.",
+                level=ValidationLevel.UNKNOWN_WARNING,
+                trace=gdal_warning_traces.locations(),
+            )
+            validation_results.append(output)
+        results = initial_gdal_errors + validation_results
+        validations_executed = [
+            code
+            for code in get_validation_codes(validators)
+            if code not in budget.skipped
+        ]
+        # Results of unexpected errors (exceptions or GDAL errors) may not happen again,
+        # the run is not cached.
+        if cache is not None and not (
+            initial_gdal_errors or any(map(is_unexpected_error, results))
+        ):
+            cache.put(
+                cache_key,
+                {
+                    "results": results,
+                    "validations_executed": validations_executed,
+                    "success": success,
+                    "details": details or {},
+                },
+            )
+        # Not part of the cached details, they only describe this run.
+        if details is not None and table_cache is not None:
+            details.update(table_cache.details())
+        if details is not None and validator_timings is not None:
+            details["timings"] = validator_timings.validators
+        return results, validations_executed, success
+
+
+def report_cached_results(
+    results: List[Dict],
+    validations_executed: List[str],
+    on_result: Callable[[str, List[Dict], bool], None],
+) -> None:
+    """Call on_result for every executed validation with its results from the cache."""
+    for validation_code in validations_executed:
+        code_results = [
+            result for result in results if result["validation_code"] == validation_code
+        ]
+        on_result(
+            validation_code,
+            code_results,
+            all(
+                result["level"] == VALIDATION_LEVELS[ValidationLevel.RECOMMENDATION]
+                for result in code_results
+            ),
+        )
 
-    validation_results = []
-    success = not initial_gdal_errors
 
-    for validator in validators:
-        validation_error = False
+class ViolationBudget(object):
+    """
+    Keeps track of the violations reported during a run. Once max_violations are reported,
+    or with fail_fast after the first failing requirement, the remaining validators are
+    skipped and the report is truncated. The violations of recommendations do not use up
+    the budget of the requirements: a requirement is only skipped once the requirements
+    reported max_violations, so a run never passes because a requirement was skipped.
+    """
+
+    def __init__(self, max_violations=None, fail_fast=False):
+        if fail_fast and max_violations is None:
+            max_violations = 1
+        self.max_violations = max_violations
+        self.fail_fast = fail_fast
+        self.violations = 0
+        self.requirement_violations = 0
+        self.failed = False
+        self.truncated = False
+        self.skipped: List[str] = []
+
+    def remaining(self, level: ValidationLevel = ValidationLevel.RECOMMENDATION):
+        """The violations a validator of the level can still report."""
+        if self.max_violations is None:
+            return None
+        if level == ValidationLevel.ERROR:
+            return max(0, self.max_violations - self.requirement_violations)
+        return max(0, self.max_violations - self.violations)
+
+    def skip(self, validator) -> bool:
+        """Whether the validator is skipped, the skipped validation codes are kept."""
+        skip = self.remaining(validator.level) == 0 or (
+            self.fail_fast and self.failed and validator.level == ValidationLevel.ERROR
+        )
+        if skip:
+            self.skipped.append(validator.validation_code)
+            self.truncated = True
+        return skip
+
+    def record(
+        self,
+        results: List[Dict],
+        success: bool,
+        truncated: bool,
+        level: ValidationLevel = ValidationLevel.ERROR,
+    ) -> List[Dict]:
+        """Counts the results of a validator, returns them cut off at max_violations."""
+        self.failed = self.failed or not success
+        self.truncated = self.truncated or truncated
+        if self.max_violations is None:
+            return results
+        recorded = []
+        for result in results:
+            remaining = self.remaining(level)
+            if remaining == 0:
+                self.truncated = True
+                break
+            if len(result["locations"]) > remaining:
+                result["locations"] = result["locations"][:remaining]
+                self.truncated = True
+            self.violations += len(result["locations"])
+            if level == ValidationLevel.ERROR:
+                self.requirement_violations += len(result["locations"])
+            recorded.append(result)
+        return recorded
+
+
+def run_validator(
+    validator, dataset, errHandler, **kwargs
+) -> Tuple[List[Dict], bool, List[str], bool]:
+    """Run a single validator and collect its results, success and the GDAL traces it caused.
+
+    GDAL warnings are not attributed to a validator, they are returned so the caller can
+    report them all together. The last value tells whether the validator stopped at
+    max_violations.
+    """
+    validation_results = []
+    validation_error = False
+    success = True
+    truncated = False
+    timings: Optional[Timings] = kwargs.get("timings")
+    timing = (
+        timings.validator(validator.validation_code)
+        if timings is not None
+        else nullcontext()
+    )
+    with timing:
         try:
-            result = validator(dataset, table_definitions=table_definitions).validate()
+            validator_instance = validator(dataset, **kwargs)
+            result = validator_instance.validate()
+            truncated = validator_instance.truncated
 
             if result is not None:
                 validation_results.append(result)
                 validation_error = True
-                success = success and validator.level == ValidationLevel.RECOMMENDATION
+                success = validator.level == ValidationLevel.RECOMMENDATION
         except Exception:
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            trace = [
-                t.strip("\n")
-                for t in traceback.format_exception(exc_type, exc_value, exc_traceback)
-            ]
+            validation_results.append(format_exception_result(validator))
+            validation_error = True
+            success = False
+    current_gdal_error_traces = errHandler.gdal_error_traces.take().locations()
+    if current_gdal_error_traces:
+        success = False
+        if validation_error:
+            validation_results[-1]["locations"].extend(current_gdal_error_traces)
+        else:
             output = format_result(
                 validation_code="UNKNOWN_WARNINGS",
-                validation_description=f"No unexpected errors must occur for: RQ{validator.code} - {validator.__doc__}",
+                validation_description=f"{UNEXPECTED_ERRORS_DESCRIPTION}RQ{validator.code} -  {validator.__doc__}",
                 level=ValidationLevel.UNKNOWN_WARNING,
-                trace=trace,
+                trace=current_gdal_error_traces,
             )
             validation_results.append(output)
-            validation_error = True
-            success = False
-        current_gdal_error_traces = [
-            errHandler.gdal_error_traces.pop()
-            for _ in range(len(errHandler.gdal_error_traces))
+    warning_traces = errHandler.gdal_warning_traces.take()
+    return validation_results, success, warning_traces, truncated
+
+
+# Dataset, error handler and catalog of a pool worker, opened once per worker process.
+_worker_dataset = None
+_worker_error_handler = None
+_worker_catalog = None
+
+
+def _init_worker(gpkg_path, gdal_config_options):
+    global _worker_dataset, _worker_error_handler, _worker_catalog
+    for key, value in gdal_config_options.items():
+        gdal.SetConfigOption(key, value)
+    _worker_error_handler = GdalErrorHandler()
+    _worker_dataset = utils.open_dataset(gpkg_path, _worker_error_handler.handler)
+    _worker_catalog = Catalog(_worker_dataset) if _worker_dataset is not None else None
+    # Errors and warnings raised while opening are already reported by the main process.
+    _worker_error_handler.gdal_error_traces.clear()
+    _worker_error_handler.gdal_warning_traces.clear()
+
+
+def _run_validators_in_worker(validators, scan_options, cache, collect_timings, kwargs):
+    """
+    Runs the validators, returns their runs, the reused and rescanned tables and the
+    timings of the validators.
+    """
+    if _worker_dataset is None:
+        raise IOError("Could not open gpkg in validation worker")
+    table_cache = TableCache(cache, _worker_dataset) if cache is not None else None
+    timings = Timings() if collect_timings else None
+    with geometry_scan.GeometryScan(
+        _worker_dataset,
+        geometry_scan.requested_predicates(validators, kwargs.get("geometry_backend")),
+        table_cache=table_cache,
+        timings=timings,
+        catalog=_worker_catalog,
+        **scan_options,
+    ) as scan:
+        runs = [
+            run_validator(
+                validator,
+                _worker_dataset,
+                _worker_error_handler,
+                geometry_scan=scan,
+                table_cache=table_cache,
+                timings=timings,
+                catalog=_worker_catalog,
+                **kwargs,
+            )
+            for validator in validators
         ]
-        if current_gdal_error_traces:
-            success = False
-            if validation_error:
-                validation_results[-1]["locations"].extend(current_gdal_error_traces)
-            else:
-                output = format_result(
-                    validation_code="UNKNOWN_WARNINGS",
-                    validation_description=f"No unexpected errors must occur for: RQ{validator.code} -  {validator.__doc__}",
-                    level=ValidationLevel.UNKNOWN_WARNING,
-                    trace=current_gdal_error_traces,
-                )
-                validation_results.append(output)
-
-    if errHandler.gdal_warning_traces:
-        output = format_result(
-            validation_code="UNKNOWN_WARNINGS",
-            validation_description="It is recommended that these unexpected (GDAL) warnings are looked into.",
-            level=ValidationLevel.UNKNOWN_WARNING,
-            trace=errHandler.gdal_warning_traces,
-        )
-        validation_results.append(output)
-    return (
-        initial_gdal_errors + validation_results,
-        get_validation_codes(validators),
-        success,
+    reused, rescanned = [], []
+    if table_cache is not None:
+        reused, rescanned = sorted(table_cache.reused), sorted(table_cache.rescanned)
+    return runs, reused, rescanned, timings.validators if timings is not None else []
+
+
+def pool_tasks(validators, local_validators=()) -> List[List[int]]:
+    """
+    Group the validators (by index) into pool tasks. The validators answered from the
+    geometry scan share one task, so every geometry is still read only once. The
+    local_validators are left out, they run in this process.
+    """
+    indexes = [
+        index
+        for index, validator in enumerate(validators)
+        if validator not in local_validators
+    ]
+    scan_task = [
+        index
+        for index in indexes
+        if issubclass(validators[index], geometry_scan.GeometryScanValidator)
+    ]
+    tasks = [[index] for index in indexes if index not in set(scan_task)]
+    if scan_task:
+        # The scan is the longest task, so it is started first.
+        tasks.insert(0, scan_task)
+    return tasks
+
+
+def run_validators_in_pool(
+    gpkg_path,
+    validators,
+    jobs,
+    scan_options,
+    budget,
+    table_cache=None,
+    timings=None,
+    local_validators=(),
+    run_local_validator=None,
+    **kwargs,
+) -> Iterable[Tuple[object, Tuple[List[Dict], bool, List[str], bool]]]:
+    """
+    Run validators in a process pool, yielding (validator, run) in the order of validators.
+    Validators skipped by the budget are not yielded. The tables reused and rescanned by
+    the workers are merged into table_cache, the timings of the yielded validators are
+    added to timings. The local_validators are run with run_local_validator in this
+    process instead, while the pool works on the others.
+    """
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(gpkg_path, utils.gdal_config_options()),
+    ) as executor:
+        futures = {}
+        for task in pool_tasks(validators, local_validators):
+            future = executor.submit(
+                _run_validators_in_worker,
+                [validators[i] for i in task],
+                scan_options,
+                table_cache.cache if table_cache is not None else None,
+                timings is not None,
+                kwargs,
+            )
+            futures.update((index, (task, future)) for index in task)
+
+        runs = {}
+        validator_timings = {}
+        for index, validator in enumerate(validators):
+            if validator in local_validators:
+                if not budget.skip(validator):
+                    yield validator, run_local_validator(validator)
+                continue
+            task, future = futures[index]
+            if budget.skip(validator):
+                future.cancel()
+                runs.pop(index, None)
+                continue
+            if index not in runs:
+                try:
+                    task_runs, reused, rescanned, task_timings = future.result()
+                    runs.update(zip(task, task_runs))
+                    validator_timings.update(zip(task, task_timings))
+                    if table_cache is not None:
+                        table_cache.merge(reused, rescanned)
+                except Exception:
+                    runs.update(
+                        (
+                            i,
+                            (
+                                [format_exception_result(validators[i])],
+                                False,
+                                [],
+                                False,
+                            ),
+                        )
+                        for i in task
+                    )
+            if timings is not None and index in validator_timings:
+                timings.validators.append(validator_timings[index])
+            yield validator, runs.pop(index)
+
+
+def is_unexpected_error(result: Dict) -> bool:
+    """Whether the result reports an exception or GDAL errors of a validator."""
+    return result["validation_description"].startswith(UNEXPECTED_ERRORS_DESCRIPTION)
+
+
+def format_exception_result(validator) -> Dict:
+    """Format the exception that is currently handled as a result of the validator."""
+    exc_type, exc_value, exc_traceback = sys.exc_info()
+    trace = [
+        t.strip("\n")
+        for t in traceback.format_exception(exc_type, exc_value, exc_traceback)
+    ]
+    return format_result(
+        validation_code="UNKNOWN_WARNINGS",
+        validation_description=f"{UNEXPECTED_ERRORS_DESCRIPTION}RQ{validator.code} - {validator.__doc__}",
+        level=ValidationLevel.UNKNOWN_WARNING,
+        trace=trace,
     )
 
 
@@ -10,18 +10,10 @@ class AttributeNoGeometryValidator(validator.Validator):
     message = "Found geometry column in non-geometry table: '{table_name}', column: '{column_name}'"
 
     def check(self) -> List[str]:
-        query = """
-                SELECT gc.table_name, ggc.column_name
-                FROM gpkg_contents AS gc
-                         JOIN gpkg_geometry_columns AS ggc ON gc.table_name = ggc.table_name
-                WHERE gc.data_type = 'attributes';
-                """
-        attribute_table_with_geom_column = self.dataset.ExecuteSQL(query)
-        return (
-            [
-                self.message.format(table_name=attr[0], column_name=attr[1])
-                for attr in attribute_table_with_geom_column
-            ]
-            if attribute_table_with_geom_column
-            else []
-        )
+        return [
+            self.message.format(
+                table_name=column.table_name, column_name=column.column_name
+            )
+            for column in self.catalog.geometry_columns
+            if self.catalog.data_type(column.table_name) == "attributes"
+        ]
@@ -1,22 +1,18 @@
-from typing import Iterable, Tuple, List
+from typing import Iterable, Optional, Tuple, List
 
+from geopackage_validator.catalog import Catalog
 from geopackage_validator.constants import SNAKE_CASE_REGEX
 from geopackage_validator.validations import validator
-from geopackage_validator import utils
 
 
-def query_columnames(dataset) -> Iterable[Tuple[str, str]]:
-    tables = utils.dataset_geometry_tables(dataset)
+def query_columnames(
+    dataset, catalog: Optional[Catalog] = None
+) -> Iterable[Tuple[str, str]]:
+    catalog = catalog or Catalog(dataset)
 
-    for table, _, _ in tables:
-        columns = dataset.ExecuteSQL(
-            "PRAGMA TABLE_INFO('{table_name}');".format(table_name=table)
-        )
-
-        for _, column, *_ in columns:
-            yield table, column
-
-        dataset.ReleaseResultSet(columns)
+    for table, _, _ in catalog.geometry_tables:
+        for column in catalog.table_columns(table):
+            yield table, column.name
 
 
 class ColumnNameValidator(validator.Validator):
@@ -27,7 +23,7 @@ class ColumnNameValidator(validator.Validator):
     message = "Error found in table: {table_name}, column: {column_name}"
 
     def check(self) -> Iterable[str]:
-        column_names = query_columnames(self.dataset)
+        column_names = query_columnames(self.dataset, self.catalog)
         return self.check_columns(column_names)
 
     @classmethod
@@ -1,17 +1,12 @@
-from typing import Iterable
+from typing import Iterable, Optional
 
+from geopackage_validator.catalog import Catalog
 from geopackage_validator.validations import validator
 
 
-def query_db_views(dataset) -> Iterable[str]:
-    views = dataset.ExecuteSQL(
-        "SELECT name FROM `main`.sqlite_master where type = 'view';"
-    )
-
-    for view in views:
-        yield view[0]
-
-    dataset.ReleaseResultSet(views)
+def query_db_views(dataset, catalog: Optional[Catalog] = None) -> Iterable[str]:
+    catalog = catalog or Catalog(dataset)
+    yield from catalog.views
 
 
 class ViewsValidator(validator.Validator):
@@ -22,7 +17,7 @@ class ViewsValidator(validator.Validator):
     message = "Found view: {view}"
 
     def check(self) -> Iterable[str]:
-        views = query_db_views(self.dataset)
+        views = query_db_views(self.dataset, self.catalog)
         return self.db_views_check(views)
 
     @classmethod
@@ -1,40 +1,29 @@
-from typing import Iterable, Tuple, List
+from typing import Iterable, Optional, Tuple, List
 
+from geopackage_validator.catalog import Catalog
 from geopackage_validator.validations import validator
 
-from geopackage_validator import utils
 
-
-def query_feature_id(dataset) -> Iterable[Tuple[str, int]]:
-    tables = utils.dataset_geometry_tables(dataset)
+def query_feature_id(
+    dataset, catalog: Optional[Catalog] = None
+) -> Iterable[Tuple[str, int]]:
+    catalog = catalog or Catalog(dataset)
     # validates that there is a primary key with integer/int, mediumint, smallint & tinyint
-    query = """
-                SELECT '{table_name}' AS table_name, count(*) AS pk_present FROM pragma_table_info('{table_name}') 
-                    WHERE pk > 0 
-                    AND type LIKE '%INT%' 
-            """
-    for table, _, _ in tables:
-        validations = dataset.ExecuteSQL(query.format(table_name=table))
-        for table_name, count in validations:
-            yield table_name, count
-
-        dataset.ReleaseResultSet(validations)
-
+    for table, _, _ in catalog.geometry_tables:
+        yield table, sum(
+            1
+            for column in catalog.table_columns(table)
+            if column.pk > 0 and "INT" in (column.type or "").upper()
+        )
 
-def query_sequence_for_autoincrement(dataset) -> Iterable[Tuple[str, int]]:
-    tables = utils.dataset_geometry_tables(dataset)
-    query = """
-            SELECT '{table_name}' AS table_name, count(*) AS has_autoincrement
-            FROM sqlite_sequence
-            WHERE name = '{table_name}'
-            """
 
-    for table, _, _ in tables:
-        validations = dataset.ExecuteSQL(query.format(table_name=table))
-        for table_name, count in validations:
-            yield table, count
+def query_sequence_for_autoincrement(
+    dataset, catalog: Optional[Catalog] = None
+) -> Iterable[Tuple[str, int]]:
+    catalog = catalog or Catalog(dataset)
 
-        dataset.ReleaseResultSet(validations)
+    for table, _, _ in catalog.geometry_tables:
+        yield table, int(table in catalog.sqlite_sequence)
 
 
 class FeatureIdValidator(validator.Validator):
@@ -45,7 +34,7 @@ class FeatureIdValidator(validator.Validator):
     message = "Error found in table: {table_name}"
 
     def check(self) -> Iterable[str]:
-        feature_ids = query_feature_id(self.dataset)
+        feature_ids = query_feature_id(self.dataset, self.catalog)
         return self.check_feature_id(feature_ids)
 
     @classmethod
@@ -66,7 +55,7 @@ class FeatureIdAutoincrementValidator(validator.Validator):
     message = "Found in table: {table_name}"
 
     def check(self) -> Iterable[str]:
-        counts = query_sequence_for_autoincrement(self.dataset)
+        counts = query_sequence_for_autoincrement(self.dataset, self.catalog)
         return self.featureid_autoincrement_check(counts)
 
     @classmethod
@@ -1,7 +1,6 @@
 from typing import Iterable, Tuple
 
 from geopackage_validator.validations import validator
-from geopackage_validator import utils
 
 
 class GeomColumnNameValidator(validator.Validator):
@@ -12,7 +11,7 @@ class GeomColumnNameValidator(validator.Validator):
     message = "Found in table: {table_name}, column: {column_name}"
 
     def check(self) -> Iterable[str]:
-        columns = utils.dataset_geometry_tables(self.dataset)
+        columns = self.catalog.geometry_tables
         return self.geom_columnname_check(columns)
 
     @classmethod
@@ -32,7 +31,7 @@ class GeomColumnNameEqualValidator(validator.Validator):
     message = "Found column names are unequal: {column_names}"
 
     def check(self) -> Iterable[str]:
-        columns = utils.dataset_geometry_tables(self.dataset)
+        columns = self.catalog.geometry_tables
         return self.geom_equal_columnname_check(columns)
 
     @classmethod
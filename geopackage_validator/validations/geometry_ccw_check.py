@@ -1,40 +1,118 @@
-from typing import Iterable, Tuple
+from contextlib import closing
+from typing import Iterable, List, Optional, Set, Tuple
 
+from geopackage_validator.timings import Timings, table_timing
 from geopackage_validator.validations import validator
+from geopackage_validator.validations import geometry_scan
+from geopackage_validator import gpkg_binary
 
+# The condition with which the rows gpkg_binary can not decode are checked.
+SQL_NOT_CCW_CONDITION = """NOT ST_IsPolygonCCW("{column_name}")"""
 
-def query_ccw(dataset) -> Iterable[Tuple[str, str]]:
-    columns = dataset.ExecuteSQL(
-        "SELECT table_name, column_name FROM gpkg_geometry_columns "
-        "  WHERE geometry_type_name in ('POLYGON', 'MULTIPOLYGON');"
-    )
+# The geometry types spatialite checks the rings of, it can not read the others.
+CHECKED_GEOMETRY_TYPES = (
+    gpkg_binary.POLYGON,
+    gpkg_binary.MULTIPOLYGON,
+    gpkg_binary.GEOMETRYCOLLECTION,
+)
+
+
+def scan_ccw(scan) -> Iterable[Tuple[str, str]]:
+    for table in scan.tables():
+        table_name, _, geometry_type_name = table
+        if geometry_type_name not in geometry_scan.POLYGON_TYPES:
+            continue
+        for not_ccw, count, row_id in scan.aggregate(table, "not_ccw"):
+            if not_ccw and count > 0:
+                yield table_name, row_id, count
 
-    for table_name, column_name in columns:
-        sql = (
-            f'SELECT cast(rowid AS INTEGER) AS row_id, count("{column_name}") as amount '
-            f'FROM "{table_name}" WHERE NOT ST_IsPolygonCCW("{column_name}");'
-        )
-        validations = dataset.ExecuteSQL(sql)
 
-        if validations is not None:
-            for (row_id, count) in validations:
-                if count > 0:
-                    yield table_name, row_id, count
+def geometry_ccw(geometry: gpkg_binary.Geometry) -> bool:
+    """
+    Whether all exterior rings of the geometry are counter-clockwise and all its interior
+    rings clockwise, like ST_IsPolygonCCW: a ring without area counts as counter-clockwise.
+    """
+    stride = 2 + geometry.has_z + geometry.has_m
+    for rings in geometry.polygons:
+        for index, (first, count) in enumerate(rings):
+            area = gpkg_binary.ring_area(geometry.coordinates, stride, first, count)
+            if (area >= 0.0) != (index == 0):
+                return False
+    return True
 
-        dataset.ReleaseResultSet(validations)
-    dataset.ReleaseResultSet(columns)
 
+def native_ccw(
+    dataset,
+    gpkg_path: str,
+    tables: List[Tuple[str, str, str]],
+    max_violations: Optional[int] = None,
+    timings: Optional[Timings] = None,
+) -> Tuple[List[Tuple[str, int, int]], Set[str]]:
+    """
+    The results of scan_ccw from the ring orientations of the geometries decoded by
+    gpkg_binary. The geometries it can not decode are checked with spatialite. Returns the
+    results and the tables of which the check stopped at max_violations.
+    """
+    results = []
+    truncated_tables = set()
+    with closing(gpkg_binary.readonly_connection(gpkg_path)) as connection:
+        for table_name, column_name, geometry_type_name in tables:
+            if geometry_type_name not in geometry_scan.POLYGON_TYPES:
+                continue
+            row_ids = []
+            with table_timing(timings, table_name) as counts:
+                counts["rows_scanned"] = 0
+                for batch in gpkg_binary.iter_batches(
+                    connection, table_name, column_name
+                ):
+                    counts["rows_scanned"] += len(batch)
+                    row_ids.extend(
+                        row_id
+                        for row_id, geometry_type, geometry in zip(
+                            batch.row_ids, batch.geometry_types, batch.geometries
+                        )
+                        if geometry_type in CHECKED_GEOMETRY_TYPES
+                        and not geometry_ccw(geometry)
+                    )
+                    row_ids.extend(
+                        geometry_scan.matching_rows(
+                            dataset,
+                            table_name,
+                            column_name,
+                            SQL_NOT_CCW_CONDITION,
+                            [row_id for row_id, _ in batch.errors],
+                        )
+                    )
+                    if max_violations is not None and len(row_ids) > max_violations:
+                        row_ids = sorted(row_ids)[:max_violations]
+                        truncated_tables.add(table_name)
+                        break
+            if row_ids:
+                results.append((table_name, min(row_ids), len(row_ids)))
+    return results, truncated_tables
 
-class PolygonWindingOrderValidator(validator.Validator):
+
+class PolygonWindingOrderValidator(geometry_scan.GeometryScanValidator):
     """It is recommended that all (MULTI)POLYGON geometries have a counter-clockwise orientation for their exterior ring, and a clockwise direction for all interior rings."""
 
     code = 20
     level = validator.ValidationLevel.RECOMMENDATION
+    scan_predicates = (geometry_scan.CCW,)
+    native_predicates = (geometry_scan.CCW,)
     message = "Warning layer: {layer}, example id: {row_id}, has {count} features that do not have a counter-clockwise exterior ring and/or a clockwise interior ring."
 
     def check(self) -> Iterable[str]:
-        result = query_ccw(self.dataset)
-        return [
+        if self.native_gpkg_path is not None:
+            result, self.native_truncated_tables = native_ccw(
+                self.dataset,
+                self.native_gpkg_path,
+                self.catalog.geometry_tables,
+                self.max_violations,
+                self.timings,
+            )
+        else:
+            result = scan_ccw(self.geometry_scan)
+        return (
             self.message.format(layer=layer_name, row_id=row_id, count=count)
             for layer_name, row_id, count in result
-        ]
+        )
@@ -1,62 +1,97 @@
-from typing import Iterable, Tuple
+from contextlib import closing
+from math import isnan
+from typing import Iterable, List, Optional, Set, Tuple
 
+from geopackage_validator.timings import Timings, table_timing
 from geopackage_validator.validations import validator
-from geopackage_validator import utils
+from geopackage_validator.validations import geometry_scan
+from geopackage_validator import gpkg_binary
 
 
-DIMENSION_QUERY = """
-SELECT DISTINCT
-    (ST_MinZ("{geom_column_name}") == 0 AND ST_MaxZ("{geom_column_name}") == 0) as z_check,
-    (ST_MinM("{geom_column_name}") IS NOT NULL AND
-     ST_MinM("{geom_column_name}") == 0 AND ST_MaxM("{geom_column_name}") == 0) as m_check,
-     st_ndims("{geom_column_name}") as ndims
-FROM "{table_name}" where st_ndims("{geom_column_name}") > 2;
-"""
-
 MEASUREMENT_COORDINATE_MESSAGE = "a measurement (M) dimension that are all 0."
 ELEVATION_COORDINATE_MESSAGE = "an elevation (Z) dimension that are all 0."
 MULTI_DIMENSION_MESSAGE = "more than two dimensions."
 
 
-def query_dimensions(dataset) -> Iterable[Tuple[str, str]]:
-    tables = utils.dataset_geometry_tables(dataset)
+def scan_dimensions(scan) -> Iterable[Tuple[str, str]]:
+    for table in scan.tables():
+        validation_list = [
+            (z, m, ndims)
+            for z, m, ndims in scan.distinct(table, ("z_check", "m_check", "ndims"))
+            if ndims is not None and ndims > 2
+        ]
+        yield from dimension_messages(table[0], validation_list)
 
-    for table_name, column_name, _ in tables:
-        validations = dataset.ExecuteSQL(
-            DIMENSION_QUERY.format(table_name=table_name, geom_column_name=column_name)
-        )
-        validation_list = (
-            []
-            if validations is None
-            else [(z, m, ndims) for z, m, ndims in validations]
-        )
 
-        if validation_list:
-            four_dimensions = all(ndims == 4 for z, m, ndims in validation_list)
-            m_coordinates_all_0 = all(m for z, m, ndims in validation_list)
-            z_coordinates_all_0 = all(z for z, m, ndims in validation_list)
-            if len(validation_list):
-                yield table_name, MULTI_DIMENSION_MESSAGE
-            if four_dimensions and m_coordinates_all_0:
-                yield table_name, MEASUREMENT_COORDINATE_MESSAGE
-            if z_coordinates_all_0:
-                if not m_coordinates_all_0 and four_dimensions:
-                    continue
-                yield table_name, ELEVATION_COORDINATE_MESSAGE
+def batch_dimensions(batch: gpkg_binary.GeometryBatch) -> Set[Tuple[int, int, int]]:
+    """The distinct (z_check, m_check, ndims) of the geometries of the batch with more than two dimensions."""
+    dimensions = set()
+    for ndims, z_min, z_max, m_min, m_max in zip(
+        batch.ndims, batch.z_min, batch.z_max, batch.m_min, batch.m_max
+    ):
+        if ndims <= 2:
+            continue
+        # Like ST_MinZ and ST_MinM, the range is NULL (NaN) without Z or M values.
+        z_check = None if isnan(z_min) else int(z_min == 0 and z_max == 0)
+        m_check = int(not isnan(m_min) and m_min == 0 and m_max == 0)
+        dimensions.add((z_check, m_check, ndims))
+    return dimensions
+
 
-        dataset.ReleaseResultSet(validations)
+def native_dimensions(
+    gpkg_path: str,
+    tables: List[Tuple[str, str, str]],
+    timings: Optional[Timings] = None,
+) -> Iterable[Tuple[str, str]]:
+    """The dimension messages, from the geometries decoded by gpkg_binary."""
+    with closing(gpkg_binary.readonly_connection(gpkg_path)) as connection:
+        for table_name, column_name, _ in tables:
+            validation_list = set()
+            with table_timing(timings, table_name) as counts:
+                counts["rows_scanned"] = 0
+                for batch in gpkg_binary.iter_batches(
+                    connection, table_name, column_name
+                ):
+                    validation_list.update(batch_dimensions(batch))
+                    counts["rows_scanned"] += len(batch)
+            yield from dimension_messages(table_name, list(validation_list))
 
 
-class GeometryDimensionValidator(validator.Validator):
+def dimension_messages(
+    table_name: str, validation_list: List[Tuple[int, int, int]]
+) -> Iterable[Tuple[str, str]]:
+    """Messages for the distinct (z_check, m_check, ndims) of the geometries with more than two dimensions."""
+    if not validation_list:
+        return
+    four_dimensions = all(ndims == 4 for z, m, ndims in validation_list)
+    m_coordinates_all_0 = all(m for z, m, ndims in validation_list)
+    z_coordinates_all_0 = all(z for z, m, ndims in validation_list)
+    yield table_name, MULTI_DIMENSION_MESSAGE
+    if four_dimensions and m_coordinates_all_0:
+        yield table_name, MEASUREMENT_COORDINATE_MESSAGE
+    if z_coordinates_all_0:
+        if not m_coordinates_all_0 and four_dimensions:
+            return
+        yield table_name, ELEVATION_COORDINATE_MESSAGE
+
+
+class GeometryDimensionValidator(geometry_scan.GeometryScanValidator):
     """It is recommended to only use multidimensional geometry coordinates (elevation and measurement) when necessary."""
 
     code = 19
     level = validator.ValidationLevel.RECOMMENDATION
+    scan_predicates = (geometry_scan.DIMENSION,)
+    native_predicates = (geometry_scan.DIMENSION,)
     message = "Table: {table}, has features with {message}"
 
     def check(self) -> Iterable[str]:
-        query_result = query_dimensions(self.dataset)
-        return [
+        if self.native_gpkg_path is not None:
+            query_result = native_dimensions(
+                self.native_gpkg_path, self.catalog.geometry_tables, self.timings
+            )
+        else:
+            query_result = scan_dimensions(self.geometry_scan)
+        return (
             self.message.format(table=table_name, message=message)
             for table_name, message in query_result
-        ]
+        )
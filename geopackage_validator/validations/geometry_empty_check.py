@@ -1,47 +1,103 @@
-from typing import Iterable, Tuple
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from geopackage_validator.timings import Timings, table_timing
 from geopackage_validator.validations import validator
-from geopackage_validator import utils
-
-SQL_EMPTY_TEMPLATE = """SELECT type, count(type) AS count, row_id
-FROM(
-    SELECT
-        CASE
-            WHEN ST_IsEmpty("{column_name}") = 1
-                THEN 'empty'
-            WHEN "{column_name}" IS NULL
-                THEN 'null'
-        END AS type,
-        cast(rowid AS INTEGER) AS row_id
-    FROM "{table_name}" WHERE ST_IsEmpty("{column_name}") = 1 OR "{column_name}" IS NULL
-)
-GROUP BY type;"""
-
-
-def query_geometry_empty(
-    dataset, sql_template
-) -> Iterable[Tuple[str, str, str, int, int]]:
-    columns = utils.dataset_geometry_tables(dataset)
-
-    for table_name, column_name, _ in columns:
-        validations = dataset.ExecuteSQL(
-            sql_template.format(table_name=table_name, column_name=column_name)
-        )
-        for type, count, row_id in validations:
+from geopackage_validator.validations import geometry_scan
+from geopackage_validator import gpkg_binary
+
+# The condition with which the rows the geometry header can not classify are checked.
+SQL_EMPTY_CONDITION = """ST_IsEmpty("{column_name}") = 1"""
+
+
+def scan_geometry_empty(scan) -> Iterable[Tuple[str, str, str, int, int]]:
+    for table in scan.tables():
+        table_name, column_name, _ = table
+        for type, count, row_id in scan.aggregate(table, "empty_type"):
             yield table_name, column_name, type, count, row_id
-        dataset.ReleaseResultSet(validations)
 
 
-class EmptyGeometryValidator(validator.Validator):
+def native_geometry_empty(
+    dataset,
+    gpkg_path: str,
+    tables: List[Tuple[str, str, str]],
+    max_violations: Optional[int] = None,
+    timings: Optional[Timings] = None,
+) -> Tuple[List[Tuple[str, str, str, int, int]], Set[str]]:
+    """
+    The results of scan_geometry_empty from the headers of the geometries, read by
+    gpkg_binary.iter_prefixes. The geometries the header can not classify are checked
+    with spatialite. Returns the results and the tables of which the scan stopped at
+    max_violations.
+    """
+    results = []
+    truncated_tables = set()
+    with closing(gpkg_binary.readonly_connection(gpkg_path)) as connection:
+        for table_name, column_name, _ in tables:
+            counts: Dict[str, int] = {}
+            row_ids: Dict[str, int] = {}
+            undecided = []
+
+            def add(type, row_id):
+                if (
+                    max_violations is not None
+                    and sum(counts.values()) >= max_violations
+                ):
+                    # A violation past max_violations: the counts are partial.
+                    truncated_tables.add(table_name)
+                    return
+                counts[type] = counts.get(type, 0) + 1
+                row_ids[type] = min(row_ids.get(type, row_id), row_id)
+
+            with table_timing(timings, table_name) as timing_counts:
+                timing_counts["rows_scanned"] = 0
+                for row_id, prefix in gpkg_binary.iter_prefixes(
+                    connection, table_name, column_name
+                ):
+                    timing_counts["rows_scanned"] += 1
+                    if prefix is None:
+                        add("null", row_id)
+                    else:
+                        empty = gpkg_binary.prefix_empty(prefix)
+                        if empty is None:
+                            undecided.append(row_id)
+                        elif empty:
+                            add("empty", row_id)
+                    if table_name in truncated_tables:
+                        break
+                for row_id in geometry_scan.matching_rows(
+                    dataset, table_name, column_name, SQL_EMPTY_CONDITION, undecided
+                ):
+                    add("empty", row_id)
+            results.extend(
+                (table_name, column_name, type, counts[type], row_ids[type])
+                for type in sorted(counts)
+            )
+    return results, truncated_tables
+
+
+class EmptyGeometryValidator(geometry_scan.GeometryScanValidator):
     """Geometries should not be null or empty."""
 
     code = 24
     level = validator.ValidationLevel.ERROR
+    scan_predicates = (geometry_scan.EMPTY,)
+    native_predicates = (geometry_scan.EMPTY,)
     message = "Found {type} geometry in table: {table_name}, column {column_name}, {count} {count_label}, example id {row_id}"
 
     def check(self) -> Iterable[str]:
-        result = query_geometry_empty(self.dataset, SQL_EMPTY_TEMPLATE)
+        if self.native_gpkg_path is not None:
+            result, self.native_truncated_tables = native_geometry_empty(
+                self.dataset,
+                self.native_gpkg_path,
+                self.catalog.geometry_tables,
+                self.max_violations,
+                self.timings,
+            )
+        else:
+            result = scan_geometry_empty(self.geometry_scan)
 
-        return [
+        return (
             self.message.format(
                 table_name=table_name,
                 column_name=column_name,
@@ -52,4 +108,4 @@ class EmptyGeometryValidator(validator.Validator):
             )
             for table_name, column_name, type, count, row_id in result
             if count > 0
-        ]
+        )
@@ -0,0 +1,660 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from osgeo import gdal
+
+from geopackage_validator.cache import TableCache
+from geopackage_validator.catalog import Catalog
+from geopackage_validator import gpkg_binary
+from geopackage_validator.timings import Timings, table_timing
+from geopackage_validator.validations import validator
+from geopackage_validator import utils
+
+VALID = "valid"
+EMPTY = "empty"
+GEOMETRY_TYPE = "geometry_type"
+DIMENSION = "dimension"
+CCW = "ccw"
+
+ALL_PREDICATES = (VALID, EMPTY, GEOMETRY_TYPE, DIMENSION, CCW)
+
+POLYGON_TYPES = ("POLYGON", "MULTIPOLYGON")
+
+# How the geometry validations read the geometries: with spatialite functions in SQL, or
+# by decoding the GeoPackage binary geometries in Python (local files only).
+SPATIALITE = "spatialite"
+NATIVE = "native"
+
+SHARD_BY_ROWS = "rows"
+SHARD_BY_BYTES = "bytes"
+
+# Tables with fewer rows are not worth splitting over worker processes.
+SHARD_MIN_ROWS = 1_000_000
+
+# Per predicate the columns evaluated for every row, {column_name} is the geometry column.
+# They are computed from the row values of ROW_VALUES, which the VALID columns use.
+PREDICATE_COLUMNS = {
+    VALID: [
+        (
+            "invalid_reason",
+            """CASE INSTR(validity, '[')
+            WHEN 0
+                THEN validity
+            ELSE substr(validity, 0, INSTR(validity, '['))
+        END""",
+        ),
+    ],
+    EMPTY: [
+        (
+            "empty_type",
+            """CASE
+            WHEN ST_IsEmpty("{column_name}") = 1
+                THEN 'empty'
+            WHEN "{column_name}" IS NULL
+                THEN 'null'
+        END""",
+        ),
+    ],
+    GEOMETRY_TYPE: [
+        (
+            "geometry_type",
+            # ST_GeometryType is NULL for a geometry without points, lines or polygons,
+            # only then the geometry is converted to WKT to detect an empty collection.
+            """coalesce(
+            ST_GEOMETRYTYPE("{column_name}"),
+            CASE ST_AsText("{column_name}")
+                WHEN 'GEOMETRYCOLLECTION()'
+                    THEN 'GEOMETRYCOLLECTION'
+            END
+        )""",
+        ),
+    ],
+    DIMENSION: [
+        (
+            "z_check",
+            """(ST_MinZ("{column_name}") == 0 AND ST_MaxZ("{column_name}") == 0)""",
+        ),
+        (
+            "m_check",
+            """(ST_MinM("{column_name}") IS NOT NULL AND
+            ST_MinM("{column_name}") == 0 AND ST_MaxM("{column_name}") == 0)""",
+        ),
+        ("ndims", """st_ndims("{column_name}")"""),
+    ],
+    CCW: [
+        ("not_ccw", """NOT ST_IsPolygonCCW("{column_name}")"""),
+    ],
+}
+
+# The validity of a row: the GEOS reason when invalid, else the first of the other checks
+# that fails. Each function is evaluated at most once per row, only when the checks
+# before it passed.
+SQL_VALIDITY_TEMPLATE = """CASE ST_IsValid("{column_name}")
+            WHEN 0
+                THEN ST_IsValidReason("{column_name}")
+            ELSE {checks}
+        END"""
+
+SQL_NOT_SIMPLE = """WHEN ST_IsSimple("{column_name}") = 0
+                    THEN 'Not Simple'"""
+
+SQL_NOT_GPB = """WHEN IsValidGPB("{column_name}") = 0 AND ST_IsEmpty("{column_name}") = 0
+                    THEN 'Not GeoPackage geometry'"""
+
+# Geometry types that are simple whenever GEOS considers them valid. GEOS is still asked
+# about points, which are invalid with a NaN or infinite coordinate.
+SIMPLE_WHEN_VALID_TYPES = ("POINT",) + POLYGON_TYPES
+
+# The type of the geometry of a row, without the Z and M suffixes of ST_GeometryType.
+# It is NULL for a geometry spatialite can not read, which gets all checks.
+SQL_ROW_GEOMETRY_TYPE = """rtrim(ST_GeometryType("{column_name}"), ' XYZM')"""
+
+SQL_VALIDITY_PER_TYPE_TEMPLATE = """CASE {row_geometry_type}
+            {types}
+            ELSE {checks}
+        END"""
+
+
+def type_validity_checks(geometry_type_name: Optional[str]) -> str:
+    """The validity check of a geometry of the type, None for any other type."""
+    checks = [SQL_NOT_GPB]
+    if geometry_type_name not in SIMPLE_WHEN_VALID_TYPES:
+        checks.insert(0, SQL_NOT_SIMPLE)
+    checks = "CASE\n                {}\n            END".format(
+        "\n                ".join(checks)
+    )
+    return SQL_VALIDITY_TEMPLATE.format(column_name="{column_name}", checks=checks)
+
+
+def validity_expression() -> str:
+    """
+    The validity check of a row. The simplicity check that can not fail is skipped by
+    the type of the geometry of the row itself, not the declared type of the table,
+    which the geometries do not have to match.
+    """
+    return SQL_VALIDITY_PER_TYPE_TEMPLATE.format(
+        row_geometry_type=SQL_ROW_GEOMETRY_TYPE,
+        types="\n            ".join(
+            f"WHEN '{geometry_type_name}' THEN {type_validity_checks(geometry_type_name)}"
+            for geometry_type_name in SIMPLE_WHEN_VALID_TYPES
+        ),
+        checks=type_validity_checks(None),
+    )
+
+
+# Per predicate the values evaluated once per row in a subquery, for the expensive
+# functions that more than one of its columns or expressions need.
+def row_values(predicate: str) -> List[Tuple[str, str]]:
+    if predicate == VALID:
+        return [("validity", validity_expression())]
+    return []
+
+
+# Per predicate the condition on its columns under which a row violates it.
+PREDICATE_VIOLATIONS = {
+    VALID: "invalid_reason IS NOT NULL",
+    EMPTY: "empty_type IS NOT NULL",
+    GEOMETRY_TYPE: "geometry_type != '{geometry_type_name}'",
+    DIMENSION: "ndims > 2",
+    CCW: "not_ccw = 1",
+}
+
+# The LIMIT -1 keeps SQLite from flattening the subqueries into the aggregate, so every
+# expression is evaluated once per row.
+SQL_ROWS_TEMPLATE = """SELECT
+            "{column_name}",{row_values}
+            cast(rowid AS INTEGER) AS row_id
+        FROM "{table_name}"
+        {row_filter}
+        LIMIT -1"""
+
+SQL_SCAN_TEMPLATE = """SELECT {group_columns}, count(*) AS count, min(row_id) AS row_id
+FROM(
+    SELECT
+        {row_columns},
+        row_id
+    FROM(
+        {rows}
+    )
+    LIMIT -1
+)
+GROUP BY {group_columns};"""
+
+# Only the first {rows_limit} rows that violate the predicates are grouped, so the table
+# scan stops as soon as that many are found. last_row_id tells which group holds the last.
+SQL_LIMITED_SCAN_TEMPLATE = """SELECT {group_columns}, count(*) AS count, min(row_id) AS row_id,
+    max(row_id) AS last_row_id
+FROM(
+    SELECT * FROM(
+        SELECT
+            {row_columns},
+            row_id
+        FROM(
+            {rows}
+        )
+        LIMIT -1
+    )
+    WHERE {violation_filter}
+    LIMIT {rows_limit}
+)
+GROUP BY {group_columns};"""
+
+# A spatialite expression for a list of row ids. Native checks use it for the geometries
+# they can not decide themselves.
+SQL_ROW_VALUES_TEMPLATE = """SELECT cast(rowid AS INTEGER), {expression} FROM "{table_name}"
+WHERE rowid IN ({row_ids});"""
+
+ROW_VALUES_CHUNK_SIZE = 500
+
+SQL_ROWID_SPAN_TEMPLATE = """SELECT max(rowid) - min(rowid) + 1 FROM "{table_name}";"""
+
+SQL_RANGES_BY_ROWS_TEMPLATE = """SELECT min(row_id), max(row_id)
+FROM(
+    SELECT
+        cast(rowid AS INTEGER) AS row_id,
+        ntile({shards}) OVER (ORDER BY rowid) AS shard
+    FROM "{table_name}"
+)
+GROUP BY shard
+ORDER BY shard;"""
+
+SQL_RANGES_BY_BYTES_TEMPLATE = """SELECT min(row_id), max(row_id)
+FROM(
+    SELECT
+        cast(rowid AS INTEGER) AS row_id,
+        sum(coalesce(length("{column_name}"), 0)) OVER (ORDER BY rowid) * {shards}
+            / ((SELECT coalesce(sum(length("{column_name}")), 0) FROM "{table_name}") + 1) AS shard
+    FROM "{table_name}"
+)
+GROUP BY shard
+ORDER BY shard;"""
+
+
+def scan_columns(
+    predicates: Iterable[str], column_name: str, geometry_type_name: str
+) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """The row values and the columns computed from them of the predicates for a table."""
+    values, columns = [], []
+    for predicate in predicates:
+        for name, expression in row_values(predicate):
+            values.append((name, expression.format(column_name=column_name)))
+        for name, expression in PREDICATE_COLUMNS[predicate]:
+            if predicate == CCW and geometry_type_name not in POLYGON_TYPES:
+                # The winding order is only checked for (MULTI)POLYGON tables.
+                expression = "NULL"
+            columns.append((name, expression.format(column_name=column_name)))
+    return values, columns
+
+
+def scan_sql(
+    predicates: Iterable[str],
+    table_name: str,
+    column_name: str,
+    geometry_type_name: str,
+    rowid_range: Optional[Tuple[int, int]] = None,
+    limit: Optional[int] = None,
+) -> Tuple[str, List[str]]:
+    """
+    Returns the scan query of a table and the names of its group columns. With limit only
+    the first limit rows that violate one of the predicates are grouped.
+    """
+    values, columns = scan_columns(predicates, column_name, geometry_type_name)
+    names = [name for name, _ in columns]
+    group_columns = ", ".join(names)
+    row_columns = ",\n        ".join(
+        f"{expression} AS {name}" for name, expression in columns
+    )
+    row_filter = ""
+    if rowid_range is not None:
+        row_filter = "WHERE rowid BETWEEN {} AND {}".format(*rowid_range)
+    rows = SQL_ROWS_TEMPLATE.format(
+        table_name=table_name,
+        column_name=column_name,
+        row_values="".join(
+            f"\n            {expression} AS {name}," for name, expression in values
+        ),
+        row_filter=row_filter,
+    )
+    if limit is not None:
+        sql = SQL_LIMITED_SCAN_TEMPLATE.format(
+            group_columns=group_columns,
+            row_columns=row_columns,
+            rows=rows,
+            violation_filter=" OR ".join(
+                "({})".format(
+                    PREDICATE_VIOLATIONS[predicate].format(
+                        geometry_type_name=geometry_type_name
+                    )
+                )
+                for predicate in predicates
+            ),
+            rows_limit=limit,
+        )
+        return sql, names
+    sql = SQL_SCAN_TEMPLATE.format(
+        group_columns=group_columns, row_columns=row_columns, rows=rows
+    )
+    return sql, names
+
+
+def execute_scan(dataset, sql: str, names: List[str]) -> List[Dict[str, object]]:
+    result = dataset.ExecuteSQL(sql)
+    groups = []
+    if result is not None:
+        for values in result:
+            # A limited scan also gives the last row id of the group.
+            groups.append(dict(zip(names + ["count", "row_id", "last_row_id"], values)))
+    dataset.ReleaseResultSet(result)
+    return groups
+
+
+def merge_groups(
+    names: List[str], shard_groups: Iterable[List[Dict[str, object]]]
+) -> List[Dict[str, object]]:
+    """Merge the groups of rowid ranges into the groups a single query over the table gives."""
+    merged: Dict[Tuple[object, ...], Dict[str, object]] = {}
+    for groups in shard_groups:
+        for group in groups:
+            key = tuple(group[name] for name in names)
+            if key not in merged:
+                merged[key] = dict(group)
+                continue
+            merged[key]["count"] += group["count"]
+            merged[key]["row_id"] = min(merged[key]["row_id"], group["row_id"])
+    return list(merged.values())
+
+
+def rowid_ranges(
+    dataset,
+    table_name: str,
+    column_name: str,
+    shards: int,
+    shard_by: str = SHARD_BY_ROWS,
+) -> List[Tuple[int, int]]:
+    """Split a table in consecutive rowid ranges with about the same number of rows or geometry bytes."""
+    template = (
+        SQL_RANGES_BY_BYTES_TEMPLATE
+        if shard_by == SHARD_BY_BYTES
+        else SQL_RANGES_BY_ROWS_TEMPLATE
+    )
+    result = dataset.ExecuteSQL(
+        template.format(table_name=table_name, column_name=column_name, shards=shards)
+    )
+    ranges = [(first, last) for first, last in result if first is not None]
+    dataset.ReleaseResultSet(result)
+    return ranges
+
+
+# Datasets and GDAL error traces of a shard worker, opened once per worker process.
+_shard_datasets = {}
+_shard_error_traces: List[str] = []
+
+
+def _init_shard_worker(gdal_config_options):
+    for key, value in gdal_config_options.items():
+        gdal.SetConfigOption(key, value)
+
+
+def _shard_error_handler(err_level, err_no, err_msg):
+    if err_level != gdal.CE_Warning:
+        _shard_error_traces.append(err_msg.replace("\n", " "))
+
+
+def _scan_shard(
+    gpkg_path: str, sql: str, names: List[str]
+) -> Tuple[List[Dict[str, object]], List[str]]:
+    if gpkg_path not in _shard_datasets:
+        _shard_datasets[gpkg_path] = utils.open_dataset(gpkg_path, _shard_error_handler)
+    dataset = _shard_datasets[gpkg_path]
+    if dataset is None:
+        raise IOError(f"Could not open gpkg {gpkg_path} in scan worker")
+    _shard_error_traces.clear()
+    groups = execute_scan(dataset, sql, names)
+    return groups, _shard_error_traces.copy()
+
+
+class GeometryScan:
+    """
+    Reads every geometry column once and evaluates all requested per-geometry predicates
+    together. Per table the rows are grouped by the outcome of all predicates, so each
+    validation can aggregate its own result from a handful of groups.
+
+    With jobs > 1 tables of at least SHARD_MIN_ROWS rows are split in rowid ranges that
+    are scanned in parallel worker processes, one pool of jobs workers for all tables
+    which is shut down by close. With max_violations every predicate is scanned on its own
+    and stops after that many violating rows, the (table_name, predicate) pairs with more
+    violations are kept in truncated.
+    """
+
+    def __init__(
+        self,
+        dataset,
+        predicates: Iterable[str] = ALL_PREDICATES,
+        jobs: int = 1,
+        shard_by: str = SHARD_BY_ROWS,
+        max_violations: Optional[int] = None,
+        table_cache: Optional[TableCache] = None,
+        timings: Optional[Timings] = None,
+        catalog: Optional[Catalog] = None,
+    ):
+        self.dataset = dataset
+        self.catalog = catalog or Catalog(dataset)
+        self.predicates = [p for p in ALL_PREDICATES if p in set(predicates)]
+        self.jobs = jobs
+        self.shard_by = shard_by
+        self.max_violations = max_violations
+        self.truncated: Set[Tuple[str, str]] = set()
+        self.table_cache = table_cache
+        self.timings = timings
+        self._groups: Dict[str, List[Dict[str, object]]] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def tables(self) -> List[Tuple[str, str, str]]:
+        return self.catalog.geometry_tables
+
+    def groups(self, table: Tuple[str, str, str]) -> List[Dict[str, object]]:
+        """The grouped predicate outcomes for a (table_name, column_name, geometry_type_name) table."""
+        table_name, column_name, geometry_type_name = table
+        if table_name in self._groups:
+            return self._groups[table_name]
+
+        with table_timing(self.timings, table_name) as counts:
+
+            def scan():
+                groups = self.scan_table(*table)
+                if self.max_violations is None:
+                    counts["rows_scanned"] = sum(group["count"] for group in groups)
+                return groups
+
+            if self.table_cache is not None and self.max_violations is None:
+                self._groups[table_name] = self.table_cache.get_or_compute(
+                    "geometry_scan:{}:{}".format(
+                        ",".join(self.predicates), geometry_type_name
+                    ),
+                    table_name,
+                    column_name,
+                    scan,
+                )
+            else:
+                self._groups[table_name] = scan()
+        return self._groups[table_name]
+
+    def scan_table(
+        self, table_name: str, column_name: str, geometry_type_name: str
+    ) -> List[Dict[str, object]]:
+        if self.max_violations is not None:
+            return self.scan_table_limited(table_name, column_name, geometry_type_name)
+        if self.jobs > 1 and self.rowid_span(table_name) >= SHARD_MIN_ROWS:
+            return self.scan_table_sharded(table_name, column_name, geometry_type_name)
+        sql, names = scan_sql(
+            self.predicates, table_name, column_name, geometry_type_name
+        )
+        return execute_scan(self.dataset, sql, names)
+
+    def scan_table_limited(
+        self, table_name: str, column_name: str, geometry_type_name: str
+    ) -> List[Dict[str, object]]:
+        """
+        Scan the first max_violations violations of every predicate with a query of its
+        own, so a predicate with few violations does not keep the others scanning. One
+        more row is read to tell whether there are more.
+        """
+        groups = []
+        for predicate in self.predicates:
+            sql, names = scan_sql(
+                [predicate],
+                table_name,
+                column_name,
+                geometry_type_name,
+                limit=self.max_violations + 1,
+            )
+            predicate_groups = execute_scan(self.dataset, sql, names)
+            if sum(group["count"] for group in predicate_groups) > self.max_violations:
+                self.truncated.add((table_name, predicate))
+                # Leave out the extra row, the last one read.
+                last = max(predicate_groups, key=lambda group: group["last_row_id"])
+                last["count"] -= 1
+                if last["count"] == 0:
+                    predicate_groups.remove(last)
+            for group in predicate_groups:
+                del group["last_row_id"]
+            groups.extend(predicate_groups)
+        return groups
+
+    def is_truncated(self, predicates: Iterable[str]) -> bool:
+        """Whether the scan of a table stopped at max_violations for one of the predicates."""
+        predicates = set(predicates)
+        return any(predicate in predicates for _, predicate in self.truncated)
+
+    def scan_table_sharded(
+        self, table_name: str, column_name: str, geometry_type_name: str
+    ) -> List[Dict[str, object]]:
+        ranges = rowid_ranges(
+            self.dataset, table_name, column_name, self.jobs, self.shard_by
+        )
+        queries = [
+            scan_sql(self.predicates, table_name, column_name, geometry_type_name, r)
+            for r in ranges
+        ]
+        gpkg_path = self.dataset.GetDescription()
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.jobs,
+                initializer=_init_shard_worker,
+                initargs=(utils.gdal_config_options(),),
+            )
+        futures = [
+            self._executor.submit(_scan_shard, gpkg_path, sql, names)
+            for sql, names in queries
+        ]
+        shard_groups = []
+        for future in futures:
+            groups, error_traces = future.result()
+            if error_traces:
+                raise RuntimeError(
+                    f"Scan of table {table_name} failed: {'; '.join(error_traces)}"
+                )
+            shard_groups.append(groups)
+        names = queries[0][1] if queries else []
+        return merge_groups(names, shard_groups)
+
+    def rowid_span(self, table_name: str) -> int:
+        result = self.dataset.ExecuteSQL(
+            SQL_ROWID_SPAN_TEMPLATE.format(table_name=table_name)
+        )
+        (span,) = result.GetNextFeature()
+        self.dataset.ReleaseResultSet(result)
+        return span or 0
+
+    def aggregate(
+        self, table: Tuple[str, str, str], key: str
+    ) -> List[Tuple[object, int, int]]:
+        """
+        Sum the groups per value of key, returns (value, count, example row id) ordered by value.
+        Rows for which key is NULL are left out.
+        """
+        counts: Dict[object, int] = {}
+        row_ids: Dict[object, int] = {}
+        for group in self.groups(table):
+            # The groups of a limited scan only have the keys of their own predicate.
+            value = group.get(key)
+            if value is None:
+                continue
+            counts[value] = counts.get(value, 0) + group["count"]
+            row_ids[value] = min(row_ids.get(value, group["row_id"]), group["row_id"])
+        return [(value, counts[value], row_ids[value]) for value in sorted(counts)]
+
+    def distinct(
+        self, table: Tuple[str, str, str], keys: Tuple[str, ...]
+    ) -> Set[Tuple[object, ...]]:
+        return {tuple(group.get(key) for key in keys) for group in self.groups(table)}
+
+
+class GeometryScanValidator(validator.Validator):
+    """
+    Base for validations that are answered from a shared GeometryScan. Validations that
+    can also decode the geometries themselves list their scan_predicates in
+    native_predicates, with the NATIVE geometry_backend native_gpkg_path is then the path
+    of a local geopackage to read them from.
+    """
+
+    scan_predicates: Tuple[str, ...] = ()
+    native_predicates: Tuple[str, ...] = ()
+
+    def __init__(self, dataset, **kwargs):
+        super().__init__(dataset, **kwargs)
+        self.native_gpkg_path: Optional[str] = None
+        # The tables of which the native check stopped at max_violations.
+        self.native_truncated_tables: Set[str] = set()
+        if uses_native_backend(self, kwargs.get("geometry_backend")):
+            self.native_gpkg_path = gpkg_binary.local_path(dataset)
+        geometry_scan: Optional[GeometryScan] = kwargs.get("geometry_scan")
+        if geometry_scan is None or not set(self.scan_predicates).issubset(
+            geometry_scan.predicates
+        ):
+            geometry_scan = GeometryScan(
+                dataset,
+                self.scan_predicates,
+                max_violations=self.max_violations,
+                table_cache=kwargs.get("table_cache"),
+                timings=self.timings,
+                catalog=self.catalog,
+            )
+        self.geometry_scan = geometry_scan
+
+    def validate(self):
+        result = super().validate()
+        # Counts are partial when the scan of a table stopped at max_violations.
+        self.truncated = (
+            self.truncated
+            or self.geometry_scan.is_truncated(self.scan_predicates)
+            or bool(self.native_truncated_tables)
+        )
+        return result
+
+
+def spatialite_row_values(
+    dataset, table_name: str, column_name: str, expression: str, row_ids: List[int]
+) -> Iterable[Tuple[int, object]]:
+    """(row id, value) of the expression, formatted with the column_name, for the row ids."""
+    for start in range(0, len(row_ids), ROW_VALUES_CHUNK_SIZE):
+        result = dataset.ExecuteSQL(
+            SQL_ROW_VALUES_TEMPLATE.format(
+                table_name=table_name,
+                expression=expression.format(column_name=column_name),
+                row_ids=", ".join(
+                    str(row_id)
+                    for row_id in row_ids[start : start + ROW_VALUES_CHUNK_SIZE]
+                ),
+            )
+        )
+        for row_id, value in result:
+            yield row_id, value
+        dataset.ReleaseResultSet(result)
+
+
+def matching_rows(
+    dataset, table_name: str, column_name: str, condition: str, row_ids: List[int]
+) -> Iterable[int]:
+    """The row ids for which the condition, formatted with the column_name, holds."""
+    for row_id, value in spatialite_row_values(
+        dataset, table_name, column_name, condition, row_ids
+    ):
+        if value == 1:
+            yield row_id
+
+
+def uses_native_backend(validator_class, geometry_backend: Optional[str]) -> bool:
+    scan_predicates = getattr(validator_class, "scan_predicates", ())
+    return geometry_backend == NATIVE and set(scan_predicates).issubset(
+        getattr(validator_class, "native_predicates", ())
+    )
+
+
+def requested_predicates(
+    validators, geometry_backend: Optional[str] = SPATIALITE
+) -> List[str]:
+    """
+    The predicates a GeometryScan needs to answer all given validator classes, without
+    those of the validators that decode the geometries themselves.
+    """
+    return [
+        predicate
+        for predicate in ALL_PREDICATES
+        if any(
+            predicate in getattr(validator_class, "scan_predicates", ())
+            and not uses_native_backend(validator_class, geometry_backend)
+            for validator_class in validators
+        )
+    ]
@@ -1,60 +1,237 @@
-from typing import Iterable, Tuple
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+from geopackage_validator.catalog import Catalog
 from geopackage_validator.constants import VALID_GEOMETRIES, MAX_VALIDATION_ITERATIONS
+from geopackage_validator.timings import Timings, table_timing
 from geopackage_validator.validations import validator
-from geopackage_validator import utils
+from geopackage_validator.validations import geometry_scan
+from geopackage_validator import gpkg_binary
 
 
-def query_geometry_types(dataset) -> Iterable[Tuple[str, str]]:
-    for layer in dataset:
-        if not layer.GetGeometryColumn():
+def feature_geometry_types(layer) -> Iterable[Tuple[str, int]]:
+    """(geometry name, feature id) of the features of the layer with a geometry, read by OGR."""
+    for feature in layer:
+        geometry = feature.GetGeometryRef()
+        if geometry is None:
             continue
+        yield geometry.GetGeometryName() or "UNKNOWN", feature.GetFID()
+
+
+def wkb_geometry_types(
+    connection, table_name: str, column_name: str, layer=None
+) -> Iterable[Tuple[str, int]]:
+    """
+    (geometry name, row id) of the rows with a geometry, from the WKB type code at the
+    start of the geometry. The names are those of OGR, without Z and M. The geometries of
+    which the type code can not be read are read by OGR from the layer when given, and
+    skipped without geometry like feature_geometry_types does.
+    """
+    for row_id, prefix in gpkg_binary.iter_prefixes(
+        connection, table_name, column_name
+    ):
+        if prefix is None:
+            continue
+        geometry_type = gpkg_binary.prefix_geometry_type(prefix)
+        if geometry_type in gpkg_binary.GEOMETRY_TYPE_NAMES:
+            yield gpkg_binary.GEOMETRY_TYPE_NAMES[geometry_type], row_id
+        elif layer is not None:
+            feature = layer.GetFeature(row_id)
+            if feature is not None:
+                yield from feature_geometry_types([feature])
+
+
+def query_geometry_types(
+    dataset, catalog: Optional[Catalog] = None
+) -> Iterable[Tuple[str, str]]:
+    # Local geopackages are read without decoding every feature with OGR. Views have no
+    # rowid to read the geometries by, they are read with OGR.
+    gpkg_path = gpkg_binary.local_path(dataset)
+    connection = gpkg_path and gpkg_binary.readonly_connection(gpkg_path)
+    tables = (catalog or Catalog(dataset)).tables if connection else set()
+    try:
+        for layer in dataset:
+            column_name = layer.GetGeometryColumn()
+            if not column_name:
+                continue
+
+            layer_name = layer.GetName()
+            if layer_name in tables:
+                geometry_types = wkb_geometry_types(
+                    connection, layer_name, column_name, layer
+                )
+            else:
+                geometry_types = feature_geometry_types(layer)
+
+            c = 0
+            with closing(geometry_types):
+                for geom_type, feature_id in geometry_types:
+                    if c >= MAX_VALIDATION_ITERATIONS:
+                        break
+
+                    if geom_type not in VALID_GEOMETRIES:
+                        c += 1
+                        yield layer_name, geom_type, feature_id
+    finally:
+        if connection:
+            connection.close()
+
+
+def scan_unexpected_geometry_types(scan) -> Iterable[Tuple[str, str]]:
+    for table in scan.tables():
+        table_name, _, expected_geometry = table
+        for geometry_type, count, row_id in scan.aggregate(table, "geometry_type"):
+            if geometry_type != expected_geometry:
+                yield table_name, geometry_type, count, row_id, expected_geometry
 
-        layer_name = layer.GetName()
-
-        c = 0
-        for feature in layer:
-            if c >= MAX_VALIDATION_ITERATIONS:
-                break
-
-            geom_type = feature.GetGeometryRef().GetGeometryName() or "UNKNOWN"
-            feature_id = feature.GetFID()
-
-            if geom_type not in VALID_GEOMETRIES:
-                c += 1
-                yield layer_name, geom_type, feature_id
-
-
-SQL_TEMPLATE_TABLE_GEOMETRY_TYPES = """SELECT
-    CASE ST_AsText("{column_name}")
-        WHEN 'GEOMETRYCOLLECTION()'
-            THEN 'GEOMETRYCOLLECTION'
-        ELSE ST_GEOMETRYTYPE("{column_name}")
-    END AS geom_type
-    , count("{column_name}") AS count
-    , cast(rowid AS INTEGER) AS row_id
-FROM "{table_name}"
-WHERE geom_type != '{expected_geometry}'
-GROUP BY geom_type;"""
-
-
-def query_unexpected_geometry_types(dataset) -> Iterable[Tuple[str, str]]:
-    geometry_types = utils.dataset_geometry_tables(dataset)
 
-    for table_name, column_name, expected_geometry in geometry_types:
-        sql = SQL_TEMPLATE_TABLE_GEOMETRY_TYPES.format(
-            table_name=table_name,
-            column_name=column_name,
-            expected_geometry=expected_geometry,
+# The expression with which the rows the outline of the geometry can not decide are checked.
+((_, SQL_GEOMETRY_TYPE_EXPRESSION),) = geometry_scan.PREDICATE_COLUMNS[
+    geometry_scan.GEOMETRY_TYPE
+]
+
+# The part type of the multi geometry types.
+MULTI_PART_TYPES = {
+    gpkg_binary.MULTIPOINT: gpkg_binary.POINT,
+    gpkg_binary.MULTILINESTRING: gpkg_binary.LINESTRING,
+    gpkg_binary.MULTIPOLYGON: gpkg_binary.POLYGON,
+}
+
+SIMPLE_TYPES = (gpkg_binary.POINT, gpkg_binary.LINESTRING, gpkg_binary.POLYGON)
+
+DIMENSION_SUFFIXES = {
+    (False, False): "",
+    (True, False): " Z",
+    (False, True): " M",
+    (True, True): " ZM",
+}
+
+
+def outline_geometry_type(outline: gpkg_binary.GeometryOutline) -> Optional[str]:
+    """
+    The geometry type SQL_GEOMETRY_TYPE_EXPRESSION gives the geometry, from its WKB type
+    codes. None when it is left to spatialite: empty or curved geometries, EWKB and
+    collections of mixed or nested parts.
+    """
+    if outline.version != 0 or outline.empty or outline.ewkb or outline.size == 0:
+        return None
+    if outline.geometry_type in MULTI_PART_TYPES:
+        part_types = (MULTI_PART_TYPES[outline.geometry_type],)
+    elif outline.geometry_type == gpkg_binary.GEOMETRYCOLLECTION:
+        part_types = SIMPLE_TYPES
+    elif outline.geometry_type in SIMPLE_TYPES:
+        part_types = ()
+    else:
+        return None
+    for part_type, has_z, has_m, size in outline.parts:
+        if (
+            part_type not in part_types
+            or (has_z, has_m) != (outline.has_z, outline.has_m)
+            or size == 0
+        ):
+            return None
+    return (
+        gpkg_binary.GEOMETRY_TYPE_NAMES[outline.geometry_type]
+        + DIMENSION_SUFFIXES[outline.has_z, outline.has_m]
+    )
+
+
+def prefix_geometry_type(
+    connection, table_name: str, column_name: str, row_id: int, prefix: bytes
+) -> Optional[str]:
+    """
+    The outline_geometry_type of the geometry starting with prefix, read by
+    gpkg_binary.iter_prefixes. Only when the parts of a collection continue after the
+    prefix the whole geometry is read.
+    """
+    try:
+        return outline_geometry_type(
+            gpkg_binary.outline(prefix, prefix=len(prefix) >= gpkg_binary.PREFIX_SIZE)
         )
-
-        validations = dataset.ExecuteSQL(sql)
-
-        if validations is not None:
-            for (geometry_type, count, row_id) in validations:
-                yield table_name, geometry_type, count, row_id, expected_geometry
-
-        dataset.ReleaseResultSet(validations)
+    except gpkg_binary.GeometryDecodeError:
+        if len(prefix) < gpkg_binary.PREFIX_SIZE:
+            # The prefix is the whole geometry.
+            return None
+    try:
+        return outline_geometry_type(
+            gpkg_binary.outline(
+                gpkg_binary.read_blob(connection, table_name, column_name, row_id)
+            )
+        )
+    except gpkg_binary.GeometryDecodeError:
+        return None
+
+
+def native_unexpected_geometry_types(
+    dataset,
+    gpkg_path: str,
+    tables: List[Tuple[str, str, str]],
+    max_violations: Optional[int] = None,
+    timings: Optional[Timings] = None,
+) -> Tuple[List[Tuple[str, str, int, int, str]], Set[str]]:
+    """
+    The results of scan_unexpected_geometry_types from the WKB type codes of the
+    geometries, read by gpkg_binary.outline from their prefixes. The geometries
+    it can not decide are checked with spatialite. Returns the results and the tables of
+    which the check stopped at max_violations.
+    """
+    results = []
+    truncated_tables = set()
+    with closing(gpkg_binary.readonly_connection(gpkg_path)) as connection:
+        for table_name, column_name, expected_geometry in tables:
+            counts: Dict[str, int] = {}
+            row_ids: Dict[str, int] = {}
+            undecided = []
+
+            def add(geometry_type, row_id):
+                if geometry_type is None or geometry_type == expected_geometry:
+                    return
+                if (
+                    max_violations is not None
+                    and sum(counts.values()) >= max_violations
+                ):
+                    # A violation past max_violations: the counts are partial.
+                    truncated_tables.add(table_name)
+                    return
+                counts[geometry_type] = counts.get(geometry_type, 0) + 1
+                row_ids[geometry_type] = min(row_ids.get(geometry_type, row_id), row_id)
+
+            with table_timing(timings, table_name) as timing_counts:
+                timing_counts["rows_scanned"] = 0
+                for row_id, prefix in gpkg_binary.iter_prefixes(
+                    connection, table_name, column_name
+                ):
+                    timing_counts["rows_scanned"] += 1
+                    if prefix is None:
+                        continue
+                    geometry_type = prefix_geometry_type(
+                        connection, table_name, column_name, row_id, prefix
+                    )
+                    if geometry_type is None:
+                        undecided.append(row_id)
+                        continue
+                    add(geometry_type, row_id)
+                    if table_name in truncated_tables:
+                        break
+                for row_id, geometry_type in geometry_scan.spatialite_row_values(
+                    dataset,
+                    table_name,
+                    column_name,
+                    SQL_GEOMETRY_TYPE_EXPRESSION,
+                    undecided,
+                ):
+                    add(geometry_type, row_id)
+            results.extend(
+                (
+                    table_name,
+                    geometry_type,
+                    counts[geometry_type],
+                    row_ids[geometry_type],
+                    expected_geometry,
+                )
+                for geometry_type in sorted(counts)
+            )
+    return results, truncated_tables
 
 
 def aggregate(results):
@@ -91,7 +268,7 @@ class GeometryTypeValidator(validator.Validator):
     message = "Error layer: {layer}, found geometry: {geometry}, {amount} {desc}: {rowid_list}"
 
     def check(self) -> Iterable[str]:
-        geometries = query_geometry_types(self.dataset)
+        geometries = query_geometry_types(self.dataset, self.catalog)
         aggregate_result = aggregate(geometries)
         return [self.message.format(**value) for key, value in aggregate_result.items()]
 
@@ -104,7 +281,7 @@ class GpkgGeometryTypeNameValidator(validator.Validator):
     message = "Found geometry_type_name: {geometry_type} for table {table} (from the gpkg_geometry_columns table)."
 
     def check(self) -> Iterable[str]:
-        geometry_types = utils.dataset_geometry_tables(self.dataset)
+        geometry_types = self.catalog.geometry_tables
         return self.gpkg_geometry_valid_check(geometry_types)
 
     @classmethod
@@ -117,17 +294,28 @@ class GpkgGeometryTypeNameValidator(validator.Validator):
         ]
 
 
-class GeometryTypeEqualsGpkgDefinitionValidator(validator.Validator):
+class GeometryTypeEqualsGpkgDefinitionValidator(geometry_scan.GeometryScanValidator):
     """All table geometries types must match the geometry_type_name from the gpkg_geometry_columns table."""
 
     code = 15
     level = validator.ValidationLevel.ERROR
+    scan_predicates = (geometry_scan.GEOMETRY_TYPE,)
+    native_predicates = (geometry_scan.GEOMETRY_TYPE,)
     message = "Error layer: {table_name}, found geometry: {geometry_type} that should be {expected_geometry}, {count} {count_label}, example id: {row_id}"
 
     def check(self) -> Iterable[str]:
-        result = query_unexpected_geometry_types(self.dataset)
+        if self.native_gpkg_path is not None:
+            result, self.native_truncated_tables = native_unexpected_geometry_types(
+                self.dataset,
+                self.native_gpkg_path,
+                self.catalog.geometry_tables,
+                self.max_violations,
+                self.timings,
+            )
+        else:
+            result = scan_unexpected_geometry_types(self.geometry_scan)
 
-        return [
+        return (
             self.message.format(
                 table_name=table_name,
                 geometry_type=geometry_type,
@@ -137,4 +325,4 @@ class GeometryTypeEqualsGpkgDefinitionValidator(validator.Validator):
                 expected_geometry=expected_geometry,
             )
             for table_name, geometry_type, count, row_id, expected_geometry in result
-        ]
+        )
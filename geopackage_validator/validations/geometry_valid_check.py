@@ -1,5 +1,6 @@
 from typing import Iterable, Tuple
 from geopackage_validator.validations import validator
+from geopackage_validator.validations import geometry_scan
 from geopackage_validator import utils
 
 SQL_VALID_TEMPLATE_V0 = """SELECT reason, count(reason) AS count, row_id
@@ -27,34 +28,6 @@ FROM(
 )
 GROUP BY reason;"""
 
-SQL_VALID_TEMPLATE = """SELECT reason, count(reason) AS count, row_id
-FROM(
-    SELECT
-        CASE ST_IsValid("{column_name}")
-            WHEN 0
-                THEN
-                    CASE INSTR(ST_IsValidReason("{column_name}"), '[')
-                        WHEN 0
-                            THEN ST_IsValidReason("{column_name}")
-                        ELSE substr(ST_IsValidReason("{column_name}"), 0, INSTR(ST_IsValidReason("{column_name}"), '['))
-                    END
-                ELSE
-                    CASE
-                        WHEN ST_IsSimple("{column_name}") = 0
-                            THEN 'Not Simple'
-                        WHEN IsValidGPB("{column_name}") = 0
-                            THEN 'Not GeoPackage geometry'
-                    END
-        END AS reason,
-        cast(rowid AS INTEGER) AS row_id
-    FROM "{table_name}"
-    WHERE
-        ST_IsValid("{column_name}") = 0 OR
-        ST_IsSimple("{column_name}") = 0 OR
-        (IsValidGPB("{column_name}") = 0  AND ST_IsEmpty("{column_name}") = 0) -- Empty geometry is considered valid
-)
-GROUP BY reason;"""
-
 
 def query_geometry_valid(
     dataset, sql_template
@@ -70,6 +43,13 @@ def query_geometry_valid(
         dataset.ReleaseResultSet(validations)
 
 
+def scan_geometry_valid(scan) -> Iterable[Tuple[str, str, str, int, int]]:
+    for table in scan.tables():
+        table_name, column_name, _ = table
+        for reason, count, row_id in scan.aggregate(table, "invalid_reason"):
+            yield table_name, column_name, reason, count, row_id
+
+
 class ValidGeometryValidatorV0(validator.Validator):
     """Legacy: use RQ23 * Geometries should be valid."""
 
@@ -93,17 +73,18 @@ class ValidGeometryValidatorV0(validator.Validator):
         ]
 
 
-class ValidGeometryValidator(validator.Validator):
+class ValidGeometryValidator(geometry_scan.GeometryScanValidator):
     """Geometries should be valid and simple."""
 
     code = 23
     level = validator.ValidationLevel.ERROR
+    scan_predicates = (geometry_scan.VALID,)
     message = "Found invalid geometry in table: {table_name}, column {column_name}, reason: {reason}, {count} {count_label}, example id {row_id}"
 
     def check(self) -> Iterable[str]:
-        result = query_geometry_valid(self.dataset, SQL_VALID_TEMPLATE)
+        result = scan_geometry_valid(self.geometry_scan)
 
-        return [
+        return (
             self.message.format(
                 table_name=table_name,
                 column_name=column_name,
@@ -113,4 +94,4 @@ class ValidGeometryValidator(validator.Validator):
                 row_id=row_id,
             )
             for table_name, column_name, reason, count, row_id in result
-        ]
+        )
@@ -1,33 +1,30 @@
-from typing import Iterable, Tuple
+from typing import Iterable, Optional, Tuple
 
+from geopackage_validator.catalog import Catalog
 from geopackage_validator.models import DataType
+from geopackage_validator.timings import Timings, table_timing
 from geopackage_validator.validations import validator
 
 
-def query_layerfeature_counts(dataset) -> Iterable[Tuple[str, int, int]]:
+def query_layerfeature_counts(
+    dataset, timings: Optional[Timings] = None, catalog: Optional[Catalog] = None
+) -> Iterable[Tuple[str, int, int]]:
+    catalog = catalog or Catalog(dataset)
     for layer in dataset:
-        data_type = dataset.ExecuteSQL(
-            f'SELECT data_type FROM gpkg_contents WHERE table_name="{layer.GetName()}"'
-        )
-
-        dt = data_type.GetNextFeature()
-        if dt is None:
-            continue
-
-        dataset.ReleaseResultSet(data_type)
-        data_type = DataType.from_str(dt[0])
+        layer_name = layer.GetName()
 
-        if data_type != DataType.FEATURES:
+        data_type = catalog.data_type(layer_name)
+        if data_type is None or DataType.from_str(data_type) != DataType.FEATURES:
             continue
 
-        layer_name = layer.GetName()
-
-        table_featurecount = dataset.ExecuteSQL(
-            'SELECT count(*) from "{table_name}"'.format(table_name=layer_name)
-        )
-        (table_count,) = table_featurecount.GetNextFeature()
+        with table_timing(timings, layer_name) as counts:
+            table_featurecount = dataset.ExecuteSQL(
+                'SELECT count(*) from "{table_name}"'.format(table_name=layer_name)
+            )
+            (table_count,) = table_featurecount.GetNextFeature()
 
-        dataset.ReleaseResultSet(table_featurecount)
+            dataset.ReleaseResultSet(table_featurecount)
+            counts["rows_scanned"] = table_count
 
         yield layer_name, table_count, layer.GetFeatureCount()
 
@@ -40,7 +37,7 @@ class NonEmptyLayerValidator(validator.Validator):
     message = "Error layer: {layer}"
 
     def check(self) -> Iterable[str]:
-        counts = query_layerfeature_counts(self.dataset)
+        counts = query_layerfeature_counts(self.dataset, self.timings, self.catalog)
         return self.check_contains_features(counts)
 
     @classmethod
@@ -59,7 +56,7 @@ class OGRIndexValidator(validator.Validator):
     message = "OGR index for feature count is not up to date for table: {layer}. Indexed feature count: {ogr_count}, real feature count: {count}"
 
     def check(self) -> Iterable[str]:
-        counts = query_layerfeature_counts(self.dataset)
+        counts = query_layerfeature_counts(self.dataset, self.timings, self.catalog)
         return self.layerfeature_check_ogr_index(counts)
 
     @classmethod
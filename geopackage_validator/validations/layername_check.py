@@ -1,14 +1,13 @@
-from typing import Iterable, List
+from typing import Iterable, List, Optional
 
-from geopackage_validator.generate import get_table_names_from_contents
+from geopackage_validator.catalog import Catalog
 from geopackage_validator.validations import validator
 from geopackage_validator.constants import SNAKE_CASE_REGEX
 
 
-def query_layernames(dataset) -> List[str]:
-    return [
-        table_name for table_name, dataset in get_table_names_from_contents(dataset)
-    ]
+def query_layernames(dataset, catalog: Optional[Catalog] = None) -> List[str]:
+    catalog = catalog or Catalog(dataset)
+    return [table_name for table_name, _ in catalog.contents]
 
 
 class LayerNameValidator(validator.Validator):
@@ -19,7 +18,7 @@ class LayerNameValidator(validator.Validator):
     message = "Error layer: {layer}"
 
     def check(self) -> Iterable[str]:
-        layernames = query_layernames(self.dataset)
+        layernames = query_layernames(self.dataset, self.catalog)
         return self.check_layernames(layernames)
 
     @classmethod
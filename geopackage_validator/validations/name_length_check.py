@@ -1,23 +1,22 @@
-from typing import Iterable, Tuple, List
+from typing import Iterable, Optional, Tuple, List
 
+from geopackage_validator.catalog import Catalog
 from geopackage_validator.validations import validator
-from geopackage_validator import utils
 
 LEGACY_MAX_LENGTH = 53
 MAX_LENGTH = 57
 
 
-def query_names(dataset) -> Iterable[Tuple[str, str, int]]:
-    tables = utils.dataset_geometry_tables(dataset)
+def query_names(
+    dataset, catalog: Optional[Catalog] = None
+) -> Iterable[Tuple[str, str, int]]:
+    catalog = catalog or Catalog(dataset)
 
-    for table, _, _ in tables:
+    for table, _, _ in catalog.geometry_tables:
         yield "table", table, len(table)
-        columns = dataset.ExecuteSQL(f"PRAGMA TABLE_INFO('{table}');")
 
-        for _, column, *_ in columns:
-            yield "column", f"{column} (table: {table})", len(column)
-
-        dataset.ReleaseResultSet(columns)
+        for column in catalog.table_columns(table):
+            yield "column", f"{column.name} (table: {table})", len(column.name)
 
 
 class NameLengthValidatorV0(validator.Validator):
@@ -28,7 +27,7 @@ class NameLengthValidatorV0(validator.Validator):
     message = "Error {name_type} too long: {name}, with length: {length}"
 
     def check(self) -> Iterable[str]:
-        column_names = query_names(self.dataset)
+        column_names = query_names(self.dataset, self.catalog)
         return self.check_columns(column_names)
 
     @classmethod
@@ -49,7 +48,7 @@ class NameLengthValidator(validator.Validator):
     message = "Error {name_type} too long: {name}, with length: {length}"
 
     def check(self) -> Iterable[str]:
-        column_names = query_names(self.dataset)
+        column_names = query_names(self.dataset, self.catalog)
         return self.check_columns(column_names)
 
     @classmethod
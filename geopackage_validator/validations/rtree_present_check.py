@@ -1,31 +1,20 @@
-from typing import Iterable
+from typing import Iterable, Optional
 
+from geopackage_validator.catalog import Catalog
 from geopackage_validator.validations import validator
 
 
-def query_rtree_presence(dataset) -> Iterable[str]:
+def query_rtree_presence(dataset, catalog: Optional[Catalog] = None) -> Iterable[str]:
+    catalog = catalog or Catalog(dataset)
     # Check if gpkg_extensions table is present
-    gpkg_extensions = dataset.ExecuteSQL(
-        "select * from sqlite_master where type = 'table' and name = 'gpkg_extensions';"
-    )
-    has_gpkg_extensions = len(gpkg_extensions) > 0
-    dataset.ReleaseResultSet(gpkg_extensions)
-
-    if not has_gpkg_extensions:
+    if "gpkg_extensions" not in catalog.tables:
         yield "no table has an rtree index"
         return
 
-    indexes = dataset.ExecuteSQL(
-        "select gc.table_name from gpkg_contents gc "
-        "where gc.data_type = 'features' and "
-        "not exists(select * from gpkg_extensions gce "
-        "   where gce.table_name = gc.table_name "
-        "   and extension_name = 'gpkg_rtree_index');"
-    )
-    for (index,) in indexes:
-        yield index
-
-    dataset.ReleaseResultSet(indexes)
+    rtree_tables = catalog.tables_with_extension("gpkg_rtree_index")
+    for table_name, data_type in catalog.contents:
+        if data_type == "features" and table_name not in rtree_tables:
+            yield table_name
 
 
 class RTreeExistsValidator(validator.Validator):
@@ -36,7 +25,7 @@ class RTreeExistsValidator(validator.Validator):
     message = "Table without index: {table_name}"
 
     def check(self) -> Iterable[str]:
-        rtrees = query_rtree_presence(self.dataset)
+        rtrees = query_rtree_presence(self.dataset, self.catalog)
         return self.check_rtree_is_present(rtrees)
 
     @classmethod
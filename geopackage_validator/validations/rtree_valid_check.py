@@ -1,43 +1,461 @@
-from typing import Iterable
+import logging
+import sqlite3
+import time
+from collections import namedtuple
+from math import frexp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import closing
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from geopackage_validator.cache import TableCache
+from geopackage_validator.catalog import Catalog
+from geopackage_validator.timings import Timings, table_timing
 from geopackage_validator.validations import validator
+from geopackage_validator import gpkg_binary
 
+logger = logging.getLogger(__name__)
+
+# The rtreecheck result of the index of a table: its messages, or whether it was not done
+# within the time limit.
+RtreeCheck = namedtuple("RtreeCheck", ["table_name", "messages", "timed_out"])
+
+RTREE_OK = "ok"
+RTREE_INVALID = "invalid"
+RTREE_TIMEOUT = "timeout"
+
+# SQLite virtual machine instructions between two checks of the time limit.
+PROGRESS_INSTRUCTIONS = 10_000
+
+# What RQ10 checks: the structure of the indexes with rtreecheck, whether their entries
+# match the envelopes of the geometries, or both.
+RTREE_MODE_RTREECHECK = "rtreecheck"
+RTREE_MODE_ENVELOPE = "envelope"
+RTREE_MODE_BOTH = "both"
+RTREE_MODES = (RTREE_MODE_RTREECHECK, RTREE_MODE_ENVELOPE, RTREE_MODE_BOTH)
+
+# The differences between the entries of an rtree index and the geometries.
+ENVELOPE_MISSING = "missing"
+ENVELOPE_EXTRA = "extra"
+ENVELOPE_MISMATCH = "mismatch"
+ENVELOPE_DIFFERENCES = (ENVELOPE_MISSING, ENVELOPE_EXTRA, ENVELOPE_MISMATCH)
+
+# The envelope of a geometry that could not be read, its entry is not compared.
+UNREADABLE = "unreadable"
+
+# The envelope check result of the index of a table: the table name when the index could
+# not be read (like rtreecheck), and the [difference, count, first row id] of every
+# difference found.
+EnvelopeCheck = namedtuple("EnvelopeCheck", ["table_name", "messages", "differences"])
+
+SQL_RTREE_ENTRIES_TEMPLATE = 'SELECT cast(id AS INTEGER), minx, maxx, miny, maxy FROM "{index_name}" ORDER BY id;'
+
+SQL_GEOMETRY_ENVELOPES_TEMPLATE = """SELECT
+    cast(rowid AS INTEGER),
+    "{column_name}" IS NULL OR ST_IsEmpty("{column_name}") = 1,
+    ST_MinX("{column_name}"),
+    ST_MaxX("{column_name}"),
+    ST_MinY("{column_name}"),
+    ST_MaxY("{column_name}")
+FROM "{table_name}" ORDER BY rowid;"""
+
+
+@lru_cache(maxsize=None)
+def sqlite_has_rtreecheck() -> bool:
+    """Whether the SQLite library of the sqlite3 module has the rtree module with rtreecheck."""
+    with closing(sqlite3.connect(":memory:")) as connection:
+        try:
+            functions = connection.execute("PRAGMA function_list;").fetchall()
+        except sqlite3.DatabaseError:
+            return False
+    return any(function[0] == "rtreecheck" for function in functions)
+
+
+def rtree_index_name(table_name: str, column_name: str) -> str:
+    return "rtree_" + table_name + "_" + column_name
+
+
+def rtree_indexes(catalog: Catalog) -> List[Tuple[str, str]]:
+    """The (table name, column name) of the geometry tables with an rtree index."""
+    rtree_tables = catalog.tables_with_extension("gpkg_rtree_index")
+    return [
+        (table_name, column_name)
+        for table_name, column_name, _ in catalog.geometry_tables
+        if table_name in rtree_tables
+    ]
 
-def rtree_valid_check_query(dataset) -> Iterable[str]:
-    # Check if gpkg_extensions table is present
-    gpkg_extensions_present = dataset.ExecuteSQL(
-        "select * from sqlite_master where type = 'table' and name = 'gpkg_extensions';"
-    )
 
-    has_extensions = gpkg_extensions_present.GetFeatureCount() == 0
-    dataset.ReleaseResultSet(gpkg_extensions_present)
-    if has_extensions:
+def rtree_checks(
+    dataset,
+    table_cache: Optional[TableCache] = None,
+    timings: Optional[Timings] = None,
+    catalog: Optional[Catalog] = None,
+    jobs: int = 1,
+    timeout: Optional[float] = None,
+    progress: Optional[Callable[[str, str, float], None]] = None,
+) -> Iterator[RtreeCheck]:
+    """
+    The rtreecheck results of the rtree indexes, in the order of the geometry tables.
+
+    The indexes of a local geopackage are checked with read-only sqlite3 connections, by
+    jobs worker processes when jobs > 1. Each check is interrupted after timeout seconds.
+    Other datasets (or without rtreecheck in the sqlite3 module) are checked one by one
+    with GDAL, without time limit. progress is called with the table name, RTREE_OK,
+    RTREE_INVALID or RTREE_TIMEOUT and the seconds the check took, for every index as
+    soon as it is checked.
+    """
+    indexes = rtree_indexes(catalog or Catalog(dataset))
+
+    cached = {}
+    if table_cache is not None:
+        for table_name, column_name in indexes:
+            messages = table_cache.get(
+                "rtree_valid",
+                table_name,
+                column_name,
+                rtree_index_name(table_name, column_name),
+            )
+            if messages is not None:
+                cached[table_name] = RtreeCheck(table_name, messages, False)
+    unchecked = [index for index in indexes if index[0] not in cached]
+
+    gpkg_path = gpkg_binary.local_path(dataset)
+    if gpkg_path is None or not sqlite_has_rtreecheck():
+        checks = gdal_rtree_checks(dataset, unchecked, timings, progress)
+    else:
+        checks = sqlite_rtree_checks(
+            gpkg_path, unchecked, jobs, timeout, timings, progress
+        )
+    checks = iter(checks)
+
+    for table_name, column_name in indexes:
+        if table_name in cached:
+            yield cached[table_name]
+            continue
+        check = next(checks)
+        if table_cache is not None and not check.timed_out:
+            table_cache.put(
+                "rtree_valid",
+                table_name,
+                column_name,
+                check.messages,
+                rtree_index_name(table_name, column_name),
+            )
+        yield check
+
+
+def check_status(check: RtreeCheck) -> str:
+    if check.timed_out:
+        return RTREE_TIMEOUT
+    return RTREE_INVALID if check.messages else RTREE_OK
+
+
+def gdal_rtree_checks(
+    dataset,
+    indexes: List[Tuple[str, str]],
+    timings: Optional[Timings] = None,
+    progress: Optional[Callable[[str, str, float], None]] = None,
+) -> Iterator[RtreeCheck]:
+    for table_name, column_name in indexes:
+        start = time.monotonic()
+        with table_timing(timings, table_name):
+            check = RtreeCheck(
+                table_name, rtree_check(dataset, table_name, column_name), False
+            )
+        if progress is not None:
+            progress(table_name, check_status(check), time.monotonic() - start)
+        yield check
+
+
+def sqlite_rtree_checks(
+    gpkg_path: str,
+    indexes: List[Tuple[str, str]],
+    jobs: int = 1,
+    timeout: Optional[float] = None,
+    timings: Optional[Timings] = None,
+    progress: Optional[Callable[[str, str, float], None]] = None,
+) -> Iterator[RtreeCheck]:
+    if jobs <= 1 or len(indexes) <= 1:
+        for table_name, column_name in indexes:
+            with table_timing(timings, table_name):
+                check, seconds = sqlite_rtree_check(
+                    gpkg_path, table_name, column_name, timeout
+                )
+            if progress is not None:
+                progress(table_name, check_status(check), seconds)
+            yield check
         return
 
-    indexes = dataset.ExecuteSQL(
-        "select gc.table_name, gc.column_name from gpkg_geometry_columns gc "
-        "where exists(select * from gpkg_extensions gce where gce.table_name = gc.table_name "
-        "and extension_name = 'gpkg_rtree_index');"
+    # The workers only show in the wall time of the validator, like the sharded scan.
+    checks = {}
+    with ProcessPoolExecutor(max_workers=min(jobs, len(indexes))) as executor:
+        futures = {
+            executor.submit(
+                sqlite_rtree_check, gpkg_path, table_name, column_name, timeout
+            ): table_name
+            for table_name, column_name in indexes
+        }
+        for future in as_completed(futures):
+            check, seconds = future.result()
+            checks[futures[future]] = check
+            if progress is not None:
+                progress(check.table_name, check_status(check), seconds)
+    for table_name, _ in indexes:
+        yield checks[table_name]
+
+
+def sqlite_rtree_check(
+    gpkg_path: str,
+    table_name: str,
+    column_name: str,
+    timeout: Optional[float] = None,
+) -> Tuple[RtreeCheck, float]:
+    """The rtreecheck result of the index of the table and the seconds it took."""
+    start = time.monotonic()
+    with closing(gpkg_binary.readonly_connection(gpkg_path)) as connection:
+        if timeout is not None:
+            deadline = start + timeout
+            # A true value of the handler interrupts the statement.
+            connection.set_progress_handler(
+                lambda: time.monotonic() > deadline, PROGRESS_INSTRUCTIONS
+            )
+        try:
+            rows = connection.execute(
+                "SELECT rtreecheck(?);", (rtree_index_name(table_name, column_name),)
+            ).fetchall()
+        except sqlite3.OperationalError:
+            seconds = time.monotonic() - start
+            if timeout is not None and seconds > timeout:
+                return RtreeCheck(table_name, [], True), seconds
+            # Like rtree_check, the table name when the check fails.
+            return RtreeCheck(table_name, [table_name], False), seconds
+    messages = [message for (message,) in rows if message != "ok"]
+    return RtreeCheck(table_name, messages, False), time.monotonic() - start
+
+
+def rtree_check(dataset, table_name: str, column_name: str) -> List[str]:
+    """The rtreecheck messages of the rtree index of the table (the table name when it fails)."""
+    with dataset.silence_gdal():
+        validations = dataset.ExecuteSQL(
+            'select rtreecheck("{index_name}");'.format(
+                index_name=rtree_index_name(table_name, column_name)
+            )
+        )
+
+        if validations is None:
+            return [table_name]
+
+        messages = [
+            validation[0] for validation in validations if validation[0] != "ok"
+        ]
+        dataset.ReleaseResultSet(validations)
+        return messages
+
+
+def float32_ulp(value: float) -> float:
+    """The distance between 32-bit floats around value, the precision of an rtree index."""
+    if value == 0:
+        return 2.0**-149
+    # value is m * 2 ** exponent with 0.5 <= |m| < 1, a float32 has 24 significant bits.
+    return 2.0 ** max(frexp(value)[1] - 24, -149)
+
+
+def envelope_matches(entry: Tuple[float, ...], envelope: Tuple[float, ...]) -> bool:
+    """
+    Whether the (minx, maxx, miny, maxy) of an rtree entry are those of the envelope,
+    rounded to 32-bit floats.
+    """
+    # The rtree module rounds a minimum down and a maximum up. When the nearest float32
+    # is on the wrong side it is moved by a relative 2 ** -23, ending up to 2.5 float32
+    # steps away.
+    return all(
+        stored == value or abs(stored - value) <= 3 * float32_ulp(value)
+        for stored, value in zip(entry, envelope)
     )
-    for index in indexes:
-        with dataset.silence_gdal():
-            validations = dataset.ExecuteSQL(
-                'select rtreecheck("{index_name}");'.format(
-                    index_name="rtree_" + index[0] + "_" + index[1]
+
+
+def envelope_differences(
+    entries: Iterable[Tuple[int, float, float, float, float]],
+    envelopes: Iterable[Tuple[int, object]],
+) -> Iterator[Tuple[str, int]]:
+    """
+    The (difference, row id) of the rtree entries and the geometry envelopes that do not
+    match. Both are ordered by id and merged in one pass, so only the current entry and
+    envelope are held. An envelope is None for a NULL or empty geometry, which has no
+    entry, or UNREADABLE when the geometry could not be read.
+    """
+    entries, envelopes = iter(entries), iter(envelopes)
+    entry, envelope = next(entries, None), next(envelopes, None)
+    while entry is not None or envelope is not None:
+        if envelope is None or (entry is not None and entry[0] < envelope[0]):
+            yield ENVELOPE_EXTRA, entry[0]
+            entry = next(entries, None)
+        elif entry is None or envelope[0] < entry[0]:
+            if envelope[1] is not None and envelope[1] is not UNREADABLE:
+                yield ENVELOPE_MISSING, envelope[0]
+            envelope = next(envelopes, None)
+        else:
+            if envelope[1] is None:
+                yield ENVELOPE_EXTRA, entry[0]
+            elif envelope[1] is not UNREADABLE and not envelope_matches(
+                entry[1:], envelope[1]
+            ):
+                yield ENVELOPE_MISMATCH, entry[0]
+            entry, envelope = next(entries, None), next(envelopes, None)
+
+
+def count_differences(differences: Iterable[Tuple[str, int]]) -> List[List]:
+    """The [difference, count, first row id] of every difference found."""
+    counts: Dict[str, int] = {}
+    row_ids: Dict[str, int] = {}
+    for difference, row_id in differences:
+        counts[difference] = counts.get(difference, 0) + 1
+        row_ids.setdefault(difference, row_id)
+    return [
+        [difference, counts[difference], row_ids[difference]]
+        for difference in ENVELOPE_DIFFERENCES
+        if difference in counts
+    ]
+
+
+def envelope_checks(
+    dataset,
+    table_cache: Optional[TableCache] = None,
+    timings: Optional[Timings] = None,
+    catalog: Optional[Catalog] = None,
+    progress: Optional[Callable[[str, str, float], None]] = None,
+) -> Iterator[EnvelopeCheck]:
+    """
+    The envelope check results of the rtree indexes, in the order of the geometry tables.
+    The indexes of a local geopackage are read with a read-only sqlite3 connection and
+    the envelopes from the geometry headers, of other datasets with GDAL.
+    """
+    gpkg_path = gpkg_binary.local_path(dataset)
+    for table_name, column_name in rtree_indexes(catalog or Catalog(dataset)):
+        start = time.monotonic()
+        result = None
+        if table_cache is not None:
+            result = table_cache.get(
+                "rtree_envelope",
+                table_name,
+                column_name,
+                rtree_index_name(table_name, column_name),
+            )
+        if result is None:
+            with table_timing(timings, table_name):
+                if gpkg_path is not None:
+                    check = sqlite_envelope_check(gpkg_path, table_name, column_name)
+                else:
+                    check = gdal_envelope_check(dataset, table_name, column_name)
+            if table_cache is not None:
+                table_cache.put(
+                    "rtree_envelope",
+                    table_name,
+                    column_name,
+                    [check.messages, check.differences],
+                    rtree_index_name(table_name, column_name),
+                )
+        else:
+            check = EnvelopeCheck(table_name, *result)
+        if progress is not None:
+            status = RTREE_INVALID if check.messages or check.differences else RTREE_OK
+            progress(table_name, status, time.monotonic() - start)
+        yield check
+
+
+def sqlite_geometry_envelopes(
+    connection: sqlite3.Connection, table_name: str, column_name: str
+) -> Iterator[Tuple[int, object]]:
+    """(row id, envelope) of every row, in row id order, like envelope_differences takes."""
+    for row_id, prefix in gpkg_binary.iter_prefixes(
+        connection, table_name, column_name
+    ):
+        if prefix is None:
+            yield row_id, None
+            continue
+        try:
+            yield row_id, gpkg_binary.envelope(prefix)
+            continue
+        except gpkg_binary.GeometryDecodeError:
+            pass
+        # Without an envelope in the header the whole geometry is read.
+        (blob,) = connection.execute(
+            f'SELECT "{column_name}" FROM "{table_name}" WHERE rowid = ?;', (row_id,)
+        ).fetchone()
+        try:
+            yield row_id, gpkg_binary.envelope(blob)
+        except gpkg_binary.GeometryDecodeError:
+            yield row_id, UNREADABLE
+
+
+def sqlite_envelope_check(
+    gpkg_path: str, table_name: str, column_name: str
+) -> EnvelopeCheck:
+    """Compares the entries of the rtree index of the table with the geometry headers."""
+    with closing(gpkg_binary.readonly_connection(gpkg_path)) as connection:
+        entries = connection.cursor()
+        try:
+            entries.execute(
+                SQL_RTREE_ENTRIES_TEMPLATE.format(
+                    index_name=rtree_index_name(table_name, column_name)
+                )
+            )
+        except sqlite3.OperationalError:
+            return EnvelopeCheck(table_name, [table_name], [])
+        try:
+            differences = count_differences(
+                envelope_differences(
+                    entries,
+                    sqlite_geometry_envelopes(connection, table_name, column_name),
                 )
             )
+        except sqlite3.OperationalError:
+            return EnvelopeCheck(table_name, [table_name], [])
+        finally:
+            entries.close()
+    return EnvelopeCheck(table_name, [], differences)
 
-            if validations is None:
-                yield index[0]
-                dataset.ReleaseResultSet(validations)
-                continue
 
-            for validation in validations:
-                if validation[0] != "ok":
-                    yield validation[0]
-            dataset.ReleaseResultSet(validations)
+def gdal_envelope_check(dataset, table_name: str, column_name: str) -> EnvelopeCheck:
+    """Compares the entries of the rtree index of the table with ST_MinX etc. of GDAL."""
+    with dataset.silence_gdal():
+        entries = dataset.ExecuteSQL(
+            SQL_RTREE_ENTRIES_TEMPLATE.format(
+                index_name=rtree_index_name(table_name, column_name)
+            )
+        )
+        if entries is None:
+            return EnvelopeCheck(table_name, [table_name], [])
+        envelopes = dataset.ExecuteSQL(
+            SQL_GEOMETRY_ENVELOPES_TEMPLATE.format(
+                table_name=table_name, column_name=column_name
+            )
+        )
+        if envelopes is None:
+            dataset.ReleaseResultSet(entries)
+            raise IOError(f"Could not read the geometries of table: {table_name}")
+
+    def gdal_envelopes():
+        for row_id, no_entry, *envelope in envelopes:
+            if no_entry:
+                yield row_id, None
+            elif None in envelope:
+                yield row_id, UNREADABLE
+            else:
+                yield row_id, tuple(envelope)
+
+    try:
+        differences = count_differences(
+            envelope_differences((tuple(entry) for entry in entries), gdal_envelopes())
+        )
+    finally:
+        dataset.ReleaseResultSet(entries)
+        dataset.ReleaseResultSet(envelopes)
+    return EnvelopeCheck(table_name, [], differences)
 
-    dataset.ReleaseResultSet(indexes)
+
+def log_progress(table_name: str, status: str, seconds: float) -> None:
+    logger.info("rtree index of table %s: %s (%.1f s)", table_name, status, seconds)
 
 
 class ValidRtreeValidator(validator.Validator):
@@ -46,10 +464,68 @@ class ValidRtreeValidator(validator.Validator):
     code = 10
     level = validator.ValidationLevel.ERROR
     message = "Invalid rtree index found for table: {table_name}"
+    timeout_message = "Rtree index of table: {table_name} could not be checked within {timeout} seconds"
+    envelope_message = "Rtree index of table: {table_name} {difference}, {count} {count_label}, example id {row_id}"
+    envelope_differences = {
+        ENVELOPE_MISSING: "has no entry for a geometry",
+        ENVELOPE_EXTRA: "has an entry without geometry",
+        ENVELOPE_MISMATCH: "has an entry that does not match the envelope of the geometry",
+    }
+
+    def __init__(self, dataset, **kwargs):
+        super().__init__(dataset, **kwargs)
+        self.table_cache: Optional[TableCache] = kwargs.get("table_cache")
+        self.jobs: int = kwargs.get("jobs") or 1
+        self.timeout: Optional[float] = kwargs.get("rtree_timeout")
+        self.mode: str = kwargs.get("rtree_mode") or RTREE_MODE_RTREECHECK
+        self.progress: Callable[[str, str, float], None] = (
+            kwargs.get("rtree_progress") or log_progress
+        )
 
     def check(self) -> Iterable[str]:
-        rtree_index_list = rtree_valid_check_query(self.dataset)
-        return self.check_rtree_is_valid(rtree_index_list)
+        rtree_index_list = []
+        results = []
+        if self.mode in (RTREE_MODE_RTREECHECK, RTREE_MODE_BOTH):
+            for check in rtree_checks(
+                self.dataset,
+                self.table_cache,
+                self.timings,
+                self.catalog,
+                self.jobs,
+                self.timeout,
+                self.progress,
+            ):
+                rtree_index_list.extend(check.messages)
+                if check.timed_out:
+                    results.append(
+                        self.timeout_message.format(
+                            table_name=check.table_name, timeout=self.timeout
+                        )
+                    )
+        if self.mode in (RTREE_MODE_ENVELOPE, RTREE_MODE_BOTH):
+            for check in envelope_checks(
+                self.dataset,
+                self.table_cache,
+                self.timings,
+                self.catalog,
+                self.progress,
+            ):
+                rtree_index_list.extend(
+                    message
+                    for message in check.messages
+                    if message not in rtree_index_list
+                )
+                results.extend(
+                    self.envelope_message.format(
+                        table_name=check.table_name,
+                        difference=self.envelope_differences[difference],
+                        count=count,
+                        count_label=("time" if count == 1 else "times"),
+                        row_id=row_id,
+                    )
+                    for difference, count, row_id in check.differences
+                )
+        return self.check_rtree_is_valid(rtree_index_list) + results
 
     @classmethod
     def check_rtree_is_valid(cls, rtree_index_list: Iterable[str]):
@@ -1,5 +1,6 @@
-from typing import Iterable, Tuple
+from typing import Iterable, Optional, Tuple
 
+from geopackage_validator.catalog import Catalog
 from geopackage_validator.constants import (
     ALLOWED_PROJECTIONS_LIST,
     LEGACY_ALLOWED_PROJECTIONS_LIST,
@@ -8,27 +9,22 @@ from geopackage_validator.constants import (
 from geopackage_validator.validations import validator
 
 
-def srs_check_query(dataset) -> Iterable[Tuple[str, str]]:
-    srs_list = dataset.ExecuteSQL(
-        """
-        SELECT organization, organization_coordsys_id AS id, srs_name 
-        FROM gpkg_geometry_columns 
-        JOIN gpkg_spatial_ref_sys gsrs on gsrs.srs_id = gpkg_geometry_columns.srs_id;"""
-    )
+def srs_check_query(
+    dataset, catalog: Optional[Catalog] = None
+) -> Iterable[Tuple[str, str]]:
+    catalog = catalog or Catalog(dataset)
 
-    for organization, organization_coordsys_id, srs_name in srs_list:
-        yield organization, organization_coordsys_id, srs_name
+    for column in catalog.geometry_columns:
+        srs = catalog.spatial_ref_sys.get(column.srs_id)
+        if srs is not None:
+            yield srs.organization, srs.organization_coordsys_id, srs.srs_name
 
-    dataset.ReleaseResultSet(srs_list)
 
+def srs_equal_check_query(dataset, catalog: Optional[Catalog] = None) -> Iterable[str]:
+    catalog = catalog or Catalog(dataset)
 
-def srs_equal_check_query(dataset) -> Iterable[str]:
-    srs_list = dataset.ExecuteSQL("SELECT srs_id FROM gpkg_geometry_columns;")
-
-    for (srs,) in srs_list:
-        yield srs
-
-    dataset.ReleaseResultSet(srs_list)
+    for column in catalog.geometry_columns:
+        yield column.srs_id
 
 
 class SrsValidatorV0(validator.Validator):
@@ -39,7 +35,7 @@ class SrsValidatorV0(validator.Validator):
     message = "Found in 'gpkg_spatial_ref_sys' {srs_organisation} {srs_id}. {srs_name} is not allowed."
 
     def check(self) -> Iterable[str]:
-        srs_metadata = srs_check_query(self.dataset)
+        srs_metadata = srs_check_query(self.dataset, self.catalog)
         return self.srs_check(srs_metadata)
 
     @classmethod
@@ -80,7 +76,7 @@ class SrsValidator(validator.Validator):
     message = "Found in 'gpkg_spatial_ref_sys' {srs_organisation} {srs_id}. {srs_name} is not allowed."
 
     def check(self) -> Iterable[str]:
-        srs_metadata = srs_check_query(self.dataset)
+        srs_metadata = srs_check_query(self.dataset, self.catalog)
         return self.srs_check(srs_metadata)
 
     @classmethod
@@ -121,7 +117,7 @@ class SrsEqualValidator(validator.Validator):
     message = "Found srs are: {srs}."
 
     def check(self) -> Iterable[str]:
-        srs_list = srs_equal_check_query(self.dataset)
+        srs_list = srs_equal_check_query(self.dataset, self.catalog)
         return self.check_srs_equal(srs_list)
 
     def check_srs_equal(self, srs_list: Iterable[str]):
@@ -168,14 +168,14 @@ class TableDefinitionValidator(validator.Validator):
     level = validator.ValidationLevel.ERROR
 
     def __init__(self, dataset, **kwargs):
-        super().__init__(dataset)
+        super().__init__(dataset, **kwargs)
         self.table_definitions: TablesDefinition = kwargs.get("table_definitions")
 
     def check(self) -> Iterable[str]:
         if self.table_definitions is None:
             return ["Missing '--table-definitions-path' input"]
         current_definitions = generate_table_definitions(
-            self.dataset, self.table_definitions.with_indexes_and_fks()
+            self.dataset, self.table_definitions.with_indexes_and_fks(), self.catalog
         )
         return (
             self.check_table_definitions(current_definitions)
@@ -210,11 +210,13 @@ class TableDefinitionValidatorV0(validator.Validator):
     level = validator.ValidationLevel.ERROR
 
     def __init__(self, dataset, **kwargs):
-        super().__init__(dataset)
+        super().__init__(dataset, **kwargs)
         self.table_definitions = kwargs.get("table_definitions")
 
     def check(self) -> Iterable[str]:
-        current_definitions = generate_table_definitions(self.dataset)
+        current_definitions = generate_table_definitions(
+            self.dataset, catalog=self.catalog
+        )
         return self.check_table_definitions(current_definitions)
 
     def check_table_definitions(self, definitions_current: TablesDefinition):
@@ -1,8 +1,12 @@
-from typing import Iterable, List, Dict
+from typing import Iterable, List, Dict, Optional
 from abc import ABC, abstractmethod
 from enum import IntEnum
+from itertools import islice
 from osgeo import gdal
 
+from geopackage_validator.catalog import Catalog
+from geopackage_validator.timings import Timings
+
 
 class ValidationLevel(IntEnum):
     UNKNOWN_ERROR = 0
@@ -60,10 +64,20 @@ class Validator(ABC):
 
     def __init__(self, dataset, **kwargs):
         self.dataset: gdal.Dataset = dataset
+        self.max_violations: Optional[int] = kwargs.get("max_violations")
+        self.timings: Optional[Timings] = kwargs.get("timings")
+        self.catalog: Catalog = kwargs.get("catalog") or Catalog(dataset)
+        self.truncated = False
 
     def validate(self) -> Dict[str, List[str]]:
-        """Run validation at geopackage."""
-        results = list(self.check())
+        """Run validation at geopackage, stopping after max_violations results when given."""
+        results = self.check()
+        if self.max_violations is not None:
+            # One more than max_violations tells whether any result is cut off.
+            results = list(islice(results, self.max_violations + 1))
+            self.truncated = len(results) > self.max_violations
+            results = results[: self.max_violations]
+        results = list(results)
         if results:
             return format_result(
                 validation_code=self.validation_code,
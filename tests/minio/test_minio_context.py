@@ -15,6 +15,7 @@ def test_minio_context(mocker):
     bucket_exists_stub = mocker.stub(name="bucket_exists_stub")
     stat_object_stub = mocker.stub(name="stat_object_stub")
     fget_object_stub = mocker.stub(name="fget_object_stub")
+    stat_object_stub.return_value.size = 0
 
     stub = Minio
     stub.bucket_exists = bucket_exists_stub
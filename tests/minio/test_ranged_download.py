@@ -0,0 +1,154 @@
+import os
+import threading
+from collections import namedtuple
+
+import pytest
+
+from geopackage_validator import s3
+from geopackage_validator.s3 import minio_resource, part_ranges
+
+Stat = namedtuple("Stat", ["size", "etag"])
+DiskUsage = namedtuple("DiskUsage", ["total", "used", "free"])
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+        self.released = False
+
+    def stream(self, amt):
+        for start in range(0, len(self.data), amt):
+            yield self.data[start : start + amt]
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        self.released = True
+
+
+class FakeMinio:
+    """Local stand-in for a MinIO server holding a single object."""
+
+    content = b""
+    etag = "etag"
+
+    def __init__(self, endpoint, access_key=None, secret_key=None, secure=True):
+        self.ranges = []
+        self.fget_calls = 0
+        self.lock = threading.Lock()
+
+    def bucket_exists(self, bucket_name):
+        return True
+
+    def stat_object(self, bucket_name, object_name):
+        return Stat(len(self.content), self.etag)
+
+    def get_object(
+        self, bucket_name, object_name, offset=0, length=0, request_headers=None
+    ):
+        assert request_headers == {"If-Match": self.etag}
+        with self.lock:
+            self.ranges.append((offset, length))
+        return FakeResponse(self.content[offset : offset + length])
+
+    def fget_object(self, bucket_name, object_name, file_path):
+        self.fget_calls += 1
+        with open(file_path, "wb") as f:
+            f.write(self.content)
+
+
+@pytest.fixture
+def fake_minio():
+    clients = []
+
+    class Client(FakeMinio):
+        content = os.urandom(10 * 1024 + 17)
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            clients.append(self)
+
+    Client.clients = clients
+    return Client
+
+
+def test_part_ranges():
+    assert part_ranges(10, 4) == [(0, 4), (4, 4), (8, 2)]
+    assert part_ranges(8, 4) == [(0, 4), (4, 4)]
+
+
+def test_ranged_download(fake_minio, tmp_path):
+    with minio_resource(
+        "endpoint",
+        "access",
+        "secret",
+        "bucket",
+        "key",
+        minio=fake_minio,
+        part_size=1024,
+        concurrency=4,
+        temp_dir=str(tmp_path),
+    ) as localfilename:
+        assert os.path.dirname(localfilename) == str(tmp_path)
+        with open(localfilename, "rb") as f:
+            assert f.read() == fake_minio.content
+    client = fake_minio.clients[0]
+    assert sorted(client.ranges) == part_ranges(len(fake_minio.content), 1024)
+    assert client.fget_calls == 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_small_object_single_download(fake_minio, tmp_path):
+    with minio_resource(
+        "endpoint",
+        "access",
+        "secret",
+        "bucket",
+        "key",
+        minio=fake_minio,
+        part_size=1024 * 1024,
+        temp_dir=str(tmp_path),
+    ) as localfilename:
+        with open(localfilename, "rb") as f:
+            assert f.read() == fake_minio.content
+    assert fake_minio.clients[0].fget_calls == 1
+    assert fake_minio.clients[0].ranges == []
+
+
+def test_not_enough_disk_space(fake_minio, tmp_path, monkeypatch):
+    monkeypatch.setattr(s3.shutil, "disk_usage", lambda path: DiskUsage(100, 90, 10))
+    with pytest.raises(IOError, match="Not enough free disk space"):
+        with minio_resource(
+            "endpoint",
+            "access",
+            "secret",
+            "bucket",
+            "key",
+            minio=fake_minio,
+            temp_dir=str(tmp_path),
+        ):
+            pass
+    assert os.listdir(tmp_path) == []
+
+
+def test_incomplete_part_fails(fake_minio, tmp_path):
+    class TruncatingMinio(fake_minio):
+        def get_object(self, *args, **kwargs):
+            response = super().get_object(*args, **kwargs)
+            response.data = response.data[:-1]
+            return response
+
+    with pytest.raises(IOError):
+        with minio_resource(
+            "endpoint",
+            "access",
+            "secret",
+            "bucket",
+            "key",
+            minio=TruncatingMinio,
+            part_size=1024,
+            temp_dir=str(tmp_path),
+        ):
+            pass
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from geopackage_validator.aio import AsyncValidationPool
+from geopackage_validator.validate import validate
+
+
+def run_in_pool(coroutine_function):
+    async def run():
+        pool = AsyncValidationPool(1)
+        try:
+            return await coroutine_function(pool)
+        finally:
+            pool.close()
+
+    return asyncio.run(run())
+
+
+def test_validate_async_gives_same_report():
+    gpkg_path = "tests/data/test_layername.gpkg"
+
+    async def validate_twice(pool):
+        first = await pool.validate(gpkg_path, validations="ALL")
+        # The second validation reuses the worker of the first.
+        second = await pool.validate(gpkg_path, validations="ALL")
+        return first, second, len(pool._idle)
+
+    first, second, idle = run_in_pool(validate_twice)
+    assert first == second == validate(gpkg_path, validations="ALL")
+    assert idle == 1
+
+
+def test_iterate_yields_every_validator():
+    async def iterate(pool):
+        details = {}
+        results = [
+            result
+            async for result in pool.iterate(
+                "tests/data/test_layername.gpkg",
+                details=details,
+                validations="RQ1,RQ2",
+                timings=True,
+            )
+        ]
+        return results, details
+
+    results, details = run_in_pool(iterate)
+    assert [result.validation_code for result in results] == ["RQ1", "RQ2"]
+    assert [result.success for result in results] == [False, True]
+    assert results[0].results[0]["validation_code"] == "RQ1"
+    assert len(details["timings"]) == 2
+
+
+def test_cancelled_validation_kills_the_worker():
+    async def cancel(pool):
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                pool.validate("tests/data/test_allcorrect.gpkg"), 0.001
+            )
+        return len(pool._idle)
+
+    assert run_in_pool(cancel) == 0
@@ -0,0 +1,40 @@
+import os
+
+from geopackage_validator.batch import collect_gpkg_paths, validate_batch
+from geopackage_validator.validate import validate
+
+
+def test_collect_gpkg_paths_largest_first(tmp_path):
+    file_list = tmp_path / "files.txt"
+    file_list.write_text("tests/data/test_layername.gpkg\n\n")
+    paths = collect_gpkg_paths(
+        ["tests/data/test_geometry_*.gpkg", "tests/data/test_layername.gpkg"],
+        str(file_list),
+    )
+    assert paths.count("tests/data/test_layername.gpkg") == 1
+    assert "tests/data/test_geometry_valid.gpkg" in paths
+    sizes = [os.path.getsize(path) for path in paths]
+    assert sizes == sorted(sizes, reverse=True)
+
+
+def test_collect_gpkg_paths_directory():
+    paths = collect_gpkg_paths(["tests/data"])
+    assert "tests/data/test_allcorrect.gpkg" in paths
+    assert all(path.endswith(".gpkg") for path in paths)
+
+
+def test_validate_batch_gives_same_results_as_validate():
+    gpkg_paths = [
+        "tests/data/test_layername.gpkg",
+        "tests/data/test_geometry_valid.gpkg",
+        "tests/data/test_broken_geopackage.gpkg",
+    ]
+    reports = {
+        report["geopackage"]: report
+        for report in validate_batch(gpkg_paths, validations="ALL", jobs=2)
+    }
+    for gpkg_path in gpkg_paths:
+        results, validations_executed, success = validate(gpkg_path, validations="ALL")
+        assert reports[gpkg_path]["results"] == results
+        assert reports[gpkg_path]["validations_executed"] == validations_executed
+        assert reports[gpkg_path]["success"] == success
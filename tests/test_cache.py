@@ -0,0 +1,184 @@
+import os
+import shutil
+import sqlite3
+from contextlib import closing
+
+from osgeo import ogr
+
+from geopackage_validator import utils
+from geopackage_validator.cache import ResultCache, TableCache
+from geopackage_validator.validate import validate
+from geopackage_validator.validations.layername_check import LayerNameValidator
+
+
+def test_key_depends_on_content_and_validations(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    copy = tmp_path / "copy.gpkg"
+    shutil.copy2("tests/data/test_layername.gpkg", copy)
+
+    key = cache.key("tests/data/test_layername.gpkg", ["RQ1"])
+    assert key == cache.key(str(copy), ["RQ1"])
+    assert key != cache.key(str(copy), ["RQ1", "RQ2"])
+    assert key != cache.key("tests/data/test_allcorrect.gpkg", ["RQ1"])
+    assert key != cache.key(str(copy), ["RQ1"], options={"fail_fast": True})
+    assert cache.key("/vsis3/bucket/key.gpkg", ["RQ1"]) is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path), max_size=100)
+    cache.put("a", {"results": ["x" * 30]})
+    os.utime(cache.entry_path("a"), (1, 1))
+    cache.put("b", {"results": ["x" * 30]})
+    os.utime(cache.entry_path("b"), (2, 2))
+    assert cache.get("a") is not None
+    cache.put("c", {"results": ["x" * 30]})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+    cache.purge()
+    assert cache.get("a") is None
+
+
+def test_eviction_lists_the_cache_only_when_full(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path), max_size=100)
+    listings = []
+    entries = cache.entries
+
+    def counted_entries():
+        listings.append(1)
+        return entries()
+
+    monkeypatch.setattr(cache, "entries", counted_entries)
+    cache.put("a", {"results": ["x" * 30]})
+    os.utime(cache.entry_path("a"), (1, 1))
+    cache.put("b", {"results": ["x" * 30]})
+    assert len(listings) == 1
+    cache.put("c", {"results": ["x" * 30]})
+    assert len(listings) == 2
+    assert cache.get("a") is None
+
+
+def test_validate_uses_cache_without_opening_dataset(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path))
+    first = validate(
+        gpkg_path="tests/data/test_layername.gpkg", validations="ALL", cache=cache
+    )
+
+    def open_dataset(*args, **kwargs):
+        raise AssertionError("dataset opened")
+
+    monkeypatch.setattr(utils, "open_dataset", open_dataset)
+    second = validate(
+        gpkg_path="tests/data/test_layername.gpkg", validations="ALL", cache=cache
+    )
+    assert second == first
+
+
+def test_validate_does_not_cache_exceptions(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path))
+
+    def check(self):
+        raise RuntimeError("unexpected")
+
+    monkeypatch.setattr(LayerNameValidator, "check", check)
+    results, _, _ = validate(
+        gpkg_path="tests/data/test_layername.gpkg", validations="RQ1", cache=cache
+    )
+    assert [result["validation_code"] for result in results] == ["UNKNOWN_WARNINGS"]
+    assert list(cache.entries()) == []
+
+
+def test_table_fingerprint_changes_with_table(tmp_path):
+    gpkg_path = str(tmp_path / "copy.gpkg")
+    shutil.copy2("tests/data/test_geometry_valid.gpkg", gpkg_path)
+    cache = ResultCache(str(tmp_path / "cache"))
+
+    table_cache = TableCache(cache, utils.open_dataset(gpkg_path))
+    fingerprint = table_cache.fingerprint("test_geometry_valid", "geometry")
+    assert fingerprint == TableCache(
+        cache, utils.open_dataset("tests/data/test_geometry_valid.gpkg")
+    ).fingerprint("test_geometry_valid", "geometry")
+
+    dataset = ogr.Open(gpkg_path, update=True)
+    layer = dataset.GetLayerByName("test_geometry_valid")
+    layer.DeleteFeature(layer.GetNextFeature().GetFID())
+    dataset = None
+
+    assert fingerprint != TableCache(cache, utils.open_dataset(gpkg_path)).fingerprint(
+        "test_geometry_valid", "geometry"
+    )
+
+
+def test_table_fingerprint_changes_with_geometry_update(tmp_path):
+    gpkg_path = str(tmp_path / "copy.gpkg")
+    shutil.copy2("tests/data/test_geometry_valid.gpkg", gpkg_path)
+    cache = ResultCache(str(tmp_path / "cache"))
+    fingerprint = TableCache(cache, utils.open_dataset(gpkg_path)).fingerprint(
+        "test_geometry_valid", "geometry"
+    )
+
+    # An in place update of the last geometry, which leaves the row count, rowids and
+    # gpkg_contents.last_change alone. The rtree triggers need spatialite functions.
+    with closing(sqlite3.connect(gpkg_path)) as connection:
+        for (name,) in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'rtree_%'"
+        ).fetchall():
+            connection.execute(f'DROP TRIGGER "{name}"')
+        connection.execute(
+            "UPDATE test_geometry_valid SET geometry = "
+            "(SELECT geometry FROM test_geometry_valid ORDER BY rowid LIMIT 1) "
+            "WHERE rowid = (SELECT max(rowid) FROM test_geometry_valid)"
+        )
+        connection.commit()
+
+    assert fingerprint != TableCache(cache, utils.open_dataset(gpkg_path)).fingerprint(
+        "test_geometry_valid", "geometry"
+    )
+
+
+def test_rtree_results_depend_on_the_index(tmp_path):
+    gpkg_path = str(tmp_path / "copy.gpkg")
+    shutil.copy2("tests/data/test_allcorrect.gpkg", gpkg_path)
+    cache = ResultCache(str(tmp_path / "cache"))
+    index_name = "rtree_test_allcorrect_geom"
+
+    table_cache = TableCache(cache, utils.open_dataset(gpkg_path))
+    table_cache.put("rtree_valid", "test_allcorrect", "geom", [], index_name)
+    assert table_cache.get("rtree_valid", "test_allcorrect", "geom", index_name) == []
+
+    with closing(sqlite3.connect(gpkg_path)) as connection:
+        connection.execute(
+            f"UPDATE {index_name}_node SET data = zeroblob(length(data))"
+        )
+        connection.commit()
+
+    table_cache = TableCache(cache, utils.open_dataset(gpkg_path))
+    assert table_cache.fingerprint("test_allcorrect", "geom") == TableCache(
+        cache, utils.open_dataset("tests/data/test_allcorrect.gpkg")
+    ).fingerprint("test_allcorrect", "geom")
+    assert table_cache.get("rtree_valid", "test_allcorrect", "geom", index_name) is None
+
+
+def test_validate_reuses_unchanged_tables(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    details = {}
+    first = validate(
+        gpkg_path="tests/data/test_geometry_valid.gpkg",
+        validations="RQ23,RQ24",
+        cache=cache,
+        details=details,
+    )
+    assert details["tables_rescanned"] == ["test_geometry_valid"]
+    assert details["tables_reused"] == []
+
+    details = {}
+    second = validate(
+        gpkg_path="tests/data/test_geometry_valid.gpkg",
+        validations="RQ1,RQ23,RQ24",
+        cache=cache,
+        details=details,
+    )
+    assert details["tables_rescanned"] == []
+    assert details["tables_reused"] == ["test_geometry_valid"]
+    assert second[0] == first[0]
@@ -0,0 +1,48 @@
+from geopackage_validator import sql_trace
+from geopackage_validator.catalog import Catalog
+from geopackage_validator.utils import open_dataset, dataset_geometry_tables
+from geopackage_validator.validations import (
+    ColumnNameValidator,
+    FeatureIdValidator,
+    NameLengthValidator,
+)
+
+
+def test_geometry_tables():
+    dataset = open_dataset("tests/data/test_geom_columnname.gpkg")
+    assert Catalog(dataset).geometry_tables == dataset_geometry_tables(dataset)
+
+
+def test_table_columns():
+    dataset = open_dataset("tests/data/test_columnname.gpkg")
+    columns = Catalog(dataset).table_columns("test_columnname")
+    assert [column.name for column in columns] == ["fid", "GEOmetry"]
+    assert [column.pk for column in columns] == [1, 0]
+
+
+def test_indexes_and_foreign_keys():
+    dataset = open_dataset("tests/data/test_allcorrect_with_indexes_and_fks.gpkg")
+    catalog = Catalog(dataset)
+    indexes = {
+        tuple(index.columns): index.unique for index in catalog.indexes("test_foreign")
+    }
+    assert indexes[("name",)] is True
+    assert indexes[("x", "y")] is False
+    references = catalog.foreign_keys("test_multi_fk")
+    assert sorted((r.table, r.from_column) for r in references) == [
+        ("test_allcorrect", "allcorrect_id"),
+        ("test_other", "other_id"),
+        ("test_other", "other_name"),
+    ]
+
+
+def test_validators_share_the_catalog(tmp_path):
+    trace_path = str(tmp_path / "trace.jsonl")
+    dataset = open_dataset("tests/data/test_allcorrect_with_indexes_and_fks.gpkg")
+    sql_trace.install(dataset, trace_path)
+    catalog = Catalog(dataset)
+    for validator in (ColumnNameValidator, FeatureIdValidator, NameLengthValidator):
+        validator(dataset, catalog=catalog).validate()
+    statements = [record["sql"] for record in sql_trace.read_trace(trace_path)]
+    # One query for the geometry columns and one for the columns of all tables.
+    assert len(statements) == 2
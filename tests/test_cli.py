@@ -1,9 +1,10 @@
 import json
+from contextlib import contextmanager
 
 import pytest
 from click.testing import CliRunner
 
-from geopackage_validator import __version__
+from geopackage_validator import __version__, s3
 from geopackage_validator.cli import cli
 
 
@@ -33,6 +34,51 @@ def test_generate_definitions_error_s3():
     assert "S3 access key has to be given" in result.output
 
 
+def test_generate_definitions_with_s3_key(tmp_path, monkeypatch):
+    downloads = []
+
+    @contextmanager
+    def local_resource(*args, **kwargs):
+        downloads.append(kwargs)
+        yield "tests/data/test_allcorrect.gpkg"
+
+    monkeypatch.setattr(s3, "minio_resource", local_resource)
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        [
+            "generate-definitions",
+            "--s3-endpoint-no-protocol",
+            "s3host",
+            "--s3-access-key",
+            "key",
+            "--s3-secret-key",
+            "secret",
+            "--s3-bucket",
+            "bucket",
+            "--s3-key",
+            "test_allcorrect.gpkg",
+            "--s3-part-size",
+            "16",
+            "--s3-concurrency",
+            "2",
+            "--temp-dir",
+            str(tmp_path),
+        ],
+    )
+    if result.exit_code != 0:
+        print(result.output)
+    assert result.exit_code == 0
+    assert json.loads(result.output)["tables"][0]["name"] == "test_allcorrect"
+    assert downloads == [
+        {
+            "part_size": 16 * 1024 * 1024,
+            "concurrency": 2,
+            "temp_dir": str(tmp_path),
+        }
+    ]
+
+
 def test_generate_definitions_with_gpkg():
     runner = CliRunner()
     result = runner.invoke(
@@ -305,6 +351,35 @@ def test_validate_with_gpkg():
     assert '"success": true' in result.output
 
 
+def test_validate_stream_ndjson():
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        [
+            "validate",
+            "--gpkg-path",
+            "tests/data/test_layername.gpkg",
+            "--validations",
+            "RQ1,RQ2",
+            "--stream",
+        ],
+    )
+    assert result.exit_code == 0
+    records = [json.loads(line) for line in result.output.splitlines()]
+    assert [record["record"] for record in records] == [
+        "validation",
+        "validation",
+        "summary",
+    ]
+    rq1, rq2, summary = records
+    assert rq1["validation_code"] == "RQ1" and not rq1["success"]
+    assert rq1["results"][0]["validation_code"] == "RQ1"
+    assert rq2["validation_code"] == "RQ2" and rq2["results"] == []
+    assert summary["validations_executed"] == ["RQ1", "RQ2"]
+    assert not summary["success"]
+    assert summary["results"] == []
+
+
 def test_validate_with_rq8_missing_definitions_path():
     runner = CliRunner()
     result = runner.invoke(
@@ -367,3 +442,30 @@ def test_validate_with_rq8_with_old_definitions_path():
     )
     assert result.exit_code == 0
     assert "RQ8" in result.output
+
+
+def test_validate_batch_ndjson():
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        [
+            "validate-batch",
+            "tests/data/test_allcorrect.gpkg",
+            "tests/data/test_layername.gpkg",
+            "--jobs",
+            "2",
+        ],
+    )
+    assert result.exit_code == 0
+    reports = [json.loads(line) for line in result.output.splitlines()]
+    assert {report["geopackage"]: report["success"] for report in reports} == {
+        "tests/data/test_allcorrect.gpkg": True,
+        "tests/data/test_layername.gpkg": False,
+    }
+
+
+def test_validate_batch_no_gpkg():
+    runner = CliRunner()
+    result = runner.invoke(cli, ["validate-batch"])
+    assert result.exit_code == 1
+    assert "No geopackages found" in result.output
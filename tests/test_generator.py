@@ -0,0 +1,40 @@
+from benchmarks.generator import SyntheticConfig, generate
+from geopackage_validator import utils
+
+
+def dataset_content(gpkg_path):
+    dataset = utils.open_dataset(gpkg_path)
+    return {
+        layer.GetName(): [feature.ExportToJson() for feature in layer]
+        for layer in dataset
+    }
+
+
+def test_generate_is_deterministic(tmp_path):
+    config = SyntheticConfig(
+        tables=2,
+        rows_per_table=20,
+        geometry_types=["POLYGON", "POINT"],
+        with_z=True,
+        error_rate=0.2,
+        attribute_tables=1,
+        attribute_rows=10,
+        foreign_keys_per_table=2,
+    )
+    first = generate(config, str(tmp_path / "first.gpkg"))
+    second = generate(config, str(tmp_path / "second.gpkg"))
+    assert dataset_content(first) == dataset_content(second)
+
+
+def test_generate_tables(tmp_path):
+    config = SyntheticConfig(
+        tables=3, rows_per_table=10, attribute_tables=2, attribute_rows=5
+    )
+    content = dataset_content(generate(config, str(tmp_path / "synthetic.gpkg")))
+    assert {name: len(rows) for name, rows in content.items()} == {
+        "polygon_0": 10,
+        "polygon_1": 10,
+        "polygon_2": 10,
+        "attributes_0": 5,
+        "attributes_1": 5,
+    }
@@ -0,0 +1,274 @@
+import sqlite3
+import struct
+from array import array
+from math import isnan, nan
+from random import Random
+
+import pytest
+
+from geopackage_validator import gpkg_binary
+from geopackage_validator.gpkg_binary import GeometryDecodeError, decode, decode_batch
+
+
+def gpb(wkb: bytes, srs_id=28992, envelope=(), empty=False, little_endian=True):
+    indicator = {0: 0, 4: 1, 6: 2, 8: 4}[len(envelope)]
+    flags = (indicator << 1) | (0b10000 if empty else 0) | int(little_endian)
+    byte_order = "<" if little_endian else ">"
+    return (
+        b"GP"
+        + bytes([0, flags])
+        + struct.pack(f"{byte_order}i{len(envelope)}d", srs_id, *envelope)
+        + wkb
+    )
+
+
+def wkb_points(code, points, byte_order="<", count=True):
+    flat = [value for point in points for value in point]
+    head = struct.pack(f"{byte_order}BI", byte_order == "<", code)
+    if count:
+        head += struct.pack(f"{byte_order}I", len(points))
+    return head + struct.pack(f"{byte_order}{len(flat)}d", *flat)
+
+
+def wkb_polygon(code, rings, byte_order="<"):
+    body = struct.pack(f"{byte_order}BII", byte_order == "<", code, len(rings))
+    for ring in rings:
+        flat = [value for point in ring for value in point]
+        body += struct.pack(f"{byte_order}I{len(flat)}d", len(ring), *flat)
+    return body
+
+
+def wkb_collection(code, parts, byte_order="<"):
+    return struct.pack(
+        f"{byte_order}BII", byte_order == "<", code, len(parts)
+    ) + b"".join(parts)
+
+
+SQUARE = [(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)]
+
+
+@pytest.fixture(params=["python", "numpy"])
+def vectorized(request, monkeypatch):
+    """Runs the test with the plain Python and with the numpy coordinate loops."""
+    if request.param == "python":
+        monkeypatch.setattr(gpkg_binary, "numpy", None)
+    else:
+        monkeypatch.setattr(gpkg_binary, "numpy", pytest.importorskip("numpy"))
+        monkeypatch.setattr(gpkg_binary, "VECTORIZE_MIN_VERTICES", 1)
+    return request.param
+
+
+def test_decode_point():
+    geometry = decode(gpb(wkb_points(1, [(1.5, 2.5)], count=False), envelope=()))
+    assert geometry.geometry_type == gpkg_binary.POINT
+    assert (geometry.has_z, geometry.has_m, geometry.empty) == (False, False, False)
+    assert geometry.srs_id == 28992
+    assert list(geometry.coordinates) == [1.5, 2.5]
+
+
+def test_decode_big_endian_linestring_z_with_envelope():
+    wkb = wkb_points(1002, [(0, 0, 5), (1, 1, 6)], byte_order=">")
+    geometry = decode(gpb(wkb, envelope=(0, 1, 0, 1, 5, 6), little_endian=False))
+    assert geometry.geometry_type == gpkg_binary.LINESTRING
+    assert geometry.has_z and not geometry.has_m
+    assert geometry.envelope == (0, 1, 0, 1, 5, 6)
+    assert list(geometry.coordinates) == [0, 0, 5, 1, 1, 6]
+
+
+def test_decode_multipolygon_rings():
+    hole = [(0.2, 0.2, 0), (0.2, 0.4, 0), (0.4, 0.4, 0), (0.2, 0.2, 0)]
+    square_m = [(x, y, 7) for x, y in SQUARE]
+    wkb = wkb_collection(
+        2006,
+        [wkb_polygon(2003, [square_m, hole]), wkb_polygon(2003, [square_m])],
+    )
+    geometry = decode(gpb(wkb))
+    assert geometry.geometry_type == gpkg_binary.MULTIPOLYGON
+    assert geometry.has_m and not geometry.has_z
+    assert geometry.polygons == [[(0, 5), (5, 4)], [(9, 5)]]
+    assert len(geometry.coordinates) == 14 * 3
+
+
+def test_decode_ewkb_flags():
+    wkb = struct.pack("<BIi3d", 1, 0x80000001 | 0x20000000, 4326, 1, 2, 3)
+    geometry = decode(gpb(wkb))
+    assert geometry.geometry_type == gpkg_binary.POINT
+    assert geometry.has_z
+    assert list(geometry.coordinates) == [1, 2, 3]
+
+
+def test_decode_empty():
+    assert decode(gpb(wkb_points(1, [(nan, nan)], count=False), empty=True)).empty
+    assert decode(gpb(wkb_points(2, []))).empty
+    assert decode(gpb(wkb_collection(6, []))).empty
+
+
+@pytest.mark.parametrize(
+    "blob",
+    [
+        b"",
+        b"XX\x00\x01\x00\x00\x00\x00",
+        gpb(wkb_points(2, SQUARE))[:-3],
+        gpb(wkb_points(99, [(0, 0)], count=False)),
+        gpb(wkb_collection(1004, [wkb_points(1, [(0, 0)], count=False)])),
+    ],
+)
+def test_decode_errors(blob):
+    with pytest.raises(GeometryDecodeError):
+        decode(blob)
+
+
+def test_prefix_geometry_type():
+    line = gpb(wkb_points(1002, [(0, 0, 0)] * 100), envelope=(0,) * 6)
+    assert gpkg_binary.prefix_geometry_type(line[:61]) == gpkg_binary.LINESTRING
+    assert gpkg_binary.prefix_geometry_type(line[:60]) is None
+    assert gpkg_binary.prefix_geometry_type(b"not a geometry") is None
+
+
+def test_outline():
+    hole = [(0.2, 0.2), (0.2, 0.4), (0.4, 0.4), (0.2, 0.2)]
+    wkb = wkb_collection(
+        6, [wkb_polygon(3, [SQUARE, hole]), wkb_polygon(3, [])], byte_order=">"
+    )
+    outline = gpkg_binary.outline(gpb(wkb, envelope=(0, 1, 0, 1)))
+    assert outline == gpkg_binary.GeometryOutline(
+        0,
+        False,
+        False,
+        6,
+        False,
+        False,
+        2,
+        [(3, False, False, 2), (3, False, False, 0)],
+    )
+    outline = gpkg_binary.outline(gpb(wkb_points(0x80000002, [(0, 0, 1)] * 3)))
+    assert (outline.ewkb, outline.geometry_type, outline.has_z, outline.size) == (
+        True,
+        2,
+        True,
+        3,
+    )
+    with pytest.raises(GeometryDecodeError):
+        gpkg_binary.outline(gpb(wkb_points(2, SQUARE))[:-3])
+
+
+def test_outline_of_prefix():
+    polygon = gpb(wkb_polygon(3, [SQUARE] * 10))
+    outline = gpkg_binary.outline(polygon[:64], prefix=True)
+    assert (outline.geometry_type, outline.size) == (3, 10)
+    with pytest.raises(GeometryDecodeError):
+        gpkg_binary.outline(polygon[:64])
+    # The parts of a collection after the prefix are not known.
+    multipolygon = gpb(wkb_collection(6, [wkb_polygon(3, [SQUARE])] * 2))
+    with pytest.raises(GeometryDecodeError):
+        gpkg_binary.outline(multipolygon[:64], prefix=True)
+
+
+def test_ring_area(vectorized):
+    coordinates = array("d", [value for x, y in SQUARE for value in (x, y, 9)])
+    assert gpkg_binary.ring_area(coordinates, 3, 0, 5) == 1
+    reversed_square = array("d", [value for x, y in SQUARE[::-1] for value in (x, y)])
+    assert gpkg_binary.ring_area(reversed_square, 2, 0, 5) == -1
+    assert gpkg_binary.ring_area(reversed_square, 2, 1, 3) == -0.5
+    assert gpkg_binary.ring_area(reversed_square, 2, 0, 0) == 0
+
+
+def test_vectorized_ring_area_adds_in_order(monkeypatch):
+    pytest.importorskip("numpy")
+    # Nearly degenerate rings far from the origin, of which the sign of the area depends
+    # on the rounding of every term.
+    random = Random(20)
+    for _ in range(100):
+        count = random.randint(64, 500)
+        ring = [
+            (155_000 + random.random() * 1e-6, 463_000 + index * 1e-9)
+            for index in range(count - 1)
+        ]
+        coordinates = array(
+            "d", [value for point in ring + ring[:1] for value in point]
+        )
+        plain = gpkg_binary.ring_area(coordinates, 2, 0, count)
+        monkeypatch.setattr(gpkg_binary, "numpy", None)
+        assert gpkg_binary.ring_area(coordinates, 2, 0, count) == plain
+        monkeypatch.undo()
+
+
+def test_envelope(vectorized):
+    line = wkb_points(1002, [(0, 5, 1), (-1, 2, 3)])
+    assert gpkg_binary.envelope(gpb(line)) == (-1, 0, 2, 5)
+    assert gpkg_binary.envelope(gpb(line, envelope=(9, 9, 9, 9, 9, 9))) == (9,) * 4
+    assert gpkg_binary.envelope(gpb(wkb_points(2, []))) is None
+    empty_point = wkb_points(1, [(nan, nan)], count=False)
+    assert (
+        gpkg_binary.envelope(gpb(empty_point, envelope=(nan,) * 4, empty=True)) is None
+    )
+    with pytest.raises(GeometryDecodeError):
+        gpkg_binary.envelope(gpb(line)[:-3])
+
+
+def test_decode_batch(vectorized):
+    batch = decode_batch(
+        [
+            (1, gpb(wkb_points(3001, [(0, 0, 0, 2)], count=False))),
+            (2, None),
+            (3, b"not a geometry"),
+            (4, gpb(wkb_points(1002, [(0, 0, 3), (1, 1, nan), (2, 2, -1)]))),
+        ]
+    )
+    assert len(batch) == 4
+    assert list(batch.row_ids) == [1, 2, 3, 4]
+    assert list(batch.geometry_types) == [1, 0, 0, 2]
+    assert list(batch.ndims) == [4, 0, 0, 3]
+    assert (batch.z_min[0], batch.z_max[0], batch.m_min[0]) == (0, 0, 2)
+    assert (batch.z_min[3], batch.z_max[3]) == (-1, 3)
+    assert isnan(batch.m_min[3]) and isnan(batch.z_min[1])
+    assert batch.errors == [(3, "Not a GeoPackage binary geometry")]
+
+
+def test_iter_batches():
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE t (geom BLOB)")
+    connection.executemany(
+        "INSERT INTO t VALUES (?)",
+        [(gpb(wkb_points(1, [(i, i)], count=False)),) for i in range(25)],
+    )
+    batches = list(gpkg_binary.iter_batches(connection, "t", "geom", batch_size=10))
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert batches[2].row_ids[-1] == 25
+
+
+@pytest.mark.parametrize(
+    "blob, empty",
+    [
+        (gpb(wkb_points(1, [(nan, nan)], count=False), empty=True), True),
+        (gpb(wkb_points(2, []), empty=True), True),
+        (gpb(wkb_polygon(1003, [[(0, 0, 0)] * 4]), envelope=(0, 0, 0, 0)), False),
+        (gpb(wkb_collection(4, [wkb_points(1, [(nan, nan)], count=False)])), None),
+        (
+            gpb(
+                wkb_collection(7, [wkb_points(2, []), wkb_collection(5, [])]),
+                empty=True,
+            ),
+            True,
+        ),
+        (gpb(wkb_points(2, []), empty=False), None),
+        (gpb(wkb_points(1, [(1, 2)], count=False), empty=True), None),
+        (gpb(wkb_points(2, SQUARE))[:12], None),
+        (b"not a geometry", None),
+        ("GP", None),
+    ],
+)
+def test_prefix_empty(blob, empty):
+    assert gpkg_binary.prefix_empty(blob) is empty
+
+
+def test_iter_prefixes():
+    line = gpb(wkb_points(2, [(i, i) for i in range(1000)]))
+    assert len(line) > gpkg_binary.INLINE_BLOB_SIZE
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE t (geom BLOB)")
+    connection.executemany(
+        "INSERT INTO t VALUES (?)", [(line,), (None,), (line[:100],)]
+    )
+    prefixes = list(gpkg_binary.iter_prefixes(connection, "t", "geom", prefix_size=64))
+    assert prefixes == [(1, line[:64]), (2, None), (3, line[:64])]
@@ -0,0 +1,165 @@
+import http.client
+import json
+import threading
+import urllib.error
+import urllib.request
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import urlparse
+
+import pytest
+
+from geopackage_validator.server import (
+    JobError,
+    ValidationServer,
+    WorkerPool,
+    load_named_table_definitions,
+    referenced_geopackage,
+)
+
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(**pool_options):
+        pool = WorkerPool(
+            1,
+            table_definitions=load_named_table_definitions(
+                ["allcorrect=tests/data/test_allcorrect_definition.json"]
+            ),
+            **pool_options,
+        )
+        validation_server = ValidationServer(
+            ("127.0.0.1", 0), pool, data_dirs=["tests/data"]
+        )
+        threading.Thread(target=validation_server.serve_forever, daemon=True).start()
+        servers.append(validation_server)
+        return "http://127.0.0.1:{}".format(validation_server.server_address[1])
+
+    yield start
+    for validation_server in servers:
+        validation_server.shutdown()
+        validation_server.server_close()
+        validation_server.pool.close()
+
+
+def request(url, body=None):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=body)) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_validate_upload(start_server):
+    url = start_server()
+    body = Path("tests/data/test_allcorrect.gpkg").read_bytes()
+    status, report = request(
+        f"{url}/validate?table_definitions=allcorrect&filename=mine.gpkg", body
+    )
+    assert status == HTTPStatus.OK
+    assert report["geopackage"] == "mine.gpkg"
+    assert report["success"]
+    assert "RQ8" in report["validations_executed"]
+
+
+def test_validate_path(start_server):
+    url = start_server()
+    status, report = request(
+        f"{url}/validate?path=tests/data/test_layername.gpkg&validations=RQ1", b""
+    )
+    assert status == HTTPStatus.OK
+    assert report["geopackage"].endswith("tests/data/test_layername.gpkg")
+    assert report["validations_executed"] == ["RQ1"]
+    assert not report["success"]
+
+
+def test_validate_bad_requests(start_server):
+    url = start_server()
+    assert request(f"{url}/validate?path=/etc/passwd", b"")[0] == HTTPStatus.FORBIDDEN
+    assert (
+        request(
+            f"{url}/validate?path=tests/data/test_allcorrect.gpkg&table_definitions=x",
+            b"",
+        )[0]
+        == HTTPStatus.BAD_REQUEST
+    )
+    assert (
+        request(
+            f"{url}/validate?path=tests/data/test_allcorrect.gpkg&validations=RQ99", b""
+        )[0]
+        == HTTPStatus.BAD_REQUEST
+    )
+
+
+def test_generate_definitions(start_server):
+    url = start_server()
+    status, definitions = request(
+        f"{url}/generate-definitions?path=tests/data/test_allcorrect.gpkg", b""
+    )
+    assert status == HTTPStatus.OK
+    assert [table["name"] for table in definitions["tables"]] == ["test_allcorrect"]
+
+
+def test_health(start_server):
+    status, health = request(f"{start_server()}/health")
+    assert status == HTTPStatus.OK
+    assert health["workers"] == 1
+    assert health["table_definitions"] == ["allcorrect"]
+
+
+def test_job_timeout_replaces_worker(start_server):
+    url = start_server(job_timeout=0.001)
+    path = "tests/data/test_allcorrect.gpkg"
+    assert request(f"{url}/validate?path={path}", b"")[0] == HTTPStatus.GATEWAY_TIMEOUT
+    assert request(f"{url}/health")[1]["jobs_in_progress"] == 0
+
+
+def test_full_queue_is_refused():
+    pool = WorkerPool(1, queue_size=0)
+    try:
+        pool._slots.acquire()
+        with pytest.raises(JobError) as error:
+            pool.run("validate", gpkg_path="tests/data/test_allcorrect.gpkg")
+        assert error.value.status == HTTPStatus.SERVICE_UNAVAILABLE
+    finally:
+        pool._slots.release()
+        pool.close()
+
+
+def test_waiting_for_a_worker_is_bounded():
+    pool = WorkerPool(1, job_timeout=0.01)
+    worker = pool._idle.get()
+    try:
+        with pytest.raises(JobError) as error:
+            pool.run("validate", gpkg_path="tests/data/test_allcorrect.gpkg")
+        assert error.value.status == HTTPStatus.SERVICE_UNAVAILABLE
+        assert pool.jobs_in_progress == 0
+    finally:
+        pool._idle.put(worker)
+        pool.close()
+
+
+def test_invalid_content_length_is_refused(start_server):
+    url = start_server()
+    for length in ["abc", "-1"]:
+        connection = http.client.HTTPConnection(urlparse(url).netloc)
+        connection.putrequest("POST", "/validate")
+        connection.putheader("Content-Length", length)
+        connection.endheaders()
+        response = connection.getresponse()
+        assert response.status == HTTPStatus.BAD_REQUEST
+        assert json.loads(response.read()) == {"error": "invalid Content-Length"}
+        connection.close()
+
+
+def test_referenced_geopackage_stays_in_data_dirs():
+    data_dirs = [Path("tests/data").resolve()]
+    with pytest.raises(JobError):
+        referenced_geopackage("tests/data/../../setup.py", data_dirs)
+    with referenced_geopackage("tests/data/test_allcorrect.gpkg", data_dirs) as (
+        gpkg_path,
+        _,
+    ):
+        assert Path(gpkg_path).is_file()
@@ -0,0 +1,39 @@
+from geopackage_validator import sql_trace
+from geopackage_validator.utils import open_dataset
+from geopackage_validator.validate import validate
+
+
+def test_trace_sql(tmp_path):
+    trace_file = str(tmp_path / "trace.jsonl")
+    sql_trace.enable(trace_file)
+    try:
+        dataset = open_dataset("tests/data/test_layername.gpkg")
+        result = dataset.ExecuteSQL("SELECT table_name FROM gpkg_contents;")
+        table_names = [row[0] for row in result]
+        dataset.ReleaseResultSet(result)
+        dataset.ExecuteSQL("SELECT 1;")
+    finally:
+        sql_trace.disable()
+
+    released, unreleased = sql_trace.read_trace(trace_file)
+    assert released["sql"] == "SELECT table_name FROM gpkg_contents;"
+    assert released["rows"] == len(table_names)
+    assert released["released"]
+    assert released["validator"] is None
+    assert unreleased["sql"] == "SELECT 1;"
+    assert not unreleased["released"]
+
+
+def test_trace_sql_calling_validator(tmp_path):
+    trace_file = str(tmp_path / "trace.jsonl")
+    sql_trace.enable(trace_file)
+    try:
+        validate(gpkg_path="tests/data/test_layername.gpkg", validations="RQ2")
+    finally:
+        sql_trace.disable()
+
+    records = sql_trace.read_trace(trace_file)
+    assert "RQ2" in {record["validator"] for record in records}
+    summary = sql_trace.summarize(trace_file, top=3)
+    assert summary[0].startswith(f"traced {len(records)} SQL statements")
+    assert len(summary) == 4
@@ -0,0 +1,28 @@
+from geopackage_validator.timings import Timings, table_timing
+
+
+def test_timings_of_validator_and_tables():
+    timings = Timings()
+    with timings.validator("RQ23"):
+        with timings.table("a") as counts:
+            counts["rows_scanned"] = 10
+        with table_timing(timings, "b") as counts:
+            counts["rows_scanned"] = 5
+        with timings.table("c"):
+            pass
+    with timings.validator("RQ1"):
+        pass
+
+    rq23, rq1 = timings.validators
+    assert rq23["validation_code"] == "RQ23"
+    assert rq23["rows_scanned"] == 15
+    assert [table["table"] for table in rq23["tables"]] == ["a", "b", "c"]
+    assert "rows_scanned" not in rq23["tables"][2]
+    assert rq23["wall_seconds"] >= 0
+    assert rq1["validation_code"] == "RQ1"
+    assert "tables" not in rq1
+
+
+def test_table_timing_without_timings():
+    with table_timing(None, "a") as counts:
+        counts["rows_scanned"] = 1
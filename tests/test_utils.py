@@ -3,6 +3,8 @@ from osgeo import gdal
 from geopackage_validator.utils import (
     open_dataset,
     dataset_geometry_tables,
+    cgroup_cpu_quota,
+    available_cpu_count,
 )
 
 
@@ -79,3 +81,28 @@ def test_silence_between_gdal_errors():
 
     assert len(results) == 2
     assert results == ["GDAL_ERROR", "GDAL_ERROR"]
+
+
+def test_cgroup_cpu_quota_v2(tmp_path):
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert cgroup_cpu_quota(str(tmp_path)) == 1.5
+
+
+def test_cgroup_cpu_quota_v2_unlimited(tmp_path):
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert cgroup_cpu_quota(str(tmp_path)) is None
+
+
+def test_cgroup_cpu_quota_v1(tmp_path):
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("200000\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert cgroup_cpu_quota(str(tmp_path)) == 2
+
+
+def test_cgroup_cpu_quota_missing(tmp_path):
+    assert cgroup_cpu_quota(str(tmp_path)) is None
+
+
+def test_available_cpu_count():
+    assert available_cpu_count() >= 1
@@ -1,10 +1,24 @@
 import tempfile, shutil
-from osgeo import ogr
+import pytest
+from osgeo import gdal, ogr, osr
 
+from geopackage_validator import utils
+from geopackage_validator import validate as validate_module
+from geopackage_validator.catalog import Catalog
+from geopackage_validator.validations.validator import Validator, ValidationLevel
 from geopackage_validator.validate import (
     validators_to_use,
     get_validation_codes,
     validate,
+    GdalErrorHandler,
+    GdalTraces,
+    ValidationRun,
+    ViolationBudget,
+    pool_tasks,
+)
+from geopackage_validator.validations.rtree_valid_check import (
+    ValidRtreeValidator,
+    rtree_indexes,
 )
 
 
@@ -148,3 +162,256 @@ def test_validate_all_properly_closes_all_gpkg_connections():
     gpkg_src = driver.Open(filename, update=True)
     error_code = gpkg_src.DeleteLayer(0)
     assert error_code == 0
+
+
+def test_validate_with_jobs_gives_same_report():
+    sequential = validate(
+        gpkg_path="tests/data/test_layername.gpkg", validations="ALL", jobs=1
+    )
+    parallel = validate(
+        gpkg_path="tests/data/test_layername.gpkg", validations="ALL", jobs=3
+    )
+    assert parallel == sequential
+
+
+def test_validate_pool_workers_use_one_process(monkeypatch):
+    calls = []
+    run_validators_in_pool = validate_module.run_validators_in_pool
+
+    def recording_pool(gpkg_path, validators, jobs, scan_options, *args, **kwargs):
+        calls.append((jobs, scan_options["jobs"], kwargs["jobs"]))
+        return run_validators_in_pool(
+            gpkg_path, validators, jobs, scan_options, *args, **kwargs
+        )
+
+    monkeypatch.setattr(validate_module, "run_validators_in_pool", recording_pool)
+    validate(gpkg_path="tests/data/test_layername.gpkg", validations="ALL", jobs=3)
+    assert calls == [(3, 1, 1)]
+    # The validations of the geometry scan alone are one pool task, they run here.
+    validate(
+        gpkg_path="tests/data/test_layername.gpkg", validations="RQ15,RQ24", jobs=3
+    )
+    assert len(calls) == 1
+
+
+def test_pool_tasks_leave_out_local_validators():
+    validators = validators_to_use(validation_codes="RQ1,RQ10,RQ15,RQ24")
+    assert pool_tasks(validators) == [[2, 3], [0], [1]]
+    assert pool_tasks(validators, {ValidRtreeValidator}) == [[2, 3], [0]]
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_validate_reports_rtree_progress(jobs):
+    gpkg_path = "tests/data/test_rtree_valid.gpkg"
+    progress = []
+    results, validations_executed, success = validate(
+        gpkg_path=gpkg_path,
+        validations="RQ1,RQ2,RQ10",
+        jobs=jobs,
+        rtree_progress=lambda table_name, status, seconds: progress.append(table_name),
+    )
+    assert "RQ10" in validations_executed
+    # With jobs=3 the other validators run in the pool, and RQ10 in this process.
+    indexes = rtree_indexes(Catalog(utils.open_dataset(gpkg_path)))
+    assert len(indexes) > 0
+    assert sorted(progress) == sorted(table_name for table_name, _ in indexes)
+
+
+def test_validate_max_violations_truncates_report():
+    details = {}
+    results, validations_executed, success = validate(
+        gpkg_path="tests/data/test_layername.gpkg",
+        validations="ALL",
+        max_violations=1,
+        details=details,
+    )
+    assert not success
+    assert len(results) == 1
+    assert results[0]["locations"] == ["Error layer: test_LAYERNAME"]
+    assert details["truncated"]
+    assert "RQ2" in details["validations_skipped"]
+    assert validations_executed == ["RQ1"]
+
+
+def test_validate_fail_fast_skips_remaining_requirements():
+    details = {}
+    results, validations_executed, success = validate(
+        gpkg_path="tests/data/test_layername.gpkg",
+        validations="ALL",
+        fail_fast=True,
+        max_violations=10,
+        details=details,
+    )
+    assert not success
+    # Recommendations are still validated after the first failing requirement.
+    assert len(results) == 2
+    assert results[0]["locations"] == [
+        "Error layer: test_LAYERNAME",
+        "Error layer: test_ATTRIBUTE_LAYER",
+    ]
+    assert results[1]["locations"] == [
+        "Found in table: test_LAYERNAME, column: geometry"
+    ]
+    assert details["truncated"]
+    assert "RQ2" in details["validations_skipped"]
+    assert "RC17" not in details["validations_skipped"]
+
+
+def test_validate_recommendations_do_not_skip_requirements():
+    details = {}
+    results, validations_executed, success = validate(
+        gpkg_path="tests/data/test_layername.gpkg",
+        validations="RC17,RQ1",
+        max_violations=1,
+        details=details,
+    )
+    assert not success
+    assert validations_executed == ["RC17", "RQ1"]
+    assert [result["validation_code"] for result in results] == ["RC17", "RQ1"]
+
+
+def test_validate_fail_fast_finds_violations_of_every_predicate(tmp_path):
+    gpkg_path = str(tmp_path / "polygons.gpkg")
+    dataset = ogr.GetDriverByName("GPKG").CreateDataSource(gpkg_path)
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(28992)
+    layer = dataset.CreateLayer("polygons", srs, ogr.wkbPolygon)
+    # A valid clockwise polygon, followed by an invalid one.
+    for wkt in (
+        "POLYGON ((0 0, 0 1, 1 1, 1 0, 0 0))",
+        "POLYGON ((0 0, 1 1, 1 0, 0 1, 0 0))",
+    ):
+        feature = ogr.Feature(layer.GetLayerDefn())
+        feature.SetGeometry(ogr.CreateGeometryFromWkt(wkt))
+        layer.CreateFeature(feature)
+    dataset = None
+
+    results, validations_executed, success = validate(
+        gpkg_path=gpkg_path, validations="RC20,RQ23", fail_fast=True
+    )
+    assert not success
+    assert [result["validation_code"] for result in results] == ["RC20", "RQ23"]
+
+
+def test_violation_budget_requirements_after_recommendations():
+    budget = ViolationBudget(max_violations=1)
+    budget.record([{"locations": ["a"]}], True, False, ValidationLevel.RECOMMENDATION)
+
+    class Requirement:
+        level = ValidationLevel.ERROR
+        validation_code = "RQ1"
+
+    class Recommendation:
+        level = ValidationLevel.RECOMMENDATION
+        validation_code = "RC17"
+
+    assert budget.skip(Recommendation)
+    assert not budget.skip(Requirement)
+    assert budget.record([{"locations": ["b", "c"]}], False, False) == [
+        {"locations": ["b"]}
+    ]
+    assert budget.skip(Requirement)
+    assert budget.skipped == ["RC17", "RQ1"]
+
+
+def test_validator_truncated_only_when_results_are_cut():
+    class Numbers(Validator):
+        code = 99
+        level = ValidationLevel.ERROR
+
+        def check(self):
+            return (str(number) for number in range(self.count))
+
+    validator = Numbers(None, max_violations=2, catalog=object())
+    validator.count = 2
+    assert validator.validate()["locations"] == ["0", "1"]
+    assert not validator.truncated
+    validator.count = 3
+    assert validator.validate()["locations"] == ["0", "1"]
+    assert validator.truncated
+
+
+def test_violation_budget_cuts_results():
+    budget = ViolationBudget(max_violations=3)
+    results = budget.record(
+        [{"locations": ["a", "b"]}, {"locations": ["c", "d"]}, {"locations": ["e"]}],
+        False,
+        False,
+    )
+    assert results == [{"locations": ["a", "b"]}, {"locations": ["c"]}]
+    assert budget.truncated
+    assert budget.remaining() == 0
+
+
+def test_validate_timings():
+    details = {}
+    results, validations_executed, success = validate(
+        gpkg_path="tests/data/test_geometry_valid.gpkg",
+        validations="RQ2,RQ23",
+        timings=True,
+        details=details,
+    )
+    timings = details["timings"]
+    assert [timing["validation_code"] for timing in timings] == validations_executed
+    rq2, rq23 = timings
+    assert rq23["tables"][0]["table"] == "test_geometry_valid"
+    assert rq23["rows_scanned"] == rq2["rows_scanned"]
+
+
+def test_validate_closes_the_run(mocker):
+    close = mocker.spy(ValidationRun, "close")
+    for gpkg_path, expected_tables in (
+        ("tests/data/test_geom_columnname.gpkg", 2),
+        ("tests/data/test_allcorrect.gpkg", 0),
+    ):
+        results, _, _ = validate(gpkg_path=gpkg_path, validations="RC17")
+        # Nothing of the previous file is remembered for the next one.
+        assert len(results[0]["locations"] if results else []) == expected_tables
+    assert close.call_count == 2
+
+
+def test_validate_reports_every_validator():
+    reported = []
+    results, validations_executed, success = validate(
+        gpkg_path="tests/data/test_layername.gpkg",
+        validations="RQ1,RQ2",
+        on_result=lambda code, results, success: reported.append((code, success)),
+    )
+    assert reported == [("RQ1", False), ("RQ2", True)]
+    assert [code for code, _ in reported] == validations_executed
+
+
+def test_gdal_traces_are_aggregated():
+    handler = GdalErrorHandler()
+    for fid in range(100000):
+        handler.handler(gdal.CE_Warning, 1, f"Feature {fid} of 'layer_{fid}' is odd")
+    handler.handler(gdal.CE_Warning, 1, "Something else")
+    traces = handler.gdal_warning_traces.take()
+    assert len(traces) == 100001
+    assert len(handler.gdal_warning_traces) == 0
+    assert traces.locations() == [
+        "Feature 0 of 'layer_0' is odd",
+        "Feature 1 of 'layer_1' is odd",
+        "Feature 2 of 'layer_2' is odd",
+        "Feature 3 of 'layer_3' is odd",
+        "Feature 4 of 'layer_4' is odd",
+        "... 99995 more messages like: Feature # of '?' is odd",
+        "Something else",
+    ]
+
+
+def test_gdal_traces_overflow():
+    traces = GdalTraces(max_examples=1, max_templates=2)
+    for word in ["a", "b", "c", "d", "a"]:
+        traces.append(f"message {word}")
+    other = GdalTraces(max_examples=1, max_templates=2)
+    other.append("message b")
+    traces.merge(other)
+    assert len(traces) == 6
+    assert traces.locations() == [
+        "message a",
+        "... 1 more messages like: message a",
+        "message b",
+        "... 1 more messages like: message b",
+        "... 2 more messages, not aggregated beyond 2 distinct messages",
+    ]
@@ -0,0 +1,153 @@
+"""
+The SQL queries the geometry and rtree validations ran before they were answered by the
+shared geometry scan, the native decoders and the parallel rtree checks. The tests
+compare those with these reference implementations.
+"""
+from typing import Iterable, Tuple
+
+from geopackage_validator import utils
+from geopackage_validator.validations.geometry_dimension_check import (
+    dimension_messages,
+)
+from geopackage_validator.validations.rtree_valid_check import rtree_checks
+
+SQL_EMPTY_TEMPLATE = """SELECT type, count(type) AS count, row_id
+FROM(
+    SELECT
+        CASE
+            WHEN ST_IsEmpty("{column_name}") = 1
+                THEN 'empty'
+            WHEN "{column_name}" IS NULL
+                THEN 'null'
+        END AS type,
+        cast(rowid AS INTEGER) AS row_id
+    FROM "{table_name}" WHERE ST_IsEmpty("{column_name}") = 1 OR "{column_name}" IS NULL
+)
+GROUP BY type;"""
+
+SQL_VALID_TEMPLATE = """SELECT reason, count(reason) AS count, row_id
+FROM(
+    SELECT
+        CASE ST_IsValid("{column_name}")
+            WHEN 0
+                THEN
+                    CASE INSTR(ST_IsValidReason("{column_name}"), '[')
+                        WHEN 0
+                            THEN ST_IsValidReason("{column_name}")
+                        ELSE substr(ST_IsValidReason("{column_name}"), 0, INSTR(ST_IsValidReason("{column_name}"), '['))
+                    END
+                ELSE
+                    CASE
+                        WHEN ST_IsSimple("{column_name}") = 0
+                            THEN 'Not Simple'
+                        WHEN IsValidGPB("{column_name}") = 0
+                            THEN 'Not GeoPackage geometry'
+                    END
+        END AS reason,
+        cast(rowid AS INTEGER) AS row_id
+    FROM "{table_name}"
+    WHERE
+        ST_IsValid("{column_name}") = 0 OR
+        ST_IsSimple("{column_name}") = 0 OR
+        (IsValidGPB("{column_name}") = 0  AND ST_IsEmpty("{column_name}") = 0) -- Empty geometry is considered valid
+)
+GROUP BY reason;"""
+
+DIMENSION_QUERY = """
+SELECT DISTINCT
+    (ST_MinZ("{geom_column_name}") == 0 AND ST_MaxZ("{geom_column_name}") == 0) as z_check,
+    (ST_MinM("{geom_column_name}") IS NOT NULL AND
+     ST_MinM("{geom_column_name}") == 0 AND ST_MaxM("{geom_column_name}") == 0) as m_check,
+     st_ndims("{geom_column_name}") as ndims
+FROM "{table_name}" where st_ndims("{geom_column_name}") > 2;
+"""
+
+SQL_TEMPLATE_TABLE_GEOMETRY_TYPES = """SELECT
+    CASE ST_AsText("{column_name}")
+        WHEN 'GEOMETRYCOLLECTION()'
+            THEN 'GEOMETRYCOLLECTION'
+        ELSE ST_GEOMETRYTYPE("{column_name}")
+    END AS geom_type
+    , count("{column_name}") AS count
+    , cast(rowid AS INTEGER) AS row_id
+FROM "{table_name}"
+WHERE geom_type != '{expected_geometry}'
+GROUP BY geom_type;"""
+
+
+def query_geometry_empty(
+    dataset, sql_template
+) -> Iterable[Tuple[str, str, str, int, int]]:
+    columns = utils.dataset_geometry_tables(dataset)
+
+    for table_name, column_name, _ in columns:
+        validations = dataset.ExecuteSQL(
+            sql_template.format(table_name=table_name, column_name=column_name)
+        )
+        for type, count, row_id in validations:
+            yield table_name, column_name, type, count, row_id
+        dataset.ReleaseResultSet(validations)
+
+
+def query_dimensions(dataset) -> Iterable[Tuple[str, str]]:
+    tables = utils.dataset_geometry_tables(dataset)
+
+    for table_name, column_name, _ in tables:
+        validations = dataset.ExecuteSQL(
+            DIMENSION_QUERY.format(table_name=table_name, geom_column_name=column_name)
+        )
+        validation_list = (
+            []
+            if validations is None
+            else [(z, m, ndims) for z, m, ndims in validations]
+        )
+
+        yield from dimension_messages(table_name, validation_list)
+
+        dataset.ReleaseResultSet(validations)
+
+
+def query_unexpected_geometry_types(dataset) -> Iterable[Tuple[str, str]]:
+    geometry_types = utils.dataset_geometry_tables(dataset)
+
+    for table_name, column_name, expected_geometry in geometry_types:
+        sql = SQL_TEMPLATE_TABLE_GEOMETRY_TYPES.format(
+            table_name=table_name,
+            column_name=column_name,
+            expected_geometry=expected_geometry,
+        )
+
+        validations = dataset.ExecuteSQL(sql)
+
+        if validations is not None:
+            for (geometry_type, count, row_id) in validations:
+                yield table_name, geometry_type, count, row_id, expected_geometry
+
+        dataset.ReleaseResultSet(validations)
+
+
+def query_ccw(dataset) -> Iterable[Tuple[str, str]]:
+    columns = dataset.ExecuteSQL(
+        "SELECT table_name, column_name FROM gpkg_geometry_columns "
+        "  WHERE geometry_type_name in ('POLYGON', 'MULTIPOLYGON');"
+    )
+
+    for table_name, column_name in columns:
+        sql = (
+            f'SELECT cast(rowid AS INTEGER) AS row_id, count("{column_name}") as amount '
+            f'FROM "{table_name}" WHERE NOT ST_IsPolygonCCW("{column_name}");'
+        )
+        validations = dataset.ExecuteSQL(sql)
+
+        if validations is not None:
+            for (row_id, count) in validations:
+                if count > 0:
+                    yield table_name, row_id, count
+
+        dataset.ReleaseResultSet(validations)
+    dataset.ReleaseResultSet(columns)
+
+
+def rtree_valid_check_query(dataset) -> Iterable[str]:
+    for check in rtree_checks(dataset):
+        yield from check.messages
@@ -1,5 +1,15 @@
+from array import array
+
+from geopackage_validator import gpkg_binary, utils
 from geopackage_validator.utils import open_dataset
-from geopackage_validator.validations.geometry_ccw_check import query_ccw
+from geopackage_validator.validations.geometry_ccw_check import (
+    geometry_ccw,
+    native_ccw,
+    scan_ccw,
+)
+from geopackage_validator.validations.geometry_scan import CCW, GeometryScan
+
+from reference_queries import query_ccw
 
 
 def test_ccw_with_gpkg():
@@ -15,3 +25,46 @@ def test_ccw_with_gpkg_allcorrect():
     dataset = open_dataset("tests/data/test_allcorrect.gpkg")
     checks = list(query_ccw(dataset))
     assert len(checks) == 0
+
+
+def polygon(*rings):
+    coordinates = array(
+        "d", [value for ring in rings for point in ring for value in point]
+    )
+    firsts = [sum(len(ring) for ring in rings[:index]) for index in range(len(rings))]
+    return gpkg_binary.Geometry(
+        gpkg_binary.POLYGON,
+        False,
+        False,
+        False,
+        0,
+        (),
+        coordinates,
+        [[(first, len(ring)) for first, ring in zip(firsts, rings)]],
+    )
+
+
+def test_geometry_ccw():
+    exterior = [(0, 0), (4, 0), (4, 4), (0, 4), (0, 0)]
+    hole = [(1, 1), (1, 2), (2, 2), (2, 1), (1, 1)]
+    assert geometry_ccw(polygon(exterior, hole))
+    assert not geometry_ccw(polygon(exterior[::-1], hole))
+    assert not geometry_ccw(polygon(exterior, hole[::-1]))
+    # Like ST_IsPolygonCCW, a ring without area counts as counter-clockwise.
+    assert geometry_ccw(polygon([(0, 0), (1, 1), (0, 0)]))
+    assert not geometry_ccw(polygon(exterior, [(1, 1), (2, 2), (1, 1)]))
+
+
+def test_native_equals_spatialite():
+    for gpkg_path in [
+        "tests/data/test_geometry_valid.gpkg",
+        "tests/data/test_allcorrect.gpkg",
+    ]:
+        dataset = open_dataset(gpkg_path)
+        tables = utils.dataset_geometry_tables(dataset)
+        results, truncated_tables = native_ccw(dataset, gpkg_path, tables)
+        assert results == list(scan_ccw(GeometryScan(dataset, [CCW])))
+        assert [(table, count) for table, _, count in results] == [
+            (table, count) for table, _, count in query_ccw(dataset)
+        ]
+        assert truncated_tables == set()
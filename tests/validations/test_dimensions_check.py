@@ -1,5 +1,10 @@
+from geopackage_validator import utils
 from geopackage_validator.utils import open_dataset
-from geopackage_validator.validations.geometry_dimension_check import query_dimensions
+from geopackage_validator.validations.geometry_dimension_check import (
+    native_dimensions,
+)
+
+from reference_queries import query_dimensions
 
 
 def test_with_gpkg():
@@ -22,3 +27,15 @@ def test_with_gpkg_allcorrect():
     dataset = open_dataset("tests/data/test_allcorrect.gpkg")
     checks = list(query_dimensions(dataset))
     assert len(checks) == 0
+
+
+def test_native_equals_spatialite():
+    for gpkg_path in [
+        "tests/data/test_dimensions.gpkg",
+        "tests/data/test_allcorrect.gpkg",
+    ]:
+        dataset = open_dataset(gpkg_path)
+        tables = utils.dataset_geometry_tables(dataset)
+        assert list(native_dimensions(gpkg_path, tables)) == list(
+            query_dimensions(dataset)
+        )
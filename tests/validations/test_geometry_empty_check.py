@@ -1,8 +1,12 @@
+from geopackage_validator import utils
 from geopackage_validator.utils import open_dataset
 from geopackage_validator.validations.geometry_empty_check import (
     EmptyGeometryValidator,
+    native_geometry_empty,
 )
 
+from reference_queries import SQL_EMPTY_TEMPLATE, query_geometry_empty
+
 
 def test_with_gpkg_empty():
     dataset = open_dataset("tests/data/test_geometry_empty.gpkg")
@@ -28,3 +32,27 @@ def test_with_gpkg_allcorrect():
     dataset = open_dataset("tests/data/test_allcorrect.gpkg")
     result = list(EmptyGeometryValidator(dataset).check())
     assert len(result) == 0
+
+
+def test_native_equals_spatialite():
+    for gpkg_path in [
+        "tests/data/test_geometry_empty.gpkg",
+        "tests/data/test_geometry_null.gpkg",
+        "tests/data/test_allcorrect.gpkg",
+    ]:
+        dataset = open_dataset(gpkg_path)
+        tables = utils.dataset_geometry_tables(dataset)
+        results, truncated_tables = native_geometry_empty(dataset, gpkg_path, tables)
+        assert results == list(query_geometry_empty(dataset, SQL_EMPTY_TEMPLATE))
+        assert truncated_tables == set()
+
+
+def test_native_stops_at_max_violations():
+    gpkg_path = "tests/data/test_geometry_empty.gpkg"
+    dataset = open_dataset(gpkg_path)
+    tables = utils.dataset_geometry_tables(dataset)
+    results, truncated_tables = native_geometry_empty(
+        dataset, gpkg_path, tables, max_violations=3
+    )
+    assert results == [("test_geometry_empty", "geom", "empty", 3, 129)]
+    assert truncated_tables == {"test_geometry_empty"}
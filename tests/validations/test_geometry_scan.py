@@ -0,0 +1,334 @@
+import sqlite3
+from contextlib import closing
+
+import pytest
+from osgeo import ogr, osr
+
+from geopackage_validator.utils import open_dataset
+from geopackage_validator.validations import geometry_scan
+from geopackage_validator.validations.geometry_scan import (
+    GeometryScan,
+    merge_groups,
+    requested_predicates,
+    rowid_ranges,
+    scan_sql,
+)
+from geopackage_validator.validations.geometry_ccw_check import scan_ccw
+from geopackage_validator.validations.geometry_dimension_check import (
+    GeometryDimensionValidator,
+    scan_dimensions,
+)
+from geopackage_validator.validations.geometry_empty_check import (
+    EmptyGeometryValidator,
+    scan_geometry_empty,
+)
+from geopackage_validator.validations.geometry_type_check import (
+    scan_unexpected_geometry_types,
+)
+from geopackage_validator.validations.geometry_valid_check import (
+    ValidGeometryValidator,
+    query_geometry_valid,
+    scan_geometry_valid,
+)
+
+from reference_queries import (
+    SQL_EMPTY_TEMPLATE,
+    SQL_VALID_TEMPLATE,
+    query_ccw,
+    query_dimensions,
+    query_geometry_empty,
+    query_unexpected_geometry_types,
+)
+
+GPKG_PATHS = [
+    "tests/data/test_allcorrect.gpkg",
+    "tests/data/test_dimensions.gpkg",
+    "tests/data/test_geometry_empty.gpkg",
+    "tests/data/test_geometry_null.gpkg",
+    "tests/data/test_geometry_simple.gpkg",
+    "tests/data/test_geometry_type.gpkg",
+    "tests/data/test_geometry_valid.gpkg",
+]
+
+
+@pytest.mark.parametrize("gpkg_path", GPKG_PATHS)
+def test_scan_equals_separate_queries(gpkg_path):
+    dataset = open_dataset(gpkg_path)
+    scan = GeometryScan(dataset)
+
+    assert list(scan_geometry_valid(scan)) == list(
+        query_geometry_valid(dataset, SQL_VALID_TEMPLATE)
+    )
+    assert list(scan_geometry_empty(scan)) == [
+        result
+        for result in query_geometry_empty(dataset, SQL_EMPTY_TEMPLATE)
+        if result[3] > 0
+    ]
+    assert list(scan_unexpected_geometry_types(scan)) == list(
+        query_unexpected_geometry_types(dataset)
+    )
+    assert list(scan_dimensions(scan)) == list(query_dimensions(dataset))
+    assert list(scan_ccw(scan)) == list(query_ccw(dataset))
+
+
+def mixed_type_gpkg(gpkg_path: str) -> str:
+    """Tables with invalid geometries of another type than the declared type."""
+    dataset = ogr.GetDriverByName("GPKG").CreateDataSource(gpkg_path)
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(28992)
+    for layer_name, geometry_type, wkts in [
+        (
+            "points",
+            ogr.wkbPoint,
+            ["POINT (0 0)", "POLYGON ((0 0, 1 1, 1 0, 0 1, 0 0))"],
+        ),
+        (
+            "multipoints",
+            ogr.wkbMultiPoint,
+            ["MULTIPOINT ((0 0), (1 1))", "POLYGON ((0 0, 1 1, 1 0, 0 1, 0 0))"],
+        ),
+        (
+            "polygons",
+            ogr.wkbPolygon,
+            [
+                "POLYGON ((0 0, 0 1, 1 1, 1 0, 0 0))",
+                "LINESTRING (0 0, 1 1, 1 0, 0 1)",
+                "MULTIPOINT ((0 0), (0 0))",
+            ],
+        ),
+    ]:
+        layer = dataset.CreateLayer(layer_name, srs, geometry_type)
+        for wkt in wkts:
+            feature = ogr.Feature(layer.GetLayerDefn())
+            feature.SetGeometry(ogr.CreateGeometryFromWkt(wkt))
+            layer.CreateFeature(feature)
+    dataset = None
+    return gpkg_path
+
+
+def test_scan_checks_validity_per_row_geometry_type(tmp_path):
+    dataset = open_dataset(mixed_type_gpkg(str(tmp_path / "mixed.gpkg")))
+    expected = list(query_geometry_valid(dataset, SQL_VALID_TEMPLATE))
+    assert {(table_name, reason) for table_name, _, reason, _, _ in expected} == {
+        ("points", "Self-intersection"),
+        ("multipoints", "Self-intersection"),
+        ("polygons", "Not Simple"),
+    }
+    assert list(scan_geometry_valid(GeometryScan(dataset, ["valid"]))) == expected
+
+
+def test_scan_reports_nan_point(tmp_path):
+    gpkg_path = str(tmp_path / "nan.gpkg")
+    dataset = ogr.GetDriverByName("GPKG").CreateDataSource(gpkg_path)
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(28992)
+    layer = dataset.CreateLayer("points", srs, ogr.wkbPoint)
+    point = ogr.Geometry(ogr.wkbPoint)
+    point.AddPoint_2D(float("nan"), float("nan"))
+    feature = ogr.Feature(layer.GetLayerDefn())
+    feature.SetGeometry(point)
+    layer.CreateFeature(feature)
+    dataset = None
+    dataset = open_dataset(gpkg_path)
+    expected = list(query_geometry_valid(dataset, SQL_VALID_TEMPLATE))
+    assert [reason for _, _, reason, _, _ in expected] == ["Invalid Coordinate"]
+    assert list(scan_geometry_valid(GeometryScan(dataset, ["valid"]))) == expected
+
+
+def test_requested_predicates():
+    assert requested_predicates(
+        [GeometryDimensionValidator, EmptyGeometryValidator]
+    ) == ["empty", "dimension"]
+    assert requested_predicates(
+        [GeometryDimensionValidator, EmptyGeometryValidator, ValidGeometryValidator],
+        "native",
+    ) == ["valid"]
+
+
+def test_scan_is_shared():
+    dataset = open_dataset("tests/data/test_geometry_empty.gpkg")
+    scan = GeometryScan(dataset, ["empty", "dimension"])
+    list(EmptyGeometryValidator(dataset, geometry_scan=scan).check())
+    assert list(scan._groups.keys()) == ["test_geometry_empty"]
+    list(GeometryDimensionValidator(dataset, geometry_scan=scan).check())
+    assert list(scan._groups.keys()) == ["test_geometry_empty"]
+
+
+def test_merge_groups():
+    merged = merge_groups(
+        ["empty_type"],
+        [
+            [
+                {"empty_type": None, "count": 10, "row_id": 10},
+                {"empty_type": "empty", "count": 2, "row_id": 7},
+            ],
+            [
+                {"empty_type": "empty", "count": 3, "row_id": 12},
+                {"empty_type": "null", "count": 1, "row_id": 11},
+            ],
+        ],
+    )
+    assert merged == [
+        {"empty_type": None, "count": 10, "row_id": 10},
+        {"empty_type": "empty", "count": 5, "row_id": 7},
+        {"empty_type": "null", "count": 1, "row_id": 11},
+    ]
+
+
+@pytest.mark.parametrize("shard_by", ["rows", "bytes"])
+def test_rowid_ranges(shard_by):
+    dataset = open_dataset("tests/data/test_geometry_empty.gpkg")
+    ranges = rowid_ranges(dataset, "test_geometry_empty", "geom", 3, shard_by)
+    assert 1 < len(ranges) <= 3
+    for (_, last), (first, _) in zip(ranges, ranges[1:]):
+        assert last < first
+
+
+@pytest.mark.parametrize("shard_by", ["rows", "bytes"])
+def test_sharded_scan_equals_single_scan(monkeypatch, shard_by):
+    monkeypatch.setattr(geometry_scan, "SHARD_MIN_ROWS", 0)
+    dataset = open_dataset("tests/data/test_geometry_empty.gpkg")
+    sharded = GeometryScan(dataset, jobs=3, shard_by=shard_by)
+    single = GeometryScan(dataset)
+    assert list(scan_geometry_empty(sharded)) == list(scan_geometry_empty(single))
+    assert list(scan_geometry_valid(sharded)) == list(scan_geometry_valid(single))
+
+
+def test_sharded_scan_starts_one_pool(monkeypatch):
+    monkeypatch.setattr(geometry_scan, "SHARD_MIN_ROWS", 0)
+    pools = []
+
+    class Pool(geometry_scan.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+
+    monkeypatch.setattr(geometry_scan, "ProcessPoolExecutor", Pool)
+    dataset = open_dataset("tests/data/test_dimensions.gpkg")
+    with GeometryScan(dataset, ["dimension"], jobs=2) as scan:
+        for table in scan.tables():
+            scan.groups(table)
+        assert len(scan.tables()) > 1
+        assert len(pools) == 1
+    assert scan._executor is None
+
+
+def test_limited_scan_stops_at_max_violations():
+    dataset = open_dataset("tests/data/test_geometry_empty.gpkg")
+    scan = GeometryScan(dataset, ["empty"], max_violations=1)
+    result = list(scan_geometry_empty(scan))
+    assert [count for _, _, _, count, _ in result] == [1]
+    assert scan.truncated == {("test_geometry_empty", "empty")}
+    assert scan.is_truncated(["empty"])
+
+
+class SQLiteDataset:
+    """The ExecuteSQL of a dataset over a sqlite3 connection."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def ExecuteSQL(self, sql):
+        return self.connection.execute(sql).fetchall()
+
+    def ReleaseResultSet(self, result):
+        pass
+
+
+def test_limited_scan_bounds_every_predicate():
+    calls = []
+
+    def is_polygon_ccw(geometry):
+        calls.append(geometry)
+        return int(geometry != "cw")
+
+    with closing(sqlite3.connect(":memory:")) as connection:
+        connection.create_function("ST_IsEmpty", 1, lambda g: int(g == "empty"))
+        connection.create_function("ST_IsPolygonCCW", 1, is_polygon_ccw)
+        connection.execute('CREATE TABLE "table" (geom)')
+        connection.executemany(
+            'INSERT INTO "table" VALUES (?)',
+            [("cw",)] * 3 + [("empty",)] * 2 + [("ccw",)] * 100,
+        )
+        scan = GeometryScan(
+            SQLiteDataset(connection), ["empty", "ccw"], max_violations=2
+        )
+        groups = scan.scan_table("table", "geom", "POLYGON")
+
+    # The groups of every predicate, in the order of ALL_PREDICATES.
+    assert groups == [
+        {"empty_type": "empty", "count": 2, "row_id": 4},
+        {"not_ccw": 1, "count": 2, "row_id": 1},
+    ]
+    # The winding order scan stops at the row after its second violation, although
+    # the empty geometries are fewer than max_violations.
+    assert len(calls) == 3
+    # Exactly max_violations empty geometries are not truncated.
+    assert scan.truncated == {("table", "ccw")}
+    assert scan.is_truncated(["ccw"])
+    assert not scan.is_truncated(["empty"])
+
+
+VALIDITY_FUNCTIONS = ("ST_IsValid", "ST_IsValidReason", "ST_IsSimple")
+
+
+def validity_calls(declared_type, row_geometry_type, reason=None):
+    """
+    The spatial functions the validity scan of a table calls for one row, with stand-ins
+    for a valid geometry or, with a reason, one GEOS considers invalid.
+    """
+    calls = []
+
+    def stand_in(name, value):
+        def function(geometry):
+            calls.append(name)
+            return value
+
+        return function
+
+    with closing(sqlite3.connect(":memory:")) as connection:
+        connection.create_function("ST_GeometryType", 1, lambda geometry: geometry)
+        for name, value in [
+            ("ST_IsValid", int(reason is None)),
+            ("ST_IsValidReason", reason or "Valid Geometry"),
+            ("ST_IsSimple", 1),
+            ("IsValidGPB", 1),
+            ("ST_IsEmpty", 0),
+        ]:
+            connection.create_function(name, 1, stand_in(name, value))
+        connection.execute('CREATE TABLE "table" (geom)')
+        connection.execute('INSERT INTO "table" VALUES (?)', (row_geometry_type,))
+        sql, _ = scan_sql(["valid"], "table", "geom", declared_type)
+        assert connection.execute(sql).fetchall() == [(reason, 1, 1)]
+    return calls
+
+
+@pytest.mark.parametrize(
+    "declared_type", ["POINT", "POLYGON", "LINESTRING", "GEOMETRY"]
+)
+@pytest.mark.parametrize(
+    "row_geometry_type, functions",
+    [
+        ("POINT", ["ST_IsValid"]),
+        ("POINT Z", ["ST_IsValid"]),
+        ("MULTIPOINT", ["ST_IsValid", "ST_IsSimple"]),
+        ("LINESTRING", ["ST_IsValid", "ST_IsSimple"]),
+        ("POLYGON", ["ST_IsValid"]),
+        ("MULTIPOLYGON ZM", ["ST_IsValid"]),
+        ("GEOMETRYCOLLECTION", ["ST_IsValid", "ST_IsSimple"]),
+        # A geometry spatialite can not read gets every check.
+        (None, ["ST_IsValid", "ST_IsSimple"]),
+    ],
+)
+def test_validity_plan_per_row_geometry_type(
+    declared_type, row_geometry_type, functions
+):
+    calls = validity_calls(declared_type, row_geometry_type)
+    assert [call for call in calls if call in VALIDITY_FUNCTIONS] == functions
+
+
+@pytest.mark.parametrize("row_geometry_type", ["POINT", "MULTIPOINT"])
+def test_validity_plan_reports_invalid_points(row_geometry_type):
+    # GEOS considers a point with a NaN or infinite coordinate invalid.
+    calls = validity_calls("POINT", row_geometry_type, reason="Invalid Coordinate")
+    assert "ST_IsValidReason" in calls
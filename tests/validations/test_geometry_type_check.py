@@ -1,11 +1,27 @@
+import sqlite3
+import struct
+from contextlib import closing
+
+import pytest
+from osgeo import ogr, osr
+
+from geopackage_validator import gpkg_binary
+from geopackage_validator.gpkg_binary import GeometryOutline
 from geopackage_validator.utils import open_dataset, dataset_geometry_tables
 from geopackage_validator.validations.geometry_type_check import (
+    feature_geometry_types,
+    wkb_geometry_types,
     query_geometry_types,
+    native_unexpected_geometry_types,
+    outline_geometry_type,
+    prefix_geometry_type,
     aggregate,
     GpkgGeometryTypeNameValidator,
     GeometryTypeEqualsGpkgDefinitionValidator,
 )
 
+from reference_queries import query_unexpected_geometry_types
+
 
 def test_valid_geometry_type_aggregate():
     results = aggregate([])
@@ -44,6 +60,69 @@ def test_rq3_with_gpkg():
     assert checks[0][1] == "COMPOUNDCURVE"
 
 
+def test_rq3_wkb_equals_ogr():
+    for gpkg_path in [
+        "tests/data/test_geometry_type.gpkg",
+        "tests/data/test_geometry_empty.gpkg",
+        "tests/data/test_dimensions.gpkg",
+        "tests/data/test_allcorrect.gpkg",
+    ]:
+        dataset = open_dataset(gpkg_path)
+        connection = gpkg_binary.readonly_connection(gpkg_path)
+        for layer in dataset:
+            assert list(
+                wkb_geometry_types(
+                    connection, layer.GetName(), layer.GetGeometryColumn()
+                )
+            ) == list(feature_geometry_types(layer))
+        connection.close()
+
+
+def test_rq3_wkb_skips_undecodable_geometries():
+    point = b"GP\x00\x01" + struct.pack("<iBI2d", 28992, 1, 1, 0, 0)
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE t (geom BLOB)")
+    connection.executemany(
+        "INSERT INTO t VALUES (?)",
+        [(point,), (None,), (b"not a geometry",), (point[:12],), (point,)],
+    )
+    assert list(wkb_geometry_types(connection, "t", "geom")) == [
+        ("POINT", 1),
+        ("POINT", 5),
+    ]
+
+
+def test_rq3_with_feature_view_and_undecodable_geometry(tmp_path):
+    gpkg_path = str(tmp_path / "curves.gpkg")
+    dataset = ogr.GetDriverByName("GPKG").CreateDataSource(gpkg_path)
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(28992)
+    layer = dataset.CreateLayer("curves", srs, ogr.wkbUnknown)
+    for wkt in ["COMPOUNDCURVE ((0 0,1 1))", "POINT (0 0)", "POINT (1 1)"]:
+        feature = ogr.Feature(layer.GetLayerDefn())
+        feature.SetGeometry(ogr.CreateGeometryFromWkt(wkt))
+        layer.CreateFeature(feature)
+    dataset = None
+    with closing(sqlite3.connect(gpkg_path)) as connection:
+        connection.execute("UPDATE curves SET geom = X'4750000100000000' WHERE fid = 3")
+        connection.execute("CREATE VIEW curves_view AS SELECT fid, geom FROM curves")
+        connection.execute(
+            "INSERT INTO gpkg_contents (table_name, data_type, identifier, srs_id) "
+            "VALUES ('curves_view', 'features', 'curves_view', 28992)"
+        )
+        connection.execute(
+            "INSERT INTO gpkg_geometry_columns "
+            "VALUES ('curves_view', 'geom', 'GEOMETRY', 28992, 0, 0)"
+        )
+        connection.commit()
+
+    dataset = open_dataset(gpkg_path)
+    assert sorted(query_geometry_types(dataset)) == [
+        ("curves", "COMPOUNDCURVE", 1),
+        ("curves_view", "COMPOUNDCURVE", 1),
+    ]
+
+
 def test_rq3_with_gpkg_allcorrect():
     dataset = open_dataset("tests/data/test_allcorrect.gpkg")
     checks = list(query_geometry_types(dataset))
@@ -86,3 +165,97 @@ def test_rq15_with_gpkg_geometry_type_equals_gpkg_definition_invalid_check():
         result[0]
         == "Error layer: test_geometry_type, found geometry: GEOMETRYCOLLECTION that should be COMPOUNDCURVE, 1 time, example id: 1"
     )
+
+
+@pytest.mark.parametrize(
+    "outline, geometry_type",
+    [
+        (GeometryOutline(0, False, False, 1, False, False, 1, []), "POINT"),
+        (GeometryOutline(0, False, False, 3, True, True, 1, []), "POLYGON ZM"),
+        (
+            GeometryOutline(0, False, False, 5, False, True, 1, [(2, False, True, 3)]),
+            "MULTILINESTRING M",
+        ),
+        (
+            GeometryOutline(
+                0, False, False, 7, False, False, 1, [(1, False, False, 1)]
+            ),
+            "GEOMETRYCOLLECTION",
+        ),
+        # Empty, EWKB, curved, mixed and nested geometries are left to spatialite.
+        (GeometryOutline(0, True, False, 1, False, False, 1, []), None),
+        (GeometryOutline(0, False, False, 6, False, False, 0, []), None),
+        (GeometryOutline(0, False, False, 2, False, False, 0, []), None),
+        (GeometryOutline(0, False, True, 1, True, False, 1, []), None),
+        (
+            GeometryOutline(
+                0, False, False, 9, False, False, 1, [(2, False, False, 2)]
+            ),
+            None,
+        ),
+        (
+            GeometryOutline(
+                0, False, False, 4, False, False, 1, [(2, False, False, 2)]
+            ),
+            None,
+        ),
+        (
+            GeometryOutline(
+                0, False, False, 6, False, False, 1, [(3, False, False, 0)]
+            ),
+            None,
+        ),
+        (
+            GeometryOutline(
+                0, False, False, 7, False, False, 1, [(7, False, False, 1)]
+            ),
+            None,
+        ),
+        (GeometryOutline(1, False, False, 1, False, False, 1, []), None),
+    ],
+)
+def test_outline_geometry_type(outline, geometry_type):
+    assert outline_geometry_type(outline) == geometry_type
+
+
+def test_prefix_geometry_type_reads_blob_only_for_long_collections(monkeypatch):
+    header = b"GP\x00\x01" + struct.pack("<i", 28992)
+    line = header + struct.pack("<BII", 1, 2, 100) + struct.pack("<200d", *[0] * 200)
+    part = struct.pack("<BII", 1, 2, 20) + struct.pack("<40d", *[0] * 40)
+    multiline = header + struct.pack("<BII", 1, 5, 2) + part + part
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE t (geom BLOB)")
+    connection.executemany("INSERT INTO t VALUES (?)", [(line,), (multiline,)])
+
+    blobs_read = []
+    read_blob = gpkg_binary.read_blob
+
+    def counting_read_blob(connection, table_name, column_name, row_id):
+        blobs_read.append(row_id)
+        return read_blob(connection, table_name, column_name, row_id)
+
+    monkeypatch.setattr(gpkg_binary, "read_blob", counting_read_blob)
+    geometry_types = [
+        prefix_geometry_type(connection, "t", "geom", row_id, prefix)
+        for row_id, prefix in gpkg_binary.iter_prefixes(connection, "t", "geom")
+    ]
+    assert geometry_types == ["LINESTRING", "MULTILINESTRING"]
+    # The second part of the multilinestring starts after the prefix.
+    assert blobs_read == [2]
+
+
+def test_native_equals_spatialite():
+    for gpkg_path in [
+        "tests/data/test_geometry_type.gpkg",
+        "tests/data/test_geometry_empty.gpkg",
+        "tests/data/test_geometry_valid.gpkg",
+        "tests/data/test_dimensions.gpkg",
+        "tests/data/test_allcorrect.gpkg",
+    ]:
+        dataset = open_dataset(gpkg_path)
+        tables = dataset_geometry_tables(dataset)
+        results, truncated_tables = native_unexpected_geometry_types(
+            dataset, gpkg_path, tables
+        )
+        assert results == list(query_unexpected_geometry_types(dataset))
+        assert truncated_tables == set()
@@ -2,9 +2,10 @@ from geopackage_validator.utils import open_dataset
 from geopackage_validator.validations.geometry_valid_check import (
     query_geometry_valid,
     SQL_VALID_TEMPLATE_V0,
-    SQL_VALID_TEMPLATE,
 )
 
+from reference_queries import SQL_VALID_TEMPLATE
+
 
 def test_with_gpkg_valid():
     dataset = open_dataset("tests/data/test_geometry_valid.gpkg")
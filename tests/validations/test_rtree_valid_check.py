@@ -1,9 +1,19 @@
+import sqlite3
+import struct
+from contextlib import closing
+
+import pytest
+
 from geopackage_validator.utils import open_dataset
+from geopackage_validator.validations import rtree_valid_check
 from geopackage_validator.validations.rtree_valid_check import (
+    EnvelopeCheck,
+    RtreeCheck,
     ValidRtreeValidator,
-    rtree_valid_check_query,
 )
 
+from reference_queries import rtree_valid_check_query
+
 
 def test_rtree_valid_all_tables():
     assert len(ValidRtreeValidator.check_rtree_is_valid(rtree_index_list=[])) == 0
@@ -26,3 +36,156 @@ def test_with_gpkg_allcorrect():
     dataset = open_dataset("tests/data/test_allcorrect.gpkg", lambda x: None)
     checks = list(rtree_valid_check_query(dataset))
     assert len(checks) == 0
+
+
+requires_rtreecheck = pytest.mark.skipif(
+    not rtree_valid_check.sqlite_has_rtreecheck(),
+    reason="the sqlite3 module has no rtreecheck",
+)
+
+
+def rtree_gpkg(path, tables, rows):
+    with closing(sqlite3.connect(path)) as connection:
+        for table in tables:
+            connection.execute(
+                f"CREATE VIRTUAL TABLE rtree_{table}_geom "
+                "USING rtree(id, minx, maxx, miny, maxy)"
+            )
+            connection.executemany(
+                f"INSERT INTO rtree_{table}_geom VALUES (?, ?, ?, ?, ?)",
+                [(i, i, i + 1, i, i + 1) for i in range(rows)],
+            )
+        connection.commit()
+    return str(path)
+
+
+@requires_rtreecheck
+def test_sqlite_rtree_check():
+    check, seconds = rtree_valid_check.sqlite_rtree_check(
+        "tests/data/test_rtree_valid.gpkg", "test_rtree_check", "geometry"
+    )
+    assert check == RtreeCheck(
+        "test_rtree_check",
+        ["Found (1 -> 2) in %_rowid table, expected (1 -> 1)"],
+        False,
+    )
+    assert seconds >= 0
+    check, _ = rtree_valid_check.sqlite_rtree_check(
+        "tests/data/test_rtree_valid.gpkg", "missing", "geometry"
+    )
+    assert check == RtreeCheck("missing", ["missing"], False)
+
+
+@requires_rtreecheck
+def test_sqlite_rtree_check_timeout(tmp_path):
+    gpkg_path = rtree_gpkg(tmp_path / "rtree.gpkg", ["t"], 20000)
+    check, _ = rtree_valid_check.sqlite_rtree_check(gpkg_path, "t", "geom", timeout=0)
+    assert check == RtreeCheck("t", [], True)
+    check, _ = rtree_valid_check.sqlite_rtree_check(gpkg_path, "t", "geom", timeout=60)
+    assert check == RtreeCheck("t", [], False)
+
+
+@requires_rtreecheck
+def test_sqlite_rtree_checks_parallel(tmp_path):
+    tables = ["a", "b", "c"]
+    gpkg_path = rtree_gpkg(tmp_path / "rtree.gpkg", tables, 100)
+    progress = []
+    checks = list(
+        rtree_valid_check.sqlite_rtree_checks(
+            gpkg_path,
+            [(table, "geom") for table in tables],
+            jobs=2,
+            progress=lambda table, status, seconds: progress.append((table, status)),
+        )
+    )
+    assert [check.table_name for check in checks] == tables
+    assert sorted(progress) == [(table, rtree_valid_check.RTREE_OK) for table in tables]
+
+
+def test_check_status():
+    assert rtree_valid_check.check_status(RtreeCheck("t", [], False)) == "ok"
+    assert rtree_valid_check.check_status(RtreeCheck("t", ["t"], False)) == "invalid"
+    assert rtree_valid_check.check_status(RtreeCheck("t", [], True)) == "timeout"
+
+
+def gpb_line(points, envelope=(), empty=False):
+    flags = ({0: 0, 4: 1}[len(envelope)] << 1) | (0b10000 if empty else 0) | 1
+    flat = [value for point in points for value in point]
+    return struct.pack(
+        f"<2sBBi{len(envelope)}d", b"GP", 0, flags, 28992, *envelope
+    ) + struct.pack(f"<BII{len(flat)}d", 1, 2, len(points), *flat)
+
+
+def test_float32_ulp():
+    assert rtree_valid_check.float32_ulp(1.0) == 2.0**-23
+    assert rtree_valid_check.float32_ulp(-0.75) == 2.0**-24
+    assert rtree_valid_check.float32_ulp(0) == 2.0**-149
+    assert rtree_valid_check.envelope_matches((1.0, 2.0), (1 + 2.0**-22, 2.0))
+    assert not rtree_valid_check.envelope_matches((1.0, 2.0), (1 + 2.0**-20, 2.0))
+
+
+def test_envelope_differences():
+    envelope = (0, 1, 0, 1)
+    differences = rtree_valid_check.envelope_differences(
+        [(1, *envelope), (2, *envelope), (4, 0, 2, 0, 1), (5, *envelope)],
+        [
+            (1, envelope),
+            (2, None),
+            (3, envelope),
+            (4, envelope),
+            (5, rtree_valid_check.UNREADABLE),
+            (6, None),
+        ],
+    )
+    assert list(differences) == [("extra", 2), ("missing", 3), ("mismatch", 4)]
+    assert rtree_valid_check.count_differences(
+        [("extra", 2), ("missing", 3), ("extra", 1)]
+    ) == [["missing", 1, 3], ["extra", 2, 2]]
+
+
+def test_sqlite_envelope_check(tmp_path):
+    gpkg_path = str(tmp_path / "envelope.gpkg")
+    line = [(i / 10, i / 7) for i in range(100)]
+    rows = [
+        (1, gpb_line([(0.1, 0.2)]), (0.1, 0.1, 0.2, 0.2)),
+        (2, None, None),
+        (3, gpb_line([], empty=True), (0, 0, 0, 0)),
+        (4, gpb_line(line[:2], envelope=(0, 0.1, 0, 1 / 7)), None),
+        (5, gpb_line(line), (0, 9.9, 0, 99 / 7)),
+        (6, gpb_line(line[:2], envelope=(0, 0.1, 0, 1 / 7)), (0, 0.2, 0, 1 / 7)),
+        (7, b"not a geometry", (0, 1, 0, 1)),
+        (9, None, (0, 1, 0, 1)),
+    ]
+    with closing(sqlite3.connect(gpkg_path)) as connection:
+        connection.execute("CREATE TABLE t (fid INTEGER PRIMARY KEY, geom BLOB)")
+        connection.execute(
+            "CREATE VIRTUAL TABLE rtree_t_geom USING rtree(id, minx, maxx, miny, maxy)"
+        )
+        for fid, geometry, entry in rows:
+            if fid != 9:
+                connection.execute("INSERT INTO t VALUES (?, ?)", (fid, geometry))
+            if entry is not None:
+                connection.execute(
+                    "INSERT INTO rtree_t_geom VALUES (?, ?, ?, ?, ?)", (fid, *entry)
+                )
+        connection.commit()
+
+    assert rtree_valid_check.sqlite_envelope_check(
+        gpkg_path, "t", "geom"
+    ) == EnvelopeCheck(
+        "t", [], [["missing", 1, 4], ["extra", 2, 3], ["mismatch", 1, 6]]
+    )
+    assert rtree_valid_check.sqlite_envelope_check(
+        gpkg_path, "missing", "geom"
+    ) == EnvelopeCheck("missing", ["missing"], [])
+
+
+def test_envelope_with_gpkg():
+    dataset = open_dataset("tests/data/test_allcorrect.gpkg", lambda x: None)
+    checks = list(rtree_valid_check.envelope_checks(dataset))
+    assert checks == [EnvelopeCheck("test_allcorrect", [], [])]
+    assert rtree_valid_check.gdal_envelope_check(
+        dataset, "test_allcorrect", "geom"
+    ) == EnvelopeCheck("test_allcorrect", [], [])
+    validator = ValidRtreeValidator(dataset, rtree_mode="both")
+    assert list(validator.check()) == []